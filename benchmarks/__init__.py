@@ -0,0 +1,5 @@
+"""
+Load and latency benchmarks for the TMF server (not tests): local stand-ins for
+Keycloak, Maestro and the OCI registry, a fake helm CLI, a load generator driving
+tmf_server.app and microbenchmarks. Run with `python -m benchmarks.run --help`.
+"""
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the `helm` CLI (`package` and `push` only), used when benchmarking with
+HELM_IN_PROCESS=false. FAKE_HELM_LATENCY (seconds per command) and FAKE_HELM_ERROR_RATE
+shape its behaviour. `install(bin_dir)` puts a `helm` executable into bin_dir.
+"""
+import os
+import random
+import stat
+import sys
+import tarfile
+import time
+
+
+def install(bin_dir: str) -> str:
+    os.makedirs(bin_dir, exist_ok=True)
+    path = os.path.join(bin_dir, "helm")
+    with open(path, "w") as f:
+        f.write(f"#!/bin/sh\nexec {sys.executable} {os.path.abspath(__file__)} \"$@\"\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def _option(args: list, name: str, default=None):
+    return args[args.index(name) + 1] if name in args else default
+
+
+def _chart_name(chart_dir: str) -> str:
+    with open(os.path.join(chart_dir, "Chart.yaml")) as f:
+        for line in f:
+            if line.startswith("name:"):
+                return line.split(":", 1)[1].strip()
+    raise SystemExit("Error: Chart.yaml has no name")
+
+
+def main(args: list) -> int:
+    time.sleep(float(os.getenv("FAKE_HELM_LATENCY", "0")))
+    if random.random() < float(os.getenv("FAKE_HELM_ERROR_RATE", "0")):
+        print("Error: injected helm failure", file=sys.stderr)
+        return 1
+
+    command = args[0] if args else ""
+    if command == "package":
+        chart_dir = args[1]
+        name = _chart_name(chart_dir)
+        version = _option(args, "--version", "0.1.0")
+        destination = _option(args, "--destination", ".")
+        archive = os.path.join(destination, f"{name}-{version}.tgz")
+        with tarfile.open(archive, "w:gz") as tar:
+            tar.add(chart_dir, arcname=name)
+        return 0
+    if command == "push":
+        return 0
+    print(f"Error: unsupported fake helm command {args}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,169 @@
+import math
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_SPEC_ID = "BenchHPAIntentSpec"
+
+## Lifecycle states after which an intent is no longer moving
+SETTLED_STATES = {"ORDERED", "DEPLOYING", "DEPLOYED", "FAILED", "CANCELLED"}
+
+
+def configure_environment(workdir: str, backends, helm_mode: str = "in-process", async_mode: bool = False,
+                          store_backend: str = "sqlite", order_tracking: bool = False, fake_helm_bin: str = None):
+    """
+    Point the engine at the stub backends. Must run before tmf_server (and config) is imported,
+    since Config is read at import time. Generated files go to `workdir`.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    os.environ.update({
+        "MAESTRO_HOST": backends.url,
+        "KEYCLOAK_HOST": backends.url,
+        "KC_CLIENT_ID": "bench",
+        "KC_CLIENT_SECRET": "bench",
+        "KC_PASS": "bench",
+        "HELM_REGISTRY": backends.registry_url,
+        "HELM_REGISTRY_PLAIN_HTTP": "true",
+        "HELM_IN_PROCESS": "true" if helm_mode == "in-process" else "false",
+        "ASYNC_PROVISIONING": "true" if async_mode else "false",
+        "ORDER_TRACKING": "true" if order_tracking else "false",
+        "STORE_BACKEND": store_backend,
+        "STORE_PATH": os.path.join(workdir, "intents.db"),
+        "CHART_DIGEST_CACHE_FILE": os.path.join(workdir, "chart-digests.json"),
+        "LOCK_DIR": os.path.join(workdir, ".locks"),
+        "SERVICE_SPEC_ID": "bench-service-spec",
+        "K8S_SERVICE_ID": "bench-k8s-service",
+    })
+    os.environ.pop("INTENT_SAVE_DIR", None)
+    if fake_helm_bin:
+        os.environ["PATH"] = fake_helm_bin + os.pathsep + os.environ.get("PATH", "")
+
+
+def bench_intent_spec() -> dict:
+    return {
+        "@type": "IntentSpecification",
+        "id": BENCH_SPEC_ID,
+        "name": "BenchHPAIntentSpecification",
+        "characteristicSpecification": [
+            {"name": "deploymentName", "valueType": "string"},
+            {"name": "namespace", "valueType": "string"},
+            {"name": "metric", "valueType": "string"},
+            {"name": "targetAverageValue", "valueType": "number"},
+            {"name": "minReplicas", "valueType": "integer"},
+            {"name": "maxReplicas", "valueType": "integer"},
+            {"name": "sourceNamespace", "valueType": "string", "minCardinality": 0},
+            {"name": "sourceJob", "valueType": "string", "minCardinality": 0},
+        ],
+    }
+
+
+def bench_intent(index: int, run_id: str) -> dict:
+    """A valid Intent whose deployment and metric are unique, so admission never sees a conflict."""
+    name = f"bench-{run_id}-{index}"
+    return {
+        "@type": "Intent",
+        "id": str(uuid.uuid4()),
+        "name": name,
+        "intentSpecification": {"id": BENCH_SPEC_ID, "name": "BenchHPAIntentSpecification"},
+        "expression": {"iri": f"http://example.org/metrics/{name}"},
+        "target": {
+            "deploymentName": f"{name}-deployment",
+            "namespace": "bench",
+            "metric": f"bench_{run_id}_{index}_requests",
+            "targetAverageValue": 1,
+            "minReplicas": 1,
+            "maxReplicas": 10,
+            "sourceNamespace": "bench-source",
+            "sourceJob": f"{name}-service",
+        },
+    }
+
+
+def percentiles(samples: list[float]) -> dict:
+    """count, mean, p50/p90/p99 and max of latencies, in milliseconds (nearest-rank)."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000
+
+    return {
+        "count": len(ordered),
+        "meanMs": sum(ordered) / len(ordered) * 1000,
+        "p50Ms": rank(50),
+        "p90Ms": rank(90),
+        "p99Ms": rank(99),
+        "maxMs": ordered[-1] * 1000,
+    }
+
+
+def run_load(app, total: int = 200, concurrency: int = 8, async_mode: bool = False,
+             settle_timeout: float = 30.0, poll_interval: float = 0.005) -> dict:
+    """
+    Drive POST, GET and DELETE /intent through `app` (the Flask app of tmf_server) with `concurrency`
+    clients until `total` intents went through the whole cycle. In async mode the time until the
+    intent settles (service order placed, or failed) is measured too, by polling GET /intent/<id>.
+    """
+    run_id = uuid.uuid4().hex[:6]
+    setup = app.test_client()
+    setup.post("/intentSpecification", json=bench_intent_spec())
+
+    latencies: dict[str, list[float]] = {"POST /intent": [], "GET /intent/<id>": [], "DELETE /intent/<id>": []}
+    if async_mode:
+        latencies["provisioned"] = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+    local = threading.local()
+
+    def record(operation, seconds, status):
+        with lock:
+            latencies[operation].append(seconds)
+            statuses[f"{operation} {status}"] += 1
+
+    def cycle(index):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        intent = bench_intent(index, run_id)
+        path = f"/intent/{intent['id']}"
+
+        started = time.perf_counter()
+        response = client.post("/intent", json=intent)
+        record("POST /intent", time.perf_counter() - started, response.status_code)
+        if response.status_code not in (201, 202):
+            return
+
+        if async_mode:
+            deadline = started + settle_timeout
+            while time.perf_counter() < deadline:
+                status = client.get(path).get_json().get("lifecycleStatus")
+                if status in SETTLED_STATES:
+                    break
+                time.sleep(poll_interval)
+            record("provisioned", time.perf_counter() - started, status)
+
+        get_started = time.perf_counter()
+        response = client.get(path)
+        record("GET /intent/<id>", time.perf_counter() - get_started, response.status_code)
+
+        delete_started = time.perf_counter()
+        response = client.delete(path)
+        record("DELETE /intent/<id>", time.perf_counter() - delete_started, response.status_code)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench-client") as executor:
+        list(executor.map(cycle, range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "params": {"total": total, "concurrency": concurrency, "asyncProvisioning": async_mode},
+        "elapsedSeconds": elapsed,
+        "intentsPerSecond": total / elapsed if elapsed else None,
+        "latency": {operation: percentiles(samples) for operation, samples in latencies.items()},
+        "statuses": dict(sorted(statuses.items())),
+    }
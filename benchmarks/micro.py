@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import time
+
+from .load import bench_intent, percentiles
+
+
+def measure(fn, repeat: int) -> dict:
+    """Latency distribution of `repeat` calls of fn(i)."""
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def run_micro(tmf_server, rule_counts=(0, 100, 1000, 5000), repeat: int = 50) -> dict:
+    """
+    Time the per-intent artifact generators while the number of existing adapter rules
+    (and of existing charts) grows. `tmf_server` is the imported server module; its
+    adapter values model is swapped for a scratch one for the duration of the run.
+    """
+    from utils.adapter import AdapterValuesModel
+    from utils.maestro_client import models
+
+    results = {
+        "update_adapter_values_yaml (write-through)": {},
+        "update_adapter_values_yaml (write-behind)": {},
+        "create_or_update_hpa_chart": {},
+        "produce_service_order_payload": {},
+        "produce_service_order_payload + json.dumps": {},
+        "produce_service_order_body": {},
+    }
+    original_model = tmf_server.adapter_values
+    try:
+        for count in rule_counts:
+            scratch = tempfile.mkdtemp(prefix=f"micro-{count}-")
+            values_path = os.path.join(scratch, "prometheus-adapter-values.yaml")
+            charts_dir = os.path.join(scratch, "hpa")
+            existing = [bench_intent(i, f"e{count}") for i in range(count)]
+
+            ## Seed the values file with `count` rules, then measure one more rule per call
+            seed = AdapterValuesModel(values_path, tmf_server.default_adapter_values, write_delay=0)
+            seed.upsert_many([tmf_server.build_adapter_rule(intent) for intent in existing])
+            seed.flush()
+            new_intents = [bench_intent(i, f"n{count}") for i in range(repeat)]
+
+            for label, write_delay in (("write-through", 0), ("write-behind", 3600)):
+                tmf_server.adapter_values = AdapterValuesModel(
+                    values_path, tmf_server.default_adapter_values, write_delay=write_delay
+                )
+                len(tmf_server.adapter_values)  # load outside the timed calls
+                results[f"update_adapter_values_yaml ({label})"][str(count)] = measure(
+                    lambda i: tmf_server.update_adapter_values_yaml(new_intents[i]), repeat
+                )
+                tmf_server.adapter_values.remove_many(
+                    [intent["target"]["metric"] for intent in new_intents]
+                )
+                tmf_server.adapter_values.flush()
+
+            for intent in existing:
+                tmf_server.create_or_update_hpa_chart(intent, base_dir=charts_dir)
+            results["create_or_update_hpa_chart"][str(count)] = measure(
+                lambda i: tmf_server.create_or_update_hpa_chart(new_intents[i], base_dir=charts_dir), repeat
+            )
+            results["produce_service_order_payload"][str(count)] = measure(
+                lambda i: models.produce_service_order_payload(new_intents[i]["name"] + "-hpa", "0.1.0"), repeat
+            )
+            ## Cost per order: the dict alone, the dict serialized as requests would do, the pre-serialized body
+            results["produce_service_order_payload + json.dumps"][str(count)] = measure(
+                lambda i: json.dumps(models.produce_service_order_payload(new_intents[i]["name"] + "-hpa", "0.1.0")),
+                repeat
+            )
+            results["produce_service_order_body"][str(count)] = measure(
+                lambda i: models.produce_service_order_body(new_intents[i]["name"] + "-hpa", "0.1.0"), repeat
+            )
+    finally:
+        tmf_server.adapter_values = original_model
+    return {"params": {"ruleCounts": list(rule_counts), "repeat": repeat}, "results": results}
@@ -0,0 +1,156 @@
+"""
+Benchmark entry point:
+
+    python -m benchmarks.run --suite all --out bench.json
+    python -m benchmarks.run --suite load --concurrency 16 --total 500 --maestro-latency 0.05 --compare bench.json
+
+Everything runs locally: Keycloak, Maestro and the OCI registry are stubbed (see stubs.py) and
+`--helm cli` uses the fake helm binary. Results are written as JSON; `--compare` prints the
+ratio of each headline number against an earlier result file.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from .stubs import StubBackends, StubBehaviour
+from . import fake_helm
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load and latency benchmarks for the TMF server")
+    parser.add_argument("--suite", choices=["load", "micro", "all"], default="all")
+    parser.add_argument("--out", help="Write the JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="Earlier JSON result file to compare against")
+    parser.add_argument("--workdir", help="Directory for generated files (default: a temporary one)")
+    ## Load generator
+    parser.add_argument("--total", type=int, default=200, help="Intents created, read and deleted")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--async", dest="async_mode", action="store_true", help="Use ASYNC_PROVISIONING")
+    parser.add_argument("--helm", choices=["in-process", "cli"], default="in-process")
+    parser.add_argument("--store", choices=["sqlite", "memory"], default="sqlite")
+    ## Stub behaviour (seconds / ratio)
+    parser.add_argument("--keycloak-latency", type=float, default=0.005)
+    parser.add_argument("--maestro-latency", type=float, default=0.02)
+    parser.add_argument("--maestro-error-rate", type=float, default=0.0)
+    parser.add_argument("--registry-latency", type=float, default=0.002)
+    parser.add_argument("--helm-latency", type=float, default=0.05, help="Per command of the fake helm CLI")
+    parser.add_argument("--helm-error-rate", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.3, help="Uniform jitter, as a fraction of each latency")
+    ## Microbenchmarks
+    parser.add_argument("--rule-counts", default="0,100,1000,5000")
+    parser.add_argument("--repeat", type=int, default=50)
+    return parser.parse_args(argv)
+
+
+def environment_info() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "gitCommit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def headline_numbers(results: dict) -> dict:
+    """Flat name -> number view used for comparisons (higher is better only for intentsPerSecond)."""
+    numbers = {}
+    load = results.get("load")
+    if load:
+        numbers["load.intentsPerSecond"] = load["intentsPerSecond"]
+        for operation, stats in load["latency"].items():
+            for key in ("p50Ms", "p99Ms"):
+                if key in stats:
+                    numbers[f"load.{operation}.{key}"] = stats[key]
+    micro = results.get("micro")
+    if micro:
+        for name, by_count in micro["results"].items():
+            for count, stats in by_count.items():
+                numbers[f"micro.{name}[{count}].p50Ms"] = stats.get("p50Ms")
+    return numbers
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    now, before = headline_numbers(current), headline_numbers(baseline)
+    lines = []
+    for name, value in now.items():
+        previous = before.get(name)
+        if value is None or not previous:
+            continue
+        lines.append(f"{name:<70} {previous:>10.3f} -> {value:>10.3f}  x{value / previous:.2f}")
+    return lines
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="tmf-bench-")
+
+    def behaviour(latency, error_rate=0.0):
+        return StubBehaviour(latency=latency, jitter=latency * args.jitter, error_rate=error_rate)
+
+    backends = StubBackends(
+        keycloak=behaviour(args.keycloak_latency),
+        maestro=behaviour(args.maestro_latency, args.maestro_error_rate),
+        registry=behaviour(args.registry_latency),
+    ).start()
+    fake_helm_bin = None
+    if args.helm == "cli":
+        fake_helm_bin = os.path.join(workdir, "bin")
+        fake_helm.install(fake_helm_bin)
+        os.environ["FAKE_HELM_LATENCY"] = str(args.helm_latency)
+        os.environ["FAKE_HELM_ERROR_RATE"] = str(args.helm_error_rate)
+
+    from .load import configure_environment, run_load
+    configure_environment(workdir, backends, helm_mode=args.helm, async_mode=args.async_mode,
+                          store_backend=args.store, fake_helm_bin=fake_helm_bin)
+    sys.path.insert(0, REPO_ROOT)
+
+    results = {"meta": {**environment_info(), "workdir": workdir, "args": vars(args)}}
+    engine_output = io.StringIO()
+    try:
+        ## The engine logs every generated file; keep that out of the report
+        with contextlib.redirect_stdout(engine_output):
+            import tmf_server
+            if args.suite in ("load", "all"):
+                results["load"] = run_load(tmf_server.app, total=args.total, concurrency=args.concurrency,
+                                           async_mode=args.async_mode)
+                results["load"]["backendRequests"] = dict(sorted(backends.requests.items()))
+            if args.suite in ("micro", "all"):
+                from .micro import run_micro
+                rule_counts = [int(n) for n in args.rule_counts.split(",") if n.strip()]
+                results["micro"] = run_micro(tmf_server, rule_counts=rule_counts, repeat=args.repeat)
+            tmf_server.shutdown()
+    finally:
+        backends.stop()
+
+    document = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(document + "\n")
+        print(f"Wrote {args.out}")
+    else:
+        print(document)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print("\n".join(compare(results, baseline)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
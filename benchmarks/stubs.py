@@ -0,0 +1,173 @@
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+@dataclass
+class StubBehaviour:
+    """Latency (mean and uniform jitter, in seconds) and error rate of one stubbed service."""
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+
+    def delay(self):
+        seconds = self.latency + random.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def fails(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+class StubBackends(ThreadingHTTPServer):
+    """
+    One local HTTP server standing in for every backend the engine talks to:
+
+    - Keycloak: POST /realms/<realm>/protocol/openid-connect/token
+    - Maestro:  /tmf-api/serviceOrdering/v4/serviceOrder[/<id>] and /tmf-api/serviceInventory/v4/service/<id>
+    - OCI registry (plain HTTP, no auth): /v2/<repository>/blobs/... and /v2/<repository>/manifests/<tag>
+
+    Each service has its own StubBehaviour; a failing request is answered with 503.
+    Service orders advance acknowledged -> inProgress -> completed on successive GETs.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, keycloak: Optional[StubBehaviour] = None, maestro: Optional[StubBehaviour] = None,
+                 registry: Optional[StubBehaviour] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _StubHandler)
+        self.behaviours = {
+            "keycloak": keycloak or StubBehaviour(),
+            "maestro": maestro or StubBehaviour(),
+            "registry": registry or StubBehaviour(),
+        }
+        self.lock = threading.Lock()
+        self.orders: dict[str, dict] = {}
+        self.blobs: set[str] = set()
+        self.uploads: set[str] = set()
+        self.requests: dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    @property
+    def registry_url(self) -> str:
+        return f"oci://{self.server_address[0]}:{self.server_address[1]}/charts"
+
+    def start(self) -> "StubBackends":
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-backends", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: StubBackends
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _service(self) -> str:
+        if self.path.startswith("/realms/"):
+            return "keycloak"
+        if self.path.startswith("/v2/"):
+            return "registry"
+        return "maestro"
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, body=None, headers: Optional[dict] = None):
+        data = b"" if body is None else body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        if body is not None and not isinstance(body, bytes):
+            self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _handle(self):
+        service = self._service()
+        body = self._body()
+        behaviour = self.server.behaviours[service]
+        with self.server.lock:
+            key = f"{service} {self.command}"
+            self.server.requests[key] = self.server.requests.get(key, 0) + 1
+        behaviour.delay()
+        if behaviour.fails():
+            return self._send(503, {"message": f"injected {service} failure"})
+        getattr(self, f"_{service}")(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = _handle
+
+    def _keycloak(self, body: bytes):
+        self._send(200, {
+            "access_token": uuid.uuid4().hex,
+            "expires_in": 300,
+            "refresh_token": uuid.uuid4().hex,
+            "refresh_expires_in": 1800,
+        })
+
+    def _maestro(self, body: bytes):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        orders = self.server.orders
+        if parts[1:3] == ["serviceOrdering", "v4"]:
+            if self.command == "POST":
+                order = json.loads(body or b"{}")
+                order_id = str(uuid.uuid4())
+                order.update({"id": order_id, "state": "acknowledged", "description": "stub order", "polls": 0})
+                for index, item in enumerate(order.get("serviceOrderItem") or []):
+                    item["id"] = str(index)
+                    item.setdefault("service", {})["id"] = f"{order_id}-{index}"
+                with self.server.lock:
+                    orders[order_id] = order
+                return self._send(201, order)
+            order_id = parts[4] if len(parts) > 4 else None
+            with self.server.lock:
+                order = orders.get(order_id)
+                if order is not None and self.command == "GET":
+                    order["polls"] += 1
+                    order["state"] = ("acknowledged", "inProgress", "completed")[min(order["polls"] // 2, 2)]
+                if order is not None and self.command == "DELETE":
+                    del orders[order_id]
+            if order is None:
+                return self._send(404, {"message": f"ServiceOrder {order_id} not found"})
+            return self._send(204 if self.command == "DELETE" else 200, None if self.command == "DELETE" else order)
+        if parts[1:3] == ["serviceInventory", "v4"]:
+            if self.command == "PATCH":
+                return self._send(200, json.loads(body or b"{}"))
+            return self._send(200, {"id": parts[-1], "state": "active"})
+        self._send(404, {"message": f"No stub for {self.path}"})
+
+    def _registry(self, body: bytes):
+        path = self.path.split("?")[0]
+        if "/blobs/uploads/" in path:
+            if self.command == "POST":
+                upload_id = uuid.uuid4().hex
+                self.server.uploads.add(upload_id)
+                return self._send(202, b"", {"Location": f"{path.rstrip('/')}/{upload_id}"})
+            digest = self.path.split("digest=")[-1]
+            with self.server.lock:
+                self.server.blobs.add(digest)
+            return self._send(201, b"", {"Docker-Content-Digest": digest})
+        if "/blobs/" in path:
+            digest = path.rsplit("/", 1)[-1]
+            return self._send(200 if digest in self.server.blobs else 404, b"")
+        if "/manifests/" in path:
+            return self._send(201, b"")
+        self._send(404, b"")
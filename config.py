@@ -8,6 +8,13 @@ class Config:
     ## Infrastructure URLs
     MAESTRO_HOST = os.getenv("MAESTRO_HOST")
     KEYCLOAK_HOST = os.getenv("KEYCLOAK_HOST")
+    ## Maestro/Keycloak HTTP transport
+    MAESTRO_POOL_SIZE = int(os.getenv("MAESTRO_POOL_SIZE", "10"))
+    MAESTRO_CONNECT_TIMEOUT = float(os.getenv("MAESTRO_CONNECT_TIMEOUT", "3.05"))
+    MAESTRO_READ_TIMEOUT = float(os.getenv("MAESTRO_READ_TIMEOUT", "30"))
+    # Retries apply to connection errors and to idempotent calls (GET) answering 429/502/503/504
+    MAESTRO_RETRIES = int(os.getenv("MAESTRO_RETRIES", "3"))
+    MAESTRO_BACKOFF_FACTOR = float(os.getenv("MAESTRO_BACKOFF_FACTOR", "0.5"))
     ## Credentials - SECRETS REMOVED
     KC_CLIENT_ID = os.getenv("KC_CLIENT_ID")
     KC_CLIENT_SECRET = os.getenv("KC_CLIENT_SECRET")
@@ -16,10 +23,22 @@ class Config:
     ## Helm & Registry
     HELM_REGISTRY = os.getenv("HELM_REGISTRY")
     DEFAULT_VERSION = os.getenv("DEFAULT_VERSION", "0.1.0")
+    # Package charts in memory and push them over the OCI API; the helm CLI is the fallback
+    HELM_IN_PROCESS = os.getenv("HELM_IN_PROCESS", "true").lower() in ("1", "true", "yes")
+    # Content digest -> pushed chart; unchanged charts are not packaged/pushed again
+    CHART_DIGEST_CACHE_FILE = os.getenv("CHART_DIGEST_CACHE_FILE", "helm/chart-digests.json")
+    HELM_REGISTRY_PLAIN_HTTP = os.getenv("HELM_REGISTRY_PLAIN_HTTP", "false").lower() in ("1", "true", "yes")
+    # Target characteristic (e.g. namespace) whose value groups intents into one umbrella HPA chart,
+    # pushed and ordered once per group; empty gives every intent its own chart and service order
+    CHART_GROUP_BY = os.getenv("CHART_GROUP_BY", "")
     
     ## Prometheus
     PROM_URL = os.getenv("PROM_URL", "http://prometheus-stack-kube-prom-prometheus.monitoring.svc")
     PROM_PORT = int(os.getenv("PROM_PORT", "9090"))
+    # Adapter rule changes are coalesced into one file write per this many seconds (0 = every change)
+    ADAPTER_WRITE_DELAY = float(os.getenv("ADAPTER_WRITE_DELAY", "0.5"))
+    # Serve intents whose queries share a shape from one regex (name.matches) rule instead of a rule each
+    ADAPTER_CONSOLIDATION = os.getenv("ADAPTER_CONSOLIDATION", "false").lower() in ("1", "true", "yes")
 
     ## Service Order Metadata
     EXPECTED_COMPLETED_DATE = os.getenv("EXPECTED_COMPLETED_DATE", "2026-11-15T16:30:53Z")
@@ -29,12 +48,72 @@ class Config:
     K8S_SERVICE_ID = os.getenv("K8S_SERVICE_ID")
     SERVICE_NAME = os.getenv("SERVICE_NAME", "HPA Test Application")
 
+    ## Provisioning pipeline
+    # When enabled, POST /intent returns 202 instead of 201 and the stages run on a background worker pool
+    ASYNC_PROVISIONING = os.getenv("ASYNC_PROVISIONING", "false").lower() in ("1", "true", "yes")
+    PROVISIONING_WORKERS = int(os.getenv("PROVISIONING_WORKERS", "4"))
+    PROVISIONING_MAX_PENDING = int(os.getenv("PROVISIONING_MAX_PENDING", "100"))
+    # Finished jobs stay available at GET /intent/{id}/job for this many seconds, at most PROVISIONING_MAX_JOBS of them
+    PROVISIONING_JOB_TTL = float(os.getenv("PROVISIONING_JOB_TTL", "3600"))
+    PROVISIONING_MAX_JOBS = int(os.getenv("PROVISIONING_MAX_JOBS", "1000"))
+    # A job recorded as pending/running that made no progress for this many seconds is taken as lost
+    PROVISIONING_TIMEOUT = float(os.getenv("PROVISIONING_TIMEOUT", "600"))
+    # Items of POST/DELETE /intent/batch processed in parallel
+    BATCH_PARALLELISM = int(os.getenv("BATCH_PARALLELISM", "4"))
+    # Responses of POST /intent(/batch) sent with an Idempotency-Key are replayed to retries for this many seconds
+    IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+    # Seconds a duplicate waits for the original request still in flight before answering 409
+    IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "30"))
+    # A key claimed by a request that never completed (its process died) is free again after this many seconds
+    IDEMPOTENCY_LEASE = float(os.getenv("IDEMPOTENCY_LEASE", str(PROVISIONING_TIMEOUT)))
+    # Poll Maestro for the state of placed service orders until they complete or fail
+    ORDER_TRACKING = os.getenv("ORDER_TRACKING", "true").lower() in ("1", "true", "yes")
+    # Seconds between polls of an order: starts at the interval, grows by the backoff factor while nothing changes
+    ORDER_POLL_INTERVAL = float(os.getenv("ORDER_POLL_INTERVAL", "2"))
+    ORDER_POLL_MAX_INTERVAL = float(os.getenv("ORDER_POLL_MAX_INTERVAL", "60"))
+    ORDER_POLL_BACKOFF = float(os.getenv("ORDER_POLL_BACKOFF", "2"))
+    ORDER_POLL_CONCURRENCY = int(os.getenv("ORDER_POLL_CONCURRENCY", "4"))
+    # Consecutive failed polls after which an order is no longer polled and its Intent becomes UNKNOWN (0: never)
+    ORDER_POLL_MAX_ERRORS = int(os.getenv("ORDER_POLL_MAX_ERRORS", "10"))
+    # Seconds between reconciliations of the store, chart directories, adapter values and Maestro orders
+    # (the first runs at startup); 0 disables the background loop, POST /reconcile still works
+    RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", "300"))
+    # Every item is inspected at least this often, even when nothing it depends on changed
+    RECONCILE_FULL_INTERVAL = float(os.getenv("RECONCILE_FULL_INTERVAL", "3600"))
+    # Maestro calls per second the reconciler may make (0 = unlimited)
+    RECONCILE_MAESTRO_RATE = float(os.getenv("RECONCILE_MAESTRO_RATE", "2"))
+    # Intents created or updated less than this many seconds ago are left to their provisioning job
+    RECONCILE_GRACE = float(os.getenv("RECONCILE_GRACE", "300"))
+
     ## Flask / CORS
+    # List responses with more items than this are streamed chunk by chunk
+    STREAM_THRESHOLD = int(os.getenv("STREAM_THRESHOLD", "100"))
+    # Serialized GET representations kept for conditional requests (ETag / If-None-Match)
+    REPRESENTATION_CACHE_SIZE = int(os.getenv("REPRESENTATION_CACHE_SIZE", "1024"))
+    # JSON backend for responses, the store and Maestro bodies: auto (orjson when installed), orjson or json
+    JSON_CODEC = os.getenv("JSON_CODEC", "auto")
     CORS_ALLOWED_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
 
+    ## Production server (gunicorn -c gunicorn.conf.py tmf_server:app)
+    PORT = int(os.getenv("PORT", "4000"))
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "2"))
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", "8"))
+    SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "120"))
+    # Werkzeug debugger for `python tmf_server.py` only; never enable it on a reachable host
+    FLASK_DEBUG = os.getenv("FLASK_DEBUG", "false").lower() in ("1", "true", "yes")
+    # Advisory lock files serializing worker processes on shared files (adapter values, chart dirs, admission)
+    LOCK_DIR = os.getenv("LOCK_DIR", ".locks")
+    # Directory where worker processes share their metrics, so /metrics on any worker covers all of them
+    # (gunicorn.conf.py uses <LOCK_DIR>/metrics when unset and running several workers)
+    PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
     ## Persistence (The missing var)
     # If not set in .env, this will be None, and tmf_server.py will skip saving
     INTENT_SAVE_DIR = os.getenv("INTENT_SAVE_DIR")
+    # 'sqlite' (durable, shared by worker processes) or 'memory' (plain dicts, dumped to INTENT_SAVE_DIR on shutdown)
+    STORE_BACKEND = os.getenv("STORE_BACKEND", "sqlite")
+    STORE_PATH = os.getenv("STORE_PATH", os.path.join(INTENT_SAVE_DIR or ".", "intents.db"))
 
     @classmethod
     def validate_config(cls):
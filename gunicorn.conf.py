@@ -0,0 +1,50 @@
+"""
+gunicorn settings for running the TMF server with several worker processes:
+
+    gunicorn -c gunicorn.conf.py tmf_server:app
+
+Each worker imports tmf_server after the fork (no preload), so SQLite connections,
+timers and the provisioning thread pool are never shared across processes.
+Shared files are protected by the advisory locks in Config.LOCK_DIR.
+"""
+import glob
+import os
+from config import Config
+
+bind = f"0.0.0.0:{Config.PORT}"
+workers = Config.SERVER_WORKERS
+threads = Config.SERVER_THREADS
+worker_class = "gthread"
+timeout = Config.SERVER_TIMEOUT
+graceful_timeout = Config.SERVER_TIMEOUT
+preload_app = False
+
+## The 'memory' store lives inside one process: more workers would each see a different set of intents
+if Config.STORE_BACKEND == "memory" and workers > 1:
+    print("!!! STORE_BACKEND=memory cannot be shared by worker processes, running a single worker")
+    workers = 1
+
+## Every worker answers /metrics for all of them, through files in a shared directory (forked workers inherit Config)
+if workers > 1 and not Config.PROMETHEUS_MULTIPROC_DIR:
+    Config.PROMETHEUS_MULTIPROC_DIR = os.path.join(Config.LOCK_DIR, "metrics")
+
+
+def on_starting(server):
+    ## Counters start from zero with the server, not from the files of a previous run
+    if Config.PROMETHEUS_MULTIPROC_DIR:
+        for path in glob.glob(os.path.join(Config.PROMETHEUS_MULTIPROC_DIR, "metrics-*.json")):
+            os.remove(path)
+
+
+def post_worker_init(worker):
+    ## The app is only loaded by now (no preload): start order tracking and reconciliation in this worker
+    import tmf_server
+    tmf_server.start_background_tasks()
+
+
+def worker_exit(server, worker):
+    ## Only workers that imported the app have anything to drain
+    import sys
+    tmf_server = sys.modules.get("tmf_server")
+    if tmf_server is not None:
+        tmf_server.shutdown()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+import pytest
+
+from benchmarks.load import bench_intent, bench_intent_spec, configure_environment
+from benchmarks.stubs import StubBackends
+
+## Config is read when first imported, so the server is pointed at local stub backends (Keycloak,
+## Maestro, OCI registry) and a scratch directory before any test module imports it
+BACKENDS = StubBackends().start()
+configure_environment(tempfile.mkdtemp(prefix="tmf-tests-"), BACKENDS)
+## Intents are reconciled right after they are written, without waiting on the Maestro rate limit
+os.environ.update({"RECONCILE_GRACE": "0", "RECONCILE_MAESTRO_RATE": "0"})
+
+
+@pytest.fixture(scope="session")
+def tmf_server():
+    import tmf_server
+    yield tmf_server
+    ## Pending writes go to the scratch directory, not to wherever the process exits from
+    tmf_server.shutdown()
+
+
+@pytest.fixture
+def backends():
+    return BACKENDS
+
+
+@pytest.fixture
+def client(tmf_server):
+    """Test client of the server; whatever a test created is removed afterwards."""
+    yield tmf_server.app.test_client()
+    intents = list(tmf_server.INTENT_STORE.values())
+    for intent in intents:
+        tmf_server.remove_intent_locally(intent)
+    tmf_server.remove_adapter_rules({intent.get("target", {}).get("metric") for intent in intents})
+    for spec_id in list(tmf_server.INTENT_SPEC_STORE):
+        del tmf_server.INTENT_SPEC_STORE[spec_id]
+    for service_order_id in list(tmf_server.map_intent_to_so_ids):
+        del tmf_server.map_intent_to_so_ids[service_order_id]
+
+
+@pytest.fixture
+def spec(client):
+    body = bench_intent_spec()
+    assert client.post("/intentSpecification", json=body).status_code == 201
+    return body
+
+
+def new_intent(index: int) -> dict:
+    """A valid Intent of the `spec` fixture, with its own name, deployment and metric."""
+    return bench_intent(index, "test")
@@ -0,0 +1,19 @@
+from utils.helm.digest_cache import ChartDigestCache
+
+
+def test_entries_survive_a_reload(tmp_path):
+    path = str(tmp_path / "digests.json")
+    ChartDigestCache(path).put("sha256:a", "app-hpa", "0.1.0", "r/app-hpa:0.1.0@sha256:1")
+
+    assert ChartDigestCache(path).get("sha256:a") == {
+        "chartName": "app-hpa", "version": "0.1.0", "reference": "r/app-hpa:0.1.0@sha256:1"
+    }
+
+
+def test_pushing_the_same_tag_replaces_the_older_digest(tmp_path):
+    cache = ChartDigestCache(str(tmp_path / "digests.json"))
+    cache.put("sha256:a", "app-hpa", "0.1.0", "r/app-hpa:0.1.0@sha256:1")
+    cache.put("sha256:b", "app-hpa", "0.1.0", "r/app-hpa:0.1.0@sha256:2")
+
+    assert cache.get("sha256:a") is None
+    assert cache.get("sha256:b")["reference"] == "r/app-hpa:0.1.0@sha256:2"
@@ -0,0 +1,14 @@
+from utils.idempotency.cache import request_fingerprint
+
+
+def test_fingerprint_ignores_key_order_and_whitespace():
+    a = request_fingerprint("POST", "/intent", b'{"name": "a", "target": {"x": 1, "y": [{"b": 2, "a": 1}]}}')
+    b = request_fingerprint("POST", "/intent", b'{"target":{"y":[{"a":1,"b":2}],"x":1},"name":"a"}')
+    assert a == b
+
+
+def test_fingerprint_tells_bodies_and_paths_apart():
+    body = b'{"name": "a"}'
+    assert request_fingerprint("POST", "/intent", body) != request_fingerprint("POST", "/intent", b'{"name": "b"}')
+    assert request_fingerprint("POST", "/intent", body) != request_fingerprint("POST", "/intent/batch", body)
+    assert request_fingerprint("POST", "/intent", b"not json") != request_fingerprint("POST", "/intent", b"not  json")
@@ -0,0 +1,24 @@
+import json
+
+from tests.conftest import new_intent
+
+
+def test_batch_delete_rejects_ids_that_are_not_strings(client, spec):
+    response = client.delete("/intent/batch", json=["a", {"x": 1}, ""])
+
+    assert response.status_code == 400
+    violations = json.loads(response.headers["sl-violations"])
+    assert [v["location"] for v in violations] == [["request", "body", 1], ["request", "body", 2]]
+
+
+def test_batch_delete_tears_a_repeated_id_down_once(client, spec, backends):
+    intent = new_intent(0)
+    assert client.post("/intent", json=intent).status_code == 201
+    deletes = backends.requests.get("maestro DELETE", 0)
+
+    response = client.delete("/intent/batch", json=[intent["id"], intent["id"]])
+
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json] == [200]
+    assert backends.requests.get("maestro DELETE", 0) == deletes + 1
+    assert client.get(f"/intent/{intent['id']}").status_code == 404
@@ -0,0 +1,83 @@
+import pytest
+from tests.conftest import new_intent
+
+
+@pytest.fixture
+def intents(client, spec):
+    """Three intents, in creation order."""
+    created = [new_intent(index) for index in range(3)]
+    for intent in created:
+        assert client.post("/intent", json=intent).status_code == 201
+    return created
+
+
+def test_offset_and_limit_page_the_listing(client, intents):
+    response = client.get("/intent?offset=1&limit=1")
+
+    assert response.status_code == 200
+    assert [intent["id"] for intent in response.json] == [intents[1]["id"]]
+    assert response.headers["X-Result-Count"] == "1"
+    assert response.headers["X-Total-Count"] == "3"
+
+
+@pytest.mark.parametrize("query", ["offset=-1", "offset=abc", "limit=1.5"])
+def test_malformed_paging_is_400(client, spec, query):
+    response = client.get(f"/intent?{query}")
+
+    assert response.status_code == 400
+    assert "non-negative integer" in response.json["message"]
+
+
+def test_fields_selects_the_returned_attributes(client, intents):
+    response = client.get("/intent?fields=name,lifecycleStatus")
+
+    assert response.status_code == 200
+    for listed, intent in zip(response.json, intents):
+        assert set(listed) - {"href"} == {"id", "@type", "name", "lifecycleStatus"}
+        assert (listed["id"], listed["name"]) == (intent["id"], intent["name"])
+
+
+def test_large_pages_are_streamed(client, intents, tmf_server, monkeypatch):
+    monkeypatch.setattr(tmf_server.Config, "STREAM_THRESHOLD", 1)
+
+    response = client.get("/intent?fields=name")
+
+    assert response.is_streamed
+    assert [intent["name"] for intent in response.json] == [intent["name"] for intent in intents]
+    assert response.headers["X-Total-Count"] == "3"
+
+
+def test_filters_select_matching_intents(client, intents):
+    target = intents[1]["target"]
+
+    by_metric = client.get(f"/intent?target.metric={target['metric']}")
+    by_deployment = client.get(
+        f"/intent?target.namespace={target['namespace']}&target.deploymentName={target['deploymentName']}")
+    by_spec = client.get(f"/intent?intentSpecification.id={intents[0]['intentSpecification']['id']}&limit=2")
+
+    assert [intent["id"] for intent in by_metric.json] == [intents[1]["id"]]
+    assert [intent["id"] for intent in by_deployment.json] == [intents[1]["id"]]
+    assert [intent["id"] for intent in by_spec.json] == [intents[0]["id"], intents[1]["id"]]
+    assert by_spec.headers["X-Total-Count"] == "3"
+    assert client.get("/intent?lifecycleStatus=FAILED").json == []
+
+
+def test_if_none_match_is_answered_with_304_until_a_write(client, intents):
+    etag = client.get("/intent").headers["ETag"]
+
+    unchanged = client.get("/intent", headers={"If-None-Match": etag})
+    assert (unchanged.status_code, unchanged.data, unchanged.headers["ETag"]) == (304, b"", etag)
+
+    assert client.post("/intent", json=new_intent(3)).status_code == 201
+
+    changed = client.get("/intent", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json) == 4
+
+
+def test_single_documents_answer_if_none_match(client, intents, spec):
+    for path in (f"/intent/{intents[0]['id']}", f"/intentSpecification/{spec['id']}"):
+        etag = client.get(path).headers["ETag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
@@ -0,0 +1,34 @@
+import json
+
+from tests.conftest import new_intent
+
+
+def test_characteristics_must_be_objects_with_a_name(client):
+    body = {"@type": "IntentSpecification", "name": "spec",
+            "characteristicSpecification": ["cpu", {"valueType": "string"}, {"name": "a", "valueType": 1}]}
+
+    response = client.post("/intentSpecification", json=body)
+
+    assert response.status_code == 400
+    locations = [v["location"] for v in json.loads(response.headers["sl-violations"])]
+    assert ["characteristicSpecification", 0] in [loc[-2:] for loc in locations]
+    assert len(locations) == 3
+
+
+def test_intent_of_a_spec_stored_with_malformed_characteristics_is_created(client, tmf_server):
+    intent = new_intent(0)
+    spec_id = intent["intentSpecification"]["id"]
+    ## Written before characteristics were validated
+    tmf_server.INTENT_SPEC_STORE[spec_id] = {"@type": "IntentSpecification", "id": spec_id, "name": "spec",
+                                            "characteristicSpecification": ["cpu"]}
+
+    assert client.post("/intent", json=intent).status_code == 201
+
+
+def test_violations_header_is_ascii(client):
+    response = client.post("/intentSpecification", json={"@type": "IntentSpecification", "name": "spec", "validFor": "漢字"})
+
+    assert response.status_code == 400
+    header = response.headers["sl-violations"]
+    assert header.isascii()
+    assert "漢字" in json.loads(header)[0]["message"]
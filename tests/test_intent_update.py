@@ -0,0 +1,51 @@
+from tests.conftest import new_intent
+
+
+def create(client, index=0):
+    intent = new_intent(index)
+    assert client.post("/intent", json=intent).status_code == 201
+    return client.get(f"/intent/{intent['id']}").json
+
+
+def test_patch_bumps_the_version_and_moves_the_existing_order(client, spec, backends):
+    intent = create(client)
+    orders_placed = backends.requests.get("maestro POST", 0)
+    inventory_patches = backends.requests.get("maestro PATCH", 0)
+
+    response = client.patch(f"/intent/{intent['id']}", json={"target": {"maxReplicas": 20}})
+
+    assert response.status_code == 200
+    updated = response.json
+    assert updated["target"]["maxReplicas"] == 20
+    assert updated["target"]["minReplicas"] == intent["target"]["minReplicas"]
+    assert updated["version"] == "0.1.1"
+    assert updated["chartArtifact"]["version"] == "0.1.1"
+    assert updated["serviceOrderId"] == intent["serviceOrderId"]
+    assert backends.requests.get("maestro POST", 0) == orders_placed
+    assert backends.requests["maestro PATCH"] == inventory_patches + 1
+
+
+def test_put_cannot_rename_an_intent(client, spec):
+    intent = create(client)
+    body = {key: value for key, value in intent.items() if key not in ("id", "version")}
+
+    response = client.put(f"/intent/{intent['id']}", json={**body, "name": "renamed"})
+
+    assert response.status_code == 400
+    assert client.get(f"/intent/{intent['id']}").json["name"] == intent["name"]
+
+
+def test_write_changes_the_etag(client, spec):
+    intent = create(client)
+    etag = client.get(f"/intent/{intent['id']}").headers["ETag"]
+
+    assert client.patch(f"/intent/{intent['id']}", json={"description": "changed"}).status_code == 200
+
+    response = client.get(f"/intent/{intent['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json["description"] == "changed"
+
+
+def test_update_of_unknown_intent_is_404(client, spec):
+    assert client.patch("/intent/unknown", json={"description": "x"}).status_code == 404
@@ -0,0 +1,118 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.maestro_client import MaestroTranslatorClient
+from utils.maestro_client.transport import build_session
+
+
+class ScriptedServer(ThreadingHTTPServer):
+    """
+    Answers each request with the next scripted status (200 once the script is used up), and
+    issues Keycloak tokens: a request carrying any other than the latest one gets a 401.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _ScriptedHandler)
+        self.statuses: list[int] = []
+        self.requests: list[tuple[str, str, str]] = []
+        self.valid_token = "fresh"
+        self.tokens_issued = 0
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+
+class _ScriptedHandler(BaseHTTPRequestHandler):
+    server: ScriptedServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server = self.server
+        server.requests.append((self.command, self.path, self.headers.get("Authorization")))
+        if self.path.startswith("/realms/"):
+            server.tokens_issued += 1
+            return self._send(200, {"access_token": server.valid_token, "expires_in": 300})
+        authorization = self.headers.get("Authorization")
+        if authorization is not None and authorization != f"Bearer {server.valid_token}":
+            return self._send(401, {"message": "token expired"})
+        status = server.statuses.pop(0) if server.statuses else 200
+        self._send(status, {"id": "so-1", "state": "acknowledged"})
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+@pytest.fixture
+def server():
+    server = ScriptedServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    session = build_session(retries=2, backoff_factor=0, backoff_jitter=0)
+    yield session
+    session.close()
+
+
+@pytest.mark.parametrize("status", [429, 502, 503, 504])
+def test_idempotent_call_is_retried(server, session, status):
+    server.statuses = [status, status]
+    response = session.get(f"{server.url}/order")
+    assert response.status_code == 200
+    assert len(server.requests) == 3
+
+
+def test_retries_are_bounded(server, session):
+    server.statuses = [503] * 5
+    assert session.get(f"{server.url}/order").status_code == 503
+    assert len(server.requests) == 3
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "DELETE"])
+def test_non_idempotent_call_is_not_retried(server, session, method):
+    server.statuses = [503]
+    assert session.request(method, f"{server.url}/order").status_code == 503
+    assert len(server.requests) == 1
+
+
+def test_other_server_errors_are_not_retried(server, session):
+    server.statuses = [500]
+    assert session.get(f"{server.url}/order").status_code == 500
+    assert len(server.requests) == 1
+
+
+def test_expired_token_is_renewed_once_on_401(server):
+    client = MaestroTranslatorClient(host=server.url, host_keycloak=server.url, retries=0)
+    client.ensure_access_token()
+    ## Keycloak revoked the cached token before its announced expiry
+    server.valid_token = "renewed"
+
+    order = client.get_service_order("so-1", False)
+
+    assert order["id"] == "so-1"
+    assert server.tokens_issued == 2
+    assert [auth for method, path, auth in server.requests if path.startswith("/tmf-api/")] == \
+        ["Bearer fresh", "Bearer renewed"]
+    client.session.close()
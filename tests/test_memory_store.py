@@ -0,0 +1,32 @@
+from utils.store import DictIntentStore
+
+
+def watch_bumps(collection, observe):
+    """Call `observe(key)` right after every version bump of the collection."""
+    seen = []
+    bump = collection._bump
+
+    def recording_bump(key):
+        bump(key)
+        seen.append(observe(key))
+
+    collection._bump = recording_bump
+    return seen
+
+
+def test_intent_version_is_bumped_after_the_write_and_the_index():
+    intents = DictIntentStore().intents
+    seen = watch_bumps(intents, lambda key: (
+        intents.version(key), intents.get(key), set(intents.indexes["namespace"].get("ns", ()))
+    ))
+    intents["i"] = {"id": "i", "target": {"namespace": "ns"}}
+    del intents["i"]
+    assert seen == [(1, {"id": "i", "target": {"namespace": "ns"}}, {"i"}), (2, None, set())]
+
+
+def test_spec_version_is_bumped_after_pop():
+    specs = DictIntentStore().specs
+    specs["s"] = {"id": "s"}
+    seen = watch_bumps(specs, lambda key: (specs.version(key), specs.get(key)))
+    specs.pop("s")
+    assert seen == [(2, None)]
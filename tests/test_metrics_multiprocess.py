@@ -0,0 +1,54 @@
+from utils.metrics import MetricsRegistry, Counter, Gauge, Histogram
+
+
+def _worker(directory):
+    registry = MetricsRegistry()
+    requests = registry.register(Counter("requests_total", "Requests", ["code"]))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    queue = registry.register(Gauge("queue_depth", "Queue depth"))
+    documents = registry.register(Gauge("documents", "Documents", multiprocess_mode="max"))
+    registry.enable_multiprocess(str(directory), interval=3600)
+    return registry, requests, latency, queue, documents
+
+
+def _sample(text, series):
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.split()[-1])
+    return None
+
+
+def test_every_worker_serves_the_metrics_of_all_workers(tmp_path):
+    first, requests_a, latency_a, queue_a, documents_a = _worker(tmp_path)
+    second, requests_b, latency_b, queue_b, documents_b = _worker(tmp_path)
+
+    requests_a.inc(2, code="200")
+    requests_b.inc(3, code="200")
+    latency_a.observe(0.05)
+    latency_b.observe(0.5)
+    queue_a.set(1)
+    queue_b.set(4)
+    documents_a.set(10)
+    documents_b.set(10)
+    second.write_samples()
+
+    text = first.render()
+    assert _sample(text, 'requests_total{code="200"}') == 5
+    assert _sample(text, 'latency_seconds_bucket{le="0.1"}') == 1
+    assert _sample(text, 'latency_seconds_count') == 2
+    assert _sample(text, "queue_depth") == 5
+    assert _sample(text, "documents") == 10
+
+
+def test_counters_of_an_exited_worker_are_kept(tmp_path):
+    first, requests_a, _, queue_a, _ = _worker(tmp_path)
+    second, requests_b, _, queue_b, _ = _worker(tmp_path)
+    requests_a.inc(code="200")
+    requests_b.inc(code="200")
+    queue_a.set(1)
+    queue_b.set(4)
+    second.close()
+
+    text = first.render()
+    assert _sample(text, 'requests_total{code="200"}') == 2
+    assert _sample(text, "queue_depth") == 1
@@ -0,0 +1,98 @@
+import pytest
+
+from benchmarks.stubs import StubBackends
+from config import Config
+from utils.helm import helm
+from utils.helm.oci import OciRegistryClient, parse_oci_reference
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(Config, "HELM_REGISTRY_PLAIN_HTTP", True)
+    stubs = StubBackends().start()
+    yield stubs
+    helm.close_registry_clients()
+    stubs.stop()
+
+
+@pytest.fixture
+def chart(tmp_path):
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "Chart.yaml").write_text("apiVersion: v2\nname: app-hpa\nversion: 0.1.0\n")
+    (tmp_path / "templates" / "hpa.yaml").write_text("kind: HorizontalPodAutoscaler\n")
+    return tmp_path
+
+
+def test_push_uploads_config_chart_and_manifest(registry, chart):
+    reference = helm.package_and_push_in_process("app-hpa", "0.2.0+1", chart, registry.registry_url)
+
+    host, _ = parse_oci_reference(registry.registry_url)
+    assert reference.startswith(f"{host}/charts/app-hpa:0.2.0_1@sha256:")
+    assert len(registry.blobs) == 2
+    assert registry.requests["registry POST"] == 2
+    assert registry.requests["registry PUT"] == 3
+
+
+def test_push_reuses_the_client_and_skips_existing_blobs(registry, chart):
+    helm.package_and_push_in_process("app-hpa", "0.2.0", chart, registry.registry_url)
+    host, _ = parse_oci_reference(registry.registry_url)
+    client = helm.registry_client(host)
+
+    helm.package_and_push_in_process("app-hpa", "0.2.0", chart, registry.registry_url)
+
+    assert helm.registry_client(host) is client
+    ## Blobs already in the registry are not uploaded again; only the manifest is pushed
+    assert registry.requests["registry POST"] == 2
+    assert registry.requests["registry PUT"] == 4
+
+
+def test_close_registry_clients_drops_the_pool(registry, chart):
+    helm.package_and_push_in_process("app-hpa", "0.2.0", chart, registry.registry_url)
+    host, _ = parse_oci_reference(registry.registry_url)
+    client = helm.registry_client(host)
+
+    helm.close_registry_clients()
+
+    assert helm.registry_client(host) is not client
+
+
+class _Response:
+    def __init__(self, status_code, headers=None, json_body=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._json = json_body
+        self.text = ""
+
+    def json(self):
+        return self._json
+
+
+class _TokenRegistrySession:
+    """Registry with bearer auth whose tokens are valid for one request only."""
+
+    def __init__(self):
+        self.valid = set()
+        self.issued = 0
+
+    def get(self, url, **kwargs):
+        self.issued += 1
+        token = f"t{self.issued}"
+        self.valid.add(f"Bearer {token}")
+        return _Response(200, json_body={"token": token})
+
+    def request(self, method, url, headers=None, **kwargs):
+        token = (headers or {}).get("Authorization")
+        if token not in self.valid:
+            return _Response(401, {"WWW-Authenticate": 'Bearer realm="http://auth/token",service="registry"'})
+        self.valid.discard(token)
+        return _Response(200)
+
+
+def test_expired_cached_token_is_renewed():
+    session = _TokenRegistrySession()
+    client = OciRegistryClient("registry", session=session)
+
+    assert client.blob_exists("charts/app-hpa", "sha256:0")
+    ## The cached token is no longer valid: the 401 leads to a new token, not a failed push
+    assert client.blob_exists("charts/app-hpa", "sha256:0")
+    assert session.issued == 2
@@ -0,0 +1,43 @@
+import threading
+
+from utils.provisioning import ServiceOrderTracker
+
+
+def lost_orders(fetch, **kwargs):
+    lost = []
+    done = threading.Event()
+
+    def on_lost(intent_id, order_id, error, gone):
+        lost.append((intent_id, order_id, str(error), gone))
+        done.set()
+
+    tracker = ServiceOrderTracker(fetch, on_change=lambda intent_id, order: None, initial_interval=0.001,
+                                  max_interval=0.001, on_lost=on_lost, **kwargs)
+    tracker.track("so-1", "intent-1")
+    assert done.wait(5)
+    tracker.shutdown()
+    return tracker, lost
+
+
+def failing(message, calls):
+    def fetch(order_id):
+        calls.append(order_id)
+        raise ConnectionError(message)
+    return fetch
+
+
+def test_order_gone_is_dropped_at_once():
+    calls = []
+    tracker, lost = lost_orders(failing("Error 404: not found", calls),
+                                is_gone=lambda error: str(error).startswith("Error 404"))
+    assert lost == [("intent-1", "so-1", "Error 404: not found", True)]
+    assert calls == ["so-1"]
+    assert len(tracker) == 0
+
+
+def test_order_is_dropped_after_max_errors():
+    calls = []
+    tracker, lost = lost_orders(failing("Error 503: down", calls), max_errors=3)
+    assert lost == [("intent-1", "so-1", "Error 503: down", False)]
+    assert len(calls) == 3
+    assert len(tracker) == 0
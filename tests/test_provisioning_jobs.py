@@ -0,0 +1,43 @@
+import time
+
+from utils.provisioning import ProvisioningJob, ProvisioningJobRunner
+
+
+def run(runner, intent_id):
+    return runner.run_inline(ProvisioningJob(intent_id, ["a"]), lambda job: None)
+
+
+def test_finished_jobs_are_dropped_beyond_max_finished():
+    runner = ProvisioningJobRunner(max_workers=1, max_finished=2)
+    for i in range(5):
+        run(runner, f"i{i}")
+    assert [runner.get(f"i{i}") is not None for i in range(5)] == [False, False, False, True, True]
+
+
+def test_finished_jobs_expire_but_active_ones_stay():
+    runner = ProvisioningJobRunner(max_workers=1, finished_ttl=0.05)
+    run(runner, "done")
+    active = runner.track(ProvisioningJob("active", ["a"]))
+    time.sleep(0.1)
+    run(runner, "next")
+    assert runner.get("done") is None
+    assert runner.get("active") is active
+
+
+def test_on_change_sees_every_state_and_its_errors_are_contained():
+    seen = []
+
+    def on_change(job):
+        seen.append(job.state)
+        raise RuntimeError("store unavailable")
+
+    runner = ProvisioningJobRunner(max_workers=1, on_change=on_change)
+
+    def provision(job):
+        with job.stage("a"):
+            pass
+
+    job = runner.run_inline(ProvisioningJob("i", ["a"]), provision)
+    assert job.state == "completed"
+    assert seen == ["pending", "running", "completed"]
+    assert job.to_dict()["lastUpdate"] == job.completion_date
@@ -0,0 +1,13 @@
+import pytest
+
+from utils.promql import QueryTemplate, QueryTemplateError
+
+
+@pytest.mark.parametrize("field, value", [("groupBy", "pod"), ("labelMatchers", "pod"), ("groupBy", None)])
+def test_list_fields_must_be_arrays(field, value):
+    with pytest.raises(QueryTemplateError, match=f"{field} must be an array"):
+        QueryTemplate.from_dict({field: value})
+
+
+def test_group_by_array_is_kept_as_labels():
+    assert QueryTemplate.from_dict({"groupBy": ["pod", "namespace"]}).group_by == ("pod", "namespace")
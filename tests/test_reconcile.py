@@ -0,0 +1,102 @@
+import os
+import shutil
+
+from tests.conftest import new_intent
+from utils.reconcile import Drift, Observation, RateLimiter, Reconciler
+
+
+def test_rate_limiter_allows_a_burst_then_paces_calls():
+    limiter = RateLimiter(rate=50, burst=2)
+    assert limiter.acquire() == 0 and limiter.acquire() == 0
+    assert 0 < limiter.acquire() <= 0.02
+
+
+def test_rate_limiter_disabled_by_rate_zero():
+    limiter = RateLimiter(0)
+    assert sum(limiter.acquire(100) for _ in range(3)) == 0
+
+
+class Item:
+    def __init__(self, key, drifted=False):
+        self.key, self.fingerprint, self.drifted = key, 1, drifted
+        self.inspected = self.repaired = 0
+
+    def inspect(self):
+        self.inspected += 1
+        if not self.drifted:
+            return []
+        return [Drift("stale", self.key, "out of sync", repair=self.repair)]
+
+    def repair(self):
+        self.repaired += 1
+        self.drifted = False
+
+
+def reconciler_of(*items):
+    return Reconciler(lambda: [Observation(i.key, i.fingerprint, i.inspect) for i in items])
+
+
+def test_dry_run_reports_drift_without_repairing():
+    item = Item("a", drifted=True)
+    report = reconciler_of(item).run(dry_run=True)
+    assert [d["kind"] for d in report["drift"]] == ["stale"]
+    assert item.repaired == 0 and report["repaired"] == 0
+
+
+def test_repair_then_skip_items_whose_fingerprint_did_not_change():
+    clean, drifted = Item("clean"), Item("drifted", drifted=True)
+    reconciler = reconciler_of(clean, drifted)
+
+    assert reconciler.run()["repaired"] == 1
+    ## The repaired item is inspected once more; after that only changed fingerprints are
+    assert reconciler.run()["inspected"] == 1
+    report = reconciler.run()
+    assert (report["inspected"], report["skipped"]) == (0, 2)
+    clean.fingerprint = 2
+    assert reconciler.run()["inspected"] == 1
+    assert reconciler.run(full=True)["inspected"] == 2
+
+
+def test_failed_repair_is_reported_and_retried():
+    item = Item("a", drifted=True)
+    item.repair = lambda: (_ for _ in ()).throw(RuntimeError("registry down"))
+    reconciler = reconciler_of(item)
+
+    drift = reconciler.run()["drift"]
+    assert drift[0]["repaired"] is False and drift[0]["error"] == "registry down"
+    assert reconciler.run()["inspected"] == 1
+
+
+def test_missing_chart_is_reported_then_repaired(client, spec):
+    intent = new_intent(0)
+    assert client.post("/intent", json=intent).status_code == 201
+    chart_dir = os.path.join("helm", "hpa", intent["name"])
+    shutil.rmtree(chart_dir)
+
+    report = client.get("/reconcile?full=true").json
+    assert ("chartMissing", f"chart:{intent['id']}") in [(d["kind"], d["key"]) for d in report["drift"]]
+    assert not os.path.exists(chart_dir)
+
+    report = client.post("/reconcile?full=true").json
+    assert [(d["kind"], d["repaired"]) for d in report["drift"]] == [("chartMissing", True)]
+    assert os.path.exists(os.path.join(chart_dir, "values.yaml"))
+    assert client.get("/reconcile?full=true").json["drift"] == []
+
+
+def test_service_order_lost_by_maestro_is_placed_again(client, spec, backends):
+    intent = new_intent(0)
+    assert client.post("/intent", json=intent).status_code == 201
+    lost = client.get(f"/intent/{intent['id']}").json["serviceOrderId"]
+    with backends.lock:
+        del backends.orders[lost]
+
+    report = client.post("/reconcile?full=true").json
+
+    assert [(d["kind"], d["repaired"]) for d in report["drift"]] == [("serviceOrderMissing", True)]
+    replaced = client.get(f"/intent/{intent['id']}").json["serviceOrderId"]
+    assert replaced != lost and replaced in backends.orders
+
+
+def test_importing_the_server_starts_no_background_work(tmf_server):
+    assert tmf_server.reconciler._thread is None
+    assert tmf_server.order_tracker._thread is None
@@ -0,0 +1,30 @@
+from utils import jsoncodec
+from utils.maestro_client import models
+
+
+def _mutate(node):
+    """Change every dict and list reachable from `node`."""
+    if isinstance(node, dict):
+        for value in list(node.values()):
+            _mutate(value)
+        node["injected"] = True
+    elif isinstance(node, list):
+        for value in list(node):
+            _mutate(value)
+        node.append("injected")
+
+
+def test_payload_is_independent_of_the_template():
+    _mutate(models.produce_service_order_payload("app-a-hpa", "0.1.0"))
+
+    payload = models.produce_service_order_payload("app-a-hpa", "0.1.0")
+    body = models.produce_service_order_body("app-a-hpa", "0.1.0")
+    assert "injected" not in jsoncodec.dumps_str(payload)
+    assert b"injected" not in body
+
+
+def test_body_matches_payload():
+    body = jsoncodec.loads(models.produce_service_order_body("app-b-hpa", "1.2.3"))
+    payload = models.produce_service_order_payload("app-b-hpa", "1.2.3")
+    assert body.keys() == payload.keys()
+    assert "app-b-hpa" in jsoncodec.dumps_str(payload) and "1.2.3" in jsoncodec.dumps_str(payload)
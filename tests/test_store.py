@@ -0,0 +1,151 @@
+import time
+import pytest
+from utils.store import DictIntentStore, SQLiteIntentStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Every backend has to honour the same IntentStore contract."""
+    store = DictIntentStore() if request.param == "memory" else SQLiteIntentStore(str(tmp_path / "store.db"))
+    yield store
+    store.close()
+
+
+def other_connection(store):
+    """The store as another worker sees it: its own connection to the same database (or the same dicts)."""
+    if isinstance(store, SQLiteIntentStore):
+        return SQLiteIntentStore(store.path)
+    return store
+
+
+def intent(intent_id, spec_id="spec", namespace="ns", deployment="web", metric=None, status="pending", chart_group=None):
+    document = {
+        "id": intent_id,
+        "name": intent_id,
+        "intentSpecification": {"id": spec_id},
+        "target": {"namespace": namespace, "deploymentName": deployment, "metric": metric or f"{intent_id}_metric"},
+        "lifecycleStatus": status,
+    }
+    if chart_group:
+        document["chartGroup"] = chart_group
+    return document
+
+
+def test_find_intents_filters(store):
+    store.intents["a"] = intent("a", deployment="web", chart_group="g1")
+    store.intents["b"] = intent("b", deployment="api", status="active", chart_group="g1")
+    store.intents["c"] = intent("c", spec_id="other", deployment="web", status="active")
+
+    def ids(**filters):
+        found, total = store.find_intents(**filters)
+        assert total == len(found)
+        return [document["id"] for document in found]
+
+    assert ids() == ["a", "b", "c"]
+    assert ids(spec_id="spec") == ["a", "b"]
+    assert ids(namespace="ns", deployment="web") == ["a", "c"]
+    assert ids(lifecycle_status="active", deployment="web") == ["c"]
+    assert ids(metric="b_metric") == ["b"]
+    assert ids(chart_group="g1") == ["a", "b"]
+    assert ids(spec_id=None, lifecycle_status="active") == ["b", "c"]
+    assert ids(namespace="elsewhere") == []
+    with pytest.raises(ValueError):
+        store.find_intents(name="a")
+
+
+def test_find_intents_pages_and_follows_updates(store):
+    for intent_id in "abcd":
+        store.intents[intent_id] = intent(intent_id)
+    found, total = store.find_intents(offset=1, limit=2, namespace="ns")
+    assert ([document["id"] for document in found], total) == (["b", "c"], 4)
+
+    ## An update keeps the intent in place but moves it between index entries
+    store.intents["b"] = intent("b", status="active")
+    del store.intents["c"]
+    assert [document["id"] for document in store.find_intents(lifecycle_status="pending")[0]] == ["a", "d"]
+    assert [document["id"] for document in store.find_intents(lifecycle_status="active")[0]] == ["b"]
+    assert [document["id"] for document in store.find_intents()[0]] == ["a", "b", "d"]
+
+
+def test_conflicting_intents(store):
+    store.intents["a"] = intent("a", deployment="web")
+    store.intents["b"] = intent("b", deployment="api", metric="shared")
+    store.intents["c"] = intent("c", deployment="db")
+    conflicts = store.conflicting_intents(intent("new", deployment="web", metric="shared"))
+    assert sorted(document["id"] for document in conflicts) == ["a", "b"]
+    assert store.conflicting_intents(store.intents["c"]) == []
+
+
+def test_version_counters(store):
+    assert (store.intents.version(), store.intents.version("a")) == (0, 0)
+    store.intents["a"] = intent("a")
+    store.intents["b"] = intent("b")
+    store.intents["a"] = intent("a", status="active")
+    assert (store.intents.version(), store.intents.version("a"), store.intents.version("b")) == (3, 2, 1)
+    del store.intents["a"]
+    assert (store.intents.version(), store.intents.version("a")) == (4, 3)
+    with pytest.raises(KeyError):
+        del store.intents["a"]
+    assert store.intents.version() == 4
+
+    store.specs["s"] = {"id": "s"}
+    assert (store.specs.version(), store.specs.version("s"), store.intents.version()) == (1, 1, 4)
+    assert store.intents.versioned_items() == [("b", 1, intent("b"))]
+    assert store.specs.versioned_items() == [("s", 1, {"id": "s"})]
+
+
+def test_epoch_and_versions_are_shared_across_connections(store):
+    other = other_connection(store)
+    store.specs["s"] = {"id": "s"}
+    assert other.epoch == store.epoch
+    assert (other.specs.version(), other.specs.version("s"), other.specs["s"]) == (1, 1, {"id": "s"})
+
+    ## A write through either connection invalidates what the other one cached (same epoch, new version)
+    other.specs["s"] = {"id": "s", "name": "renamed"}
+    assert store.specs.version("s") == 2
+    assert store.specs["s"]["name"] == "renamed"
+
+
+def test_epoch_identifies_the_store(store, tmp_path):
+    if isinstance(store, SQLiteIntentStore):
+        ## The database outlives the process: reopening it keeps the epoch, a new database gets its own
+        assert SQLiteIntentStore(store.path).epoch == store.epoch
+        assert SQLiteIntentStore(str(tmp_path / "other.db")).epoch != store.epoch
+    else:
+        ## Versions restart from zero with every process, so every instance needs its own epoch
+        assert DictIntentStore().epoch != store.epoch
+
+
+def test_service_orders(store):
+    store.service_orders["so-1"] = "a"
+    store.service_orders["so-2"] = "b"
+    assert store.service_order_for_intent("b") == "so-2"
+    del store.service_orders["so-2"]
+    assert store.service_order_for_intent("b") is None
+    assert dict(store.service_orders.items()) == {"so-1": "a"}
+
+
+def test_idempotency_key_claims(store):
+    now = time.time()
+    first = {"fingerprint": "f1", "expiresAt": now + 60}
+    assert store.claim_idempotency_key("k", first) is None
+    assert store.claim_idempotency_key("k", {"fingerprint": "f2", "expiresAt": now + 60}) == first
+    ## Another worker racing for the same key gets the record of the first claim
+    assert other_connection(store).claim_idempotency_key("k", {"fingerprint": "f3", "expiresAt": now + 60}) == first
+
+    ## An expired record can be claimed again
+    store.claim_idempotency_key("old", {"fingerprint": "f1", "expiresAt": now - 1})
+    renewed = {"fingerprint": "f2", "expiresAt": now + 60}
+    assert store.claim_idempotency_key("old", renewed) is None
+    assert store.idempotency["old"] == renewed
+
+
+def test_idempotency_keys_purge(store):
+    now = time.time()
+    store.claim_idempotency_key("expired", {"expiresAt": now - 1})
+    for key in ("k1", "k2", "k3"):
+        store.claim_idempotency_key(key, {"expiresAt": now + 60})
+    ## Expired records go first, then the oldest live ones beyond the bound
+    assert store.purge_idempotency_keys(now, max_entries=2) == 2
+    assert sorted(store.idempotency) == ["k2", "k3"]
+    assert store.purge_idempotency_keys(now, max_entries=2) == 0
@@ -0,0 +1,28 @@
+from utils.validation import ValidatorRegistry
+
+OPEN_SCHEMA = {"type": "object"}
+
+
+def spec(*names):
+    return {"id": "spec", "characteristicSpecification": [{"name": name, "valueType": "integer"} for name in names]}
+
+
+def test_target_validator_follows_the_spec_version_without_evict():
+    registry = ValidatorRegistry(OPEN_SCHEMA, OPEN_SCHEMA)
+    assert registry.target_validator(spec("a"), 1).is_valid({"a": 1})
+    ## Replaced by another worker process: this registry was never told to evict it
+    assert registry.target_validator(spec("b"), 2).is_valid({"b": 1})
+    assert not registry.target_validator(spec("b"), 2).is_valid({"a": 1})
+
+
+def test_target_validator_is_reused_for_the_same_version():
+    registry = ValidatorRegistry(OPEN_SCHEMA, OPEN_SCHEMA)
+    validator = registry.target_validator(spec("a"), 1)
+    assert registry.target_validator(spec("a"), 1) is validator
+
+
+def test_malformed_characteristics_are_skipped():
+    registry = ValidatorRegistry(OPEN_SCHEMA, OPEN_SCHEMA)
+    malformed = {"id": "spec", "characteristicSpecification": ["cpu", {"name": 5}, {"name": "a", "valueType": "integer"}]}
+    assert registry.target_validator(malformed, 1).is_valid({"a": 1})
+    assert registry.target_validator({"id": "spec", "characteristicSpecification": ["cpu"]}, 2) is None
@@ -10,23 +10,53 @@ Endpoints:
   GET  /intent
   POST /intent
   GET  /intent/<id>
+  GET  /intent/<id>/job
+  DELETE /intent/<id>
+  POST   /intent/batch
+  DELETE /intent/batch
+
+  GET  /reconcile   (dry-run drift report)
+  POST /reconcile   (repair drift now)
+
+  GET  /metrics   (Prometheus text format)
 
 Minimal JSON Schema validation performed using jsonschema.
 Generates manifests/<<intent-name>>-hpa.yaml and <<intent-name>>-adapter.yaml on Intent POST.
 """
 
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Response, request, jsonify, make_response
 from flask_cors import CORS
-from jsonschema import Draft7Validator
 import uuid
-import os
 import json
-from datetime import datetime
+import os
+import re
+import atexit
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import wraps
+from datetime import datetime, timezone
 import yaml
 from utils.helm import helm
+from utils.helm.digest_cache import ChartDigestCache
 from pathlib import Path
 from utils.maestro_client import models
 from utils.maestro_client import MaestroTranslatorClient
+from utils.provisioning import ProvisioningJob, ProvisioningJobRunner, JobQueueFullError
+from utils.provisioning import ServiceOrderTracker, order_lifecycle_status, Coalescer
+from utils.provisioning.jobs import STAGE_SECONDS, STAGE_TOTAL
+from utils import metrics
+from utils.validation import ValidatorRegistry
+from utils.adapter import AdapterValuesModel, template_shape, shape_suffix, metric_selector
+from utils import promql
+from utils.store import create_store, page as store_page, intent_index_keys, DictIntentStore
+from utils.representation import RepresentationCache
+from utils import jsoncodec
+from utils.jsoncodec.flask_provider import CodecJSONProvider, indent_requested
+from utils.locking import FileLock, FileLockSet
+from utils.idempotency import IdempotencyCache, IdempotencyKeyMismatch, IdempotencyKeyInProgress, request_fingerprint
+from utils.reconcile import Reconciler, Observation, Drift, RateLimiter
 from config import Config
 
 
@@ -47,7 +77,8 @@ maestro_client = MaestroTranslatorClient(
 )
 
 app = Flask(__name__)
-map_intent_to_so_ids : dict[str, str]= {}
+## jsonify() and request.get_json() go through the shared codec (orjson when installed)
+app.json = CodecJSONProvider(app)
 ## Allow Swagger UI origin(s) and others; adjust origin list if needed
 CORS(app, resources={r"/*": {"origins": Config.CORS_ALLOWED_ORIGINS}},
      supports_credentials=True)
@@ -59,14 +90,60 @@ def add_cors_headers(response):
     else:
         response.headers["Access-Control-Allow-Origin"] = "*"     
     response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, If-None-Match, Idempotency-Key"
+    response.headers["Access-Control-Expose-Headers"] = "ETag, x-result-count, x-total-count, Idempotent-Replayed"
     response.headers["Access-Control-Allow-Credentials"] = "true"
     return response
 
 
-## In-memory stores
-INTENT_SPEC_STORE = {}
-INTENT_STORE = {}
+## Legacy JSON dump: written on shutdown by the 'memory' backend, imported once by 'sqlite'
+PERSIST_FILE = Config.INTENT_SAVE_DIR and os.path.join(Config.INTENT_SAVE_DIR, "intents.json") if Config.INTENT_SAVE_DIR else None
+
+## Stores: every write goes straight to the configured backend
+store = create_store(Config.STORE_BACKEND, Config.STORE_PATH, legacy_json_path=PERSIST_FILE)
+INTENT_SPEC_STORE = store.specs
+INTENT_STORE = store.intents
+map_intent_to_so_ids = store.service_orders
+
+## Serialized GET responses, tagged with the store version they were rendered from
+representation_cache = RepresentationCache(Config.REPRESENTATION_CACHE_SIZE)
+
+## GET /intent filter query parameters -> store filters (each backed by a secondary index)
+INTENT_FILTER_QUERY_PARAMS = {
+    "intentSpecification.id": "spec_id",
+    "target.namespace": "namespace",
+    "target.deploymentName": "deployment",
+    "target.metric": "metric",
+    "lifecycleStatus": "lifecycle_status",
+    "chartGroup": "chart_group",
+}
+
+## Serializes the admission conflict check with the insert of the new intent(s), across worker processes
+ADMISSION_LOCK = FileLock(os.path.join(Config.LOCK_DIR, "admission.lock"))
+
+## Serializes read-modify-write updates of an intent's fields (job progress, order tracking), across worker processes
+INTENT_UPDATE_LOCK = FileLock(os.path.join(Config.LOCK_DIR, "intent-update.lock"))
+
+## One advisory lock per helm/hpa/<name> chart directory: held while it is written, packaged or removed
+CHART_LOCKS = FileLockSet(Config.LOCK_DIR, prefix="chart-")
+
+## Background provisioning (adapter rule -> chart -> helm push -> service order)
+PROVISIONING_STAGES = ["adapterValues", "helmChart", "helmPush", "serviceOrder"]
+## Intents of an umbrella chart group share one chart, push and service order ("chartGroup" stage)
+GROUPED_PROVISIONING_STAGES = ["adapterValues", "chartGroup"]
+CHART_GROUP_PREFIX = "chart-group:"
+## Job progress is also written to the intent ("provisioningJob"), so every worker process sees it
+provisioning_runner = ProvisioningJobRunner(
+    max_workers=Config.PROVISIONING_WORKERS,
+    max_pending=Config.PROVISIONING_MAX_PENDING,
+    finished_ttl=Config.PROVISIONING_JOB_TTL,
+    max_finished=Config.PROVISIONING_MAX_JOBS,
+    on_change=lambda job: record_provisioning_job(job)
+)
+
+## Content digest -> pushed chart artifact, so unchanged charts are not packaged/pushed again
+chart_digest_cache = ChartDigestCache(Config.CHART_DIGEST_CACHE_FILE)
+CHART_CACHE_TOTAL = metrics.counter("tmf_chart_cache_total", "Chart digest cache lookups", ["result"])
 
 ## Minimal JSON Schemas used for validation (only required fields, extend as needed)
 INTENT_SPEC_SCHEMA = {
@@ -80,7 +157,17 @@ INTENT_SPEC_SCHEMA = {
         "version": {"type": "string"},
         "lifecycleStatus": {"type": "string"},
         "validFor": {"type": "object"},
-        "characteristicSpecification": {"type": "array"},
+        "characteristicSpecification": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["name"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "valueType": {"type": "string"}
+                }
+            }
+        },
         "expressionSpecification": {"type": "object"}
     },
     "additionalProperties": True
@@ -91,6 +178,7 @@ INTENT_SCHEMA = {
     "type": "object",
     "required": ["@type", "name", "intentSpecification", "expression"],
     "properties": {
+        "id": {"type": "string"},
         "@type": {"type": "string"},
         "name": {"type": "string"},
         "description": {"type": "string"},
@@ -118,19 +206,38 @@ INTENT_SCHEMA = {
     "additionalProperties": True
 }
 
+## Compiled once; per-IntentSpecification 'target' validators are cached by spec id and version
+validators = ValidatorRegistry(INTENT_SPEC_SCHEMA, INTENT_SCHEMA)
 
-def now_iso():
-    return datetime.utcnow().isoformat() + "Z"
 
+def now_utc():
+    ## Stored as a datetime; the JSON codec writes it as ISO 8601 '...Z'
+    return datetime.now(timezone.utc)
 
-def validation_errors_as_sl_violations(errors):
+
+def seconds_since(timestamp):
+    """Seconds elapsed since a stored timestamp (a datetime, or its ISO 8601 form once read back from JSON)."""
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(timestamp, datetime):
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return (now_utc() - timestamp).total_seconds()
+
+
+def validation_errors_as_sl_violations(errors, prefix=()):
     """
     Convert jsonschema errors to a lightweight 'sl-violations' array similar to Prism.
+    `prefix` is prepended to the error path when validating a sub-document (e.g. 'target').
     """
     violations = []
     for err in errors:
         path = list(err.absolute_path)
-        location = ["request", "body"] + path
+        location = ["request", "body"] + list(prefix) + path
         violations.append({
             "location": location,
             "severity": "Error",
@@ -148,11 +255,123 @@ def json_response_with_violations(status_code, message, violations):
         "message": message,
     }
     resp = make_response(jsonify(body), status_code)
+    ## Header values must stay ASCII (they may echo user input): escaped by stdlib json, not the body codec
     resp.headers["sl-violations"] = json.dumps(violations)
     resp.headers["Content-Type"] = "application/json"
     return resp
 
 
+# -------------------
+# List responses
+# -------------------
+def parse_list_query_args():
+    """
+    Read the TMF630 'offset', 'limit' and 'fields' query parameters.
+    Raises ValueError on malformed values.
+    """
+    def non_negative_int(name):
+        raw = request.args.get(name)
+        if raw is None or raw == "":
+            return None
+        if not raw.isdigit():
+            raise ValueError(f"Query parameter '{name}' must be a non-negative integer")
+        return int(raw)
+
+    offset = non_negative_int("offset") or 0
+    limit = non_negative_int("limit")
+    fields = request.args.get("fields")
+    fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    return offset, limit, fields
+
+
+def project_fields(document, fields):
+    ## 'id', 'href' and '@type' are always returned, as TMF attribute selection requires
+    selected = {key: document[key] for key in ("id", "href", "@type") if key in document}
+    for field in fields:
+        if field in document:
+            selected[field] = document[field]
+    return selected
+
+
+def stream_json_array(items, chunk_size=64):
+    """
+    Serialize a list as a JSON array a chunk of items at a time, so large pages are never
+    held in memory as one response body.
+    """
+    yield b"["
+    for start in range(0, len(items), chunk_size):
+        chunk = b",".join(jsoncodec.dumps(item) for item in items[start:start + chunk_size])
+        yield (b"," if start else b"") + chunk
+    yield b"]"
+
+
+def conditional_json_response(version, render):
+    """
+    GET response for the representation of the request URL at the given store version.
+
+    The strong ETag is derived from the store epoch and the version alone, so a matching
+    If-None-Match is answered with 304 before anything is loaded or serialized. Otherwise
+    the body is served from the representation cache, or produced by `render()`, which
+    returns (body, headers): bytes are cached, an iterator is streamed as is. Returns None
+    when `render()` does (the resource does not exist).
+    The version must be read before the data `render()` loads, so a concurrent write can
+    only make a cached body newer than its version, never older.
+    """
+    etag = f"{store.epoch}-{version}"
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+        resp.set_etag(etag)
+        return resp
+
+    cache_key = request.full_path
+    cached = representation_cache.get(cache_key, version)
+    if cached is None:
+        rendered = render()
+        if rendered is None:
+            return None
+        body, headers = rendered
+        if isinstance(body, bytes):
+            representation_cache.put(cache_key, version, body, headers)
+    else:
+        body, headers = cached
+
+    resp = Response(body, status=200, mimetype="application/json")
+    resp.headers.update(headers)
+    resp.set_etag(etag)
+    return resp
+
+
+def json_bytes(data):
+    ## Same encoding as jsonify()
+    return jsoncodec.dumps(data, indent=indent_requested())
+
+
+def list_collection_response(collection, find=None):
+    """
+    Page of a store collection as a JSON array. `find(offset, limit)` replaces plain paging
+    when the listing is filtered; it must return (items, total matching).
+    """
+    try:
+        offset, limit, fields = parse_list_query_args()
+    except ValueError as e:
+        return json_response_with_violations(400, str(e), [])
+
+    def render():
+        if find is not None:
+            items, total = find(offset, limit)
+        else:
+            items, total = store_page(collection, offset, limit)
+        if fields:
+            items = [project_fields(item, fields) for item in items]
+
+        headers = {"x-result-count": str(len(items)), "x-total-count": str(total)}
+        if len(items) > Config.STREAM_THRESHOLD:
+            return stream_json_array(items), headers
+        return json_bytes(items), headers
+
+    return conditional_json_response(collection.version(), render)
+
+
 # -------------------
 # YAML generation
 # -------------------
@@ -177,43 +396,40 @@ def create_or_update_hpa_chart(intent_data, base_dir="helm/hpa"):
     Each intent gets its own subchart in helm/hpa/<intent-name>/.
     """
     intent_name = intent_data.get("name", str(uuid.uuid4()))
-    chart_dir = os.path.join(base_dir, intent_name)
-    os.makedirs(chart_dir, exist_ok=True)
+    with CHART_LOCKS[intent_name]:
+        return write_hpa_chart(intent_name, intent_data, os.path.join(base_dir, intent_name))
 
-    chart_yaml_path = os.path.join(chart_dir, "Chart.yaml")
-    values_yaml_path = os.path.join(chart_dir, "values.yaml")
-    templates_dir = os.path.join(chart_dir, "templates")
-    os.makedirs(templates_dir, exist_ok=True)
-    template_path = os.path.join(templates_dir, "hpa.yaml")
-
-    # Create Chart.yaml if missing
-    if not os.path.exists(chart_yaml_path):
-        with open(chart_yaml_path, "w") as f:
-            f.write(f"""apiVersion: v2
-name: {intent_name}-hpa
-version: 0.1.0
-description: Auto-generated HPA Helm chart for intent '{intent_name}'
-""")
 
+def build_hpa_values(intent_data):
+    """The values of one HPA, as rendered by HPA_TEMPLATE / HPA_GROUP_TEMPLATE."""
     target = intent_data.get("target", {})
+    metric_name, metric_selector_labels = external_metric_reference(intent_data)
     hpa_values = {
         "name": sanitize_hpa_name(target.get("deploymentName")),
         "namespace": target.get("namespace"),
         "deployment": target.get("deploymentName"),
-        "metric": target.get("metric"),
+        "metric": metric_name,
         "minReplicas": target.get("minReplicas", 1),
         "maxReplicas": target.get("maxReplicas", 10),
         "value": str(target.get("targetAverageValue", "1")),
     }
+    if metric_selector_labels:
+        hpa_values["selector"] = metric_selector_labels
+    return hpa_values
 
-    ## Write values.yaml
-    with open(values_yaml_path, "w") as f:
-        yaml.dump({"hpa": hpa_values}, f, sort_keys=False)
 
-    ## Create template if missing
-    if not os.path.exists(template_path):
-        with open(template_path, "w") as f:
-            f.write("""\
+def hpa_values_yaml(intent_data):
+    """values.yaml of the chart of an intent."""
+    return yaml.dump({"hpa": build_hpa_values(intent_data)}, sort_keys=False)
+
+
+def hpa_group_values_yaml(members):
+    """values.yaml of the umbrella chart of a group, one HPA per member (ordered by name)."""
+    hpas = [build_hpa_values(member) for member in sorted(members, key=lambda m: m.get("name") or m["id"])]
+    return yaml.dump({"hpas": hpas}, sort_keys=False)
+
+
+HPA_TEMPLATE = """\
 apiVersion: autoscaling/v2
 kind: HorizontalPodAutoscaler
 metadata:
@@ -231,85 +447,243 @@ spec:
       external:
         metric:
           name: {{ .Values.hpa.metric }}
+          {{- with .Values.hpa.selector }}
+          selector:
+            matchLabels:
+              {{- toYaml . | nindent 14 }}
+          {{- end }}
         target:
           type: Value
           value: {{ .Values.hpa.value }}
+"""
+
+
+def write_hpa_chart(intent_name, intent_data, chart_dir):
+    os.makedirs(chart_dir, exist_ok=True)
+
+    chart_yaml_path = os.path.join(chart_dir, "Chart.yaml")
+    values_yaml_path = os.path.join(chart_dir, "values.yaml")
+    templates_dir = os.path.join(chart_dir, "templates")
+    os.makedirs(templates_dir, exist_ok=True)
+    template_path = os.path.join(templates_dir, "hpa.yaml")
+
+    # Create Chart.yaml if missing
+    if not os.path.exists(chart_yaml_path):
+        with open(chart_yaml_path, "w") as f:
+            f.write(f"""apiVersion: v2
+name: {intent_name}-hpa
+version: 0.1.0
+description: Auto-generated HPA Helm chart for intent '{intent_name}'
 """)
 
+    ## Write values.yaml
+    with open(values_yaml_path, "w") as f:
+        f.write(hpa_values_yaml(intent_data))
+
+    ## (Re)write the template when missing or from an older server version
+    if not os.path.exists(template_path) or Path(template_path).read_text() != HPA_TEMPLATE:
+        with open(template_path, "w") as f:
+            f.write(HPA_TEMPLATE)
+
     print(f"Created/updated Helm chart for HPA: {chart_dir}")
     return chart_dir
 
-def update_adapter_values_yaml(intent_data, output_dir="manifests"):
+
+## One HPA per entry of .Values.hpas
+HPA_GROUP_TEMPLATE = """\
+{{- range .Values.hpas }}
+---
+apiVersion: autoscaling/v2
+kind: HorizontalPodAutoscaler
+metadata:
+  name: {{ .name }}
+  namespace: {{ .namespace }}
+spec:
+  scaleTargetRef:
+    apiVersion: apps/v1
+    kind: Deployment
+    name: {{ .deployment }}
+  minReplicas: {{ .minReplicas }}
+  maxReplicas: {{ .maxReplicas }}
+  metrics:
+    - type: External
+      external:
+        metric:
+          name: {{ .metric }}
+          {{- with .selector }}
+          selector:
+            matchLabels:
+              {{- toYaml . | nindent 14 }}
+          {{- end }}
+        target:
+          type: Value
+          value: {{ .value }}
+{{- end }}
+"""
+
+
+def chart_group_of(intent_data):
+    """
+    Umbrella chart group of an intent: its explicit `chartGroup`, else the value of the
+    Config.CHART_GROUP_BY target characteristic, as a chart-name-safe string. None for a chart of its own.
+    """
+    value = intent_data.get("chartGroup")
+    if not value and Config.CHART_GROUP_BY:
+        value = intent_data.get("target", {}).get(Config.CHART_GROUP_BY)
+    if value in (None, ""):
+        return None
+    return re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-") or None
+
+
+def write_hpa_group_chart(chart_name, members, chart_dir):
+    """Write the umbrella chart of a group: one values.yaml listing the HPAs of every member intent."""
+    templates_dir = os.path.join(chart_dir, "templates")
+    os.makedirs(templates_dir, exist_ok=True)
+
+    with open(os.path.join(chart_dir, "Chart.yaml"), "w") as f:
+        f.write(f"""apiVersion: v2
+name: {chart_name}
+version: {Config.DEFAULT_VERSION}
+description: Auto-generated umbrella chart with the HPAs of {len(members)} intent(s)
+""")
+    with open(os.path.join(chart_dir, "values.yaml"), "w") as f:
+        f.write(hpa_group_values_yaml(members))
+
+    template_path = os.path.join(templates_dir, "hpas.yaml")
+    if not os.path.exists(template_path) or Path(template_path).read_text() != HPA_GROUP_TEMPLATE:
+        with open(template_path, "w") as f:
+            f.write(HPA_GROUP_TEMPLATE)
+
+    print(f"Created/updated umbrella Helm chart for {len(members)} HPA(s): {chart_dir}")
+    return chart_dir
+
+def default_adapter_values():
+    return {
+        "prometheus": {
+            "url": Config.PROM_URL,
+            "port": Config.PROM_PORT
+        },
+        "rules": {
+            "default": False,
+            "external": []
+        },
+        "customMetrics": {"apiService": {"enabled": True}}
+    }
+
+
+## The shared adapter values live in memory, indexed by metric name, and are written behind to disk
+adapter_values = AdapterValuesModel(
+    os.path.join("manifests", "prometheus-adapter-values.yaml"),
+    default_adapter_values,
+    write_delay=Config.ADAPTER_WRITE_DELAY,
+    lock_path=os.path.join(Config.LOCK_DIR, "adapter-values.lock")
+)
+atexit.register(adapter_values.flush)
+
+
+def update_adapter_values_yaml(intent_data):
     """
     Update (or create) a single shared Prometheus Adapter values.yaml file.
     This file is meant to be used with:
       helm upgrade --install prometheus-adapter prometheus-community/prometheus-adapter \
         --namespace monitoring -f manifests/prometheus-adapter-values.yaml
     """
-    os.makedirs(output_dir, exist_ok=True)
-    values_path = os.path.join(output_dir, "prometheus-adapter-values.yaml")
+    return update_adapter_values_yaml_many([intent_data])
 
-    ## Load existing file or start fresh
-    if os.path.exists(values_path):
-        with open(values_path) as f:
-            values = yaml.safe_load(f) or {}
-    else:
-        values = {
-            "prometheus": {
-                "url": Config.PROM_URL,
-                "port": Config.PROM_PORT
-            },
-            "rules": {
-                "default": False,
-                "external": []
-            },
-            "customMetrics": {"apiService": {"enabled": True}}
-        }
 
-    target = intent_data.get("target", {})
-    metric_name = target.get("metric")
-    source_namespace = target.get("sourceNamespace")
-    source_job = target.get("sourceJob")
+def update_adapter_values_yaml_many(intents):
+    """
+    Apply the adapter rules of several intents as one mutation of the in-memory model,
+    which results in a single (debounced, atomic) write of the values file.
+    """
+    rules, contributions = [], []
+    for intent_data in intents:
+        rule, contribution = adapter_contribution(intent_data)
+        if rule is not None:
+            rules.append(rule)
+        else:
+            contributions.append(contribution)
+    if rules:
+        adapter_values.upsert_many(rules)
+    if contributions:
+        adapter_values.contribute_many(contributions)
+
+    metric_names = ", ".join(f"'{i.get('target', {}).get('metric')}'" for i in intents)
+    print(f"Updated {adapter_values.values_path} with rule(s) for metric(s) {metric_names}")
+    return adapter_values.values_path
+
+
+def adapter_contribution(intent_data):
+    """
+    What serves the intent's metric in the adapter values: (rule of its own, None), or
+    (None, (metric name, shape, source metric)) for a consolidated rule.
+    """
+    template, selector = intent_metric_query(intent_data)
+    if selector is None:
+        return build_adapter_rule(intent_data), None
+    return None, (intent_data.get("target", {}).get("metric"), template_shape(template), template.source_metric)
+
+
+def remove_adapter_rules(metric_names):
+    """
+    Drop the rules of the given metric names from the shared adapter values file.
+    """
+    adapter_values.remove_many(metric_names)
+
+
+def intent_metric_query(intent_data):
+    """
+    (query template, HPA metric selector) of an intent. The selector is None unless the intent
+    is served by a consolidated adapter rule (ADAPTER_CONSOLIDATION and equality-only matchers).
+    """
+    spec_id = intent_data.get("intentSpecification", {}).get("id")
+    template = promql.intent_query_template(intent_data, INTENT_SPEC_STORE.get(spec_id) if spec_id else None)
+    if not Config.ADAPTER_CONSOLIDATION:
+        return template, None
+    return template, metric_selector(template, intent_data.get("target", {}))
 
-    ns_filter = f'namespace="{source_namespace}"' if source_namespace else ""
-    job_filter = f',job="{source_job}"' if source_job else ""
-    series_query = f'http_requests_total{{{ns_filter}{job_filter}}}'.replace("}{", ",")
-    metrics_query = f'sum(rate(http_requests_total{{{ns_filter}{job_filter}}}[2m])) by (namespace)'.replace("}{", ",")
 
-    new_rule = {
+def external_metric_reference(intent_data):
+    """(external metric name, selector labels or None) the HPA of an intent scales on."""
+    template, selector = intent_metric_query(intent_data)
+    if selector is None:
+        return intent_data.get("target", {}).get("metric"), None
+    return f"{template.source_metric}_{shape_suffix(template_shape(template))}", selector
+
+
+def build_adapter_rule(intent_data):
+    """
+    Prometheus adapter rule exposing the intent's target metric. The query comes from the
+    intent's expression.queryTemplate, else its IntentSpecification's expressionSpecification,
+    else the default HTTP request rate template (utils.promql).
+    """
+    target = intent_data.get("target", {})
+    template, _ = intent_metric_query(intent_data)
+    series_query, metrics_query = template.render(target)
+
+    rule = {
         "seriesQuery": series_query,
-        "resources": {
-            "overrides": {
-                "namespace": {"resource": "namespace"}
-            }
-        },
-        "name": {"as": metric_name},
+        "resources": {},
+        "name": {"as": target.get("metric")},
         "metricsQuery": metrics_query
     }
+    if "namespace" in template.group_by:
+        rule["resources"]["overrides"] = {"namespace": {"resource": "namespace"}}
+    return rule
 
-    ## Ensure 'rules.external' exists
-    if "rules" not in values:
-        values["rules"] = {"external": []}
-    if "external" not in values["rules"]:
-        values["rules"]["external"] = []
-
-    ## Append or update existing rule with same metric name
-    external_rules = values["rules"]["external"]
-    for rule in external_rules:
-        if rule["name"]["as"] == metric_name:
-            rule.update(new_rule)
-            break
-    else:
-        external_rules.append(new_rule)
-
-    values["rules"]["external"] = external_rules
-
-    # Save back to file
-    with open(values_path, "w") as f:
-        yaml.dump(values, f, sort_keys=False)
 
-    print(f"Updated {values_path} with rule for metric '{metric_name}'")
-    return values_path
+def query_template_violations(source, location):
+    """sl violations for an invalid query template, or None."""
+    try:
+        promql.parse_template(source)
+    except promql.QueryTemplateError as e:
+        return [{
+            "location": ["request", "body", *location],
+            "severity": "Error",
+            "code": "invalidQueryTemplate",
+            "message": str(e)
+        }]
+    return None
 
 
 # -------------------
@@ -317,11 +691,7 @@ def update_adapter_values_yaml(intent_data, output_dir="manifests"):
 # -------------------
 @app.route("/intentSpecification", methods=["GET"])
 def list_intent_specifications():
-    arr = list(INTENT_SPEC_STORE.values())
-    resp = jsonify(arr)
-    resp.headers["x-result-count"] = str(len(arr))
-    resp.headers["x-total-count"] = str(len(arr))
-    return resp, 200
+    return list_collection_response(INTENT_SPEC_STORE)
 
 
 @app.route("/intentSpecification", methods=["POST"])
@@ -329,19 +699,25 @@ def create_intent_specification():
     payload = request.get_json(force=True, silent=True)
     if payload is None:
         return json_response_with_violations(400, "Invalid JSON body", [])
-    validator = Draft7Validator(INTENT_SPEC_SCHEMA)
-    errors = list(validator.iter_errors(payload))
+    errors = list(validators.intent_spec_validator.iter_errors(payload))
     if errors:
         violations = validation_errors_as_sl_violations(errors)
         return json_response_with_violations(400, "IntentSpecification validation failed", violations)
+    expression_spec = payload.get("expressionSpecification") or {}
+    for field in ("queryTemplate", "queryTemplateRef"):
+        violations = field in expression_spec and query_template_violations(
+            expression_spec[field], ["expressionSpecification", field])
+        if violations:
+            return json_response_with_violations(400, "Invalid query template", violations)
 
     spec_id = payload.get("id") or str(uuid.uuid4())
     payload["id"] = spec_id
     payload.setdefault("@type", "IntentSpecification")
     payload.setdefault("lifecycleStatus", "ACTIVE")
     payload.setdefault("version", "1.0")
-    payload.setdefault("lastUpdate", datetime.utcnow().isoformat() + "Z")
+    payload.setdefault("lastUpdate", now_utc())
     INTENT_SPEC_STORE[spec_id] = payload
+    validators.evict(spec_id)
 
     resp = make_response(jsonify(payload), 201)
     resp.headers["Location"] = f"/intentSpecification/{spec_id}"
@@ -350,10 +726,14 @@ def create_intent_specification():
 
 @app.route("/intentSpecification/<spec_id>", methods=["GET"])
 def get_intent_specification(spec_id):
-    spec = INTENT_SPEC_STORE.get(spec_id)
-    if not spec:
+    def render():
+        spec = INTENT_SPEC_STORE.get(spec_id)
+        return spec and (json_bytes(spec), {})
+
+    resp = conditional_json_response(INTENT_SPEC_STORE.version(spec_id), render)
+    if resp is None:
         return json_response_with_violations(404, f"IntentSpecification {spec_id} not found", [])
-    return jsonify(spec), 200
+    return resp
 
 @app.route("/intentSpecification/<spec_id>", methods=["DELETE"])
 def delete_intent_specification(spec_id):
@@ -362,15 +742,15 @@ def delete_intent_specification(spec_id):
         return json_response_with_violations(404, f"IntentSpecification {spec_id} not found", [])
 
     # Prevent deleting a spec in use
-    for intent in INTENT_STORE.values():
-        if intent.get("intentSpecification", {}).get("id") == spec_id:
-            return json_response_with_violations(
-                409,
-                f"Cannot delete IntentSpecification {spec_id}: still referenced by an Intent",
-                []
-            )
+    if store.intents_for_spec(spec_id):
+        return json_response_with_violations(
+            409,
+            f"Cannot delete IntentSpecification {spec_id}: still referenced by an Intent",
+            []
+        )
 
     del INTENT_SPEC_STORE[spec_id]
+    validators.evict(spec_id)
 
     return jsonify({
         "message": f"IntentSpecification {spec_id} deleted successfully"
@@ -378,22 +758,60 @@ def delete_intent_specification(spec_id):
 
 @app.route("/intent", methods=["GET"])
 def list_intents():
-    arr = list(INTENT_STORE.values())
-    resp = jsonify(arr)
-    resp.headers["x-result-count"] = str(len(arr))
-    resp.headers["x-total-count"] = str(len(arr))
-    return resp, 200
+    filters = {
+        name: request.args.get(param)
+        for param, name in INTENT_FILTER_QUERY_PARAMS.items()
+        if request.args.get(param)
+    }
+    if not filters:
+        return list_collection_response(INTENT_STORE)
+    return list_collection_response(
+        INTENT_STORE, find=lambda offset, limit: store.find_intents(offset, limit, **filters)
+    )
 
-@app.route("/intent", methods=["POST"])
-def create_intent():
-    payload = request.get_json(force=True, silent=True)
-    if payload is None:
-        return json_response_with_violations(400, "Invalid JSON body", [])
-    validator = Draft7Validator(INTENT_SCHEMA)
-    errors = list(validator.iter_errors(payload))
+def conflict_violations(intent, others=()):
+    """
+    Violations for an intent that would scale the same Deployment or claim the same external
+    metric as an existing intent (or as one of `others`, e.g. earlier items of the same batch).
+    """
+    keys = intent_index_keys(intent)
+    conflicts = store.conflicting_intents(intent)
+    for other in others:
+        other_keys = intent_index_keys(other)
+        same_deployment = keys["namespace"] and keys["deployment"] and \
+            (keys["namespace"], keys["deployment"]) == (other_keys["namespace"], other_keys["deployment"])
+        same_metric = keys["metric"] and keys["metric"] == other_keys["metric"]
+        if same_deployment or same_metric:
+            conflicts.append(other)
+
+    violations = []
+    for other in conflicts:
+        other_keys = intent_index_keys(other)
+        if keys["metric"] and keys["metric"] == other_keys["metric"]:
+            location, message = ["request", "body", "target", "metric"], \
+                f"Metric '{keys['metric']}' is already claimed by Intent '{other.get('name')}' ({other.get('id')})"
+        else:
+            location, message = ["request", "body", "target", "deploymentName"], \
+                f"Deployment '{keys['namespace']}/{keys['deployment']}' is already scaled by Intent '{other.get('name')}' ({other.get('id')})"
+        violations.append({"location": location, "severity": "Error", "code": "conflict", "message": message})
+    return violations
+
+
+def validate_intent_payload(payload):
+    """
+    Validate an Intent body. Returns (message, violations) when it is invalid, otherwise None.
+    """
+    started = time.perf_counter()
+    result = check_intent_payload(payload)
+    STAGE_SECONDS.observe(time.perf_counter() - started, stage="validation")
+    STAGE_TOTAL.inc(stage="validation", outcome="failure" if result else "success")
+    return result
+
+
+def check_intent_payload(payload):
+    errors = list(validators.intent_validator.iter_errors(payload))
     if errors:
-        violations = validation_errors_as_sl_violations(errors)
-        return json_response_with_violations(400, "Intent validation failed", violations)
+        return "Intent validation failed", validation_errors_as_sl_violations(errors)
 
     spec_ref = payload.get("intentSpecification", {})
     spec_id = spec_ref.get("id")
@@ -404,85 +822,767 @@ def create_intent():
             "code": "notFound",
             "message": f"IntentSpecification id {spec_id} not found"
         }]
-        return json_response_with_violations(400, "Referenced IntentSpecification not found", violations)
+        return "Referenced IntentSpecification not found", violations
+
+    expression = payload.get("expression", {})
+    if "queryTemplate" in expression:
+        violations = query_template_violations(expression["queryTemplate"], ["expression", "queryTemplate"])
+        if violations:
+            return "Invalid query template", violations
+
+    if spec_id:
+        spec_version = INTENT_SPEC_STORE.version(spec_id)
+        target_validator = validators.target_validator(INTENT_SPEC_STORE[spec_id], spec_version)
+        if target_validator is not None:
+            errors = list(target_validator.iter_errors(payload.get("target", {})))
+            if errors:
+                return "Intent target validation failed", validation_errors_as_sl_violations(errors, prefix=["target"])
+    return None
+
 
+def apply_intent_defaults(payload):
     intent_id = payload.get("id") or str(uuid.uuid4())
-    version_to_use = payload.get("version", Config.DEFAULT_VERSION)
     payload["id"] = intent_id
     payload.setdefault("@type", "Intent")
-    payload.setdefault("creationDate", datetime.utcnow().isoformat() + "Z")
+    payload.setdefault("creationDate", now_utc())
     payload.setdefault("lifecycleStatus", "PENDING")
-    payload.setdefault("version", version_to_use)
-    INTENT_STORE[intent_id] = payload
+    payload.setdefault("version", Config.DEFAULT_VERSION)
+    chart_group = chart_group_of(payload)
+    if chart_group:
+        payload["chartGroup"] = chart_group
+    else:
+        payload.pop("chartGroup", None)
+    return payload
 
-    try:
-        adapter_values_path = update_adapter_values_yaml(payload)
-        hpa_chart_dir = create_or_update_hpa_chart(payload)
 
-        generated = {
-            "adapter_values": adapter_values_path,
-            "hpa_chart_dir": hpa_chart_dir
-        }
+def provisioning_stages(intent):
+    return GROUPED_PROVISIONING_STAGES if intent.get("chartGroup") else PROVISIONING_STAGES
 
-    except Exception as e:
-        print("Error generating Helm resources:", e)
+
+## Kept from the stored intent on PUT/PATCH: identity and what provisioning recorded
+INTENT_SERVER_FIELDS = ("id", "@type", "creationDate", "lifecycleStatus", "version", "serviceOrderId",
+                        "chartArtifact", "generatedFiles", "deploymentDetails", "provisioningJob")
+
+
+def merge_patch(document, patch):
+    """RFC 7386 JSON merge patch: objects are merged recursively and null removes a member."""
+    if not isinstance(patch, dict):
+        return patch
+    merged = dict(document) if isinstance(document, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = merge_patch(merged.get(key), value)
+    return merged
+
+
+def updated_intent(previous, body, partial):
+    """
+    The intent resulting from a PUT (`body` replaces it) or a PATCH (`body` is a merge patch)
+    of a stored intent. Server fields are kept, and the chart group is derived again unless
+    it was given explicitly.
+    """
+    updated = merge_patch(previous, body) if partial else dict(body)
+    if "chartGroup" in body:
+        explicit_group = body["chartGroup"]
+    elif partial and previous.get("chartGroup") != chart_group_of({**previous, "chartGroup": None}):
+        explicit_group = previous.get("chartGroup")
+    else:
+        explicit_group = None
+    updated["chartGroup"] = explicit_group
+
+    for field in INTENT_SERVER_FIELDS:
+        if field in previous:
+            updated[field] = previous[field]
+        else:
+            updated.pop(field, None)
+    chart_group = chart_group_of(updated)
+    if chart_group:
+        updated["chartGroup"] = chart_group
+    else:
+        updated.pop("chartGroup", None)
+    updated["lastUpdate"] = now_utc()
+    return updated
+
+
+def plan_intent_update(previous, updated):
+    """
+    The provisioning stages an update needs: the adapter rule only when the query serving the
+    metric changed, the chart, push and order only when the HPA it renders (or its group) changed.
+    """
+    stages = []
+    if adapter_contribution(previous) != adapter_contribution(updated):
+        stages.append("adapterValues")
+    moved = previous.get("chartGroup") != updated.get("chartGroup")
+    if moved or build_hpa_values(previous) != build_hpa_values(updated):
+        stages += ["chartGroup"] if updated.get("chartGroup") else ["helmChart", "helmPush", "serviceOrder"]
+    return stages
+
+
+## Final responses of POST /intent(/batch) by Idempotency-Key, shared by worker processes through the store
+idempotency_cache = IdempotencyCache(
+    store,
+    ttl=Config.IDEMPOTENCY_TTL,
+    max_entries=Config.IDEMPOTENCY_MAX_KEYS,
+    wait_timeout=Config.IDEMPOTENCY_WAIT,
+    ## A synchronous POST runs the whole provisioning: its claim must outlive it
+    lease=max(Config.IDEMPOTENCY_LEASE, Config.PROVISIONING_TIMEOUT)
+)
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+## Response headers recorded with an idempotent response and replayed with it
+IDEMPOTENCY_REPLAYED_HEADERS = ("Content-Type", "Location", "sl-violations")
+
+
+def idempotent(handler):
+    """
+    Run `handler` at most once per Idempotency-Key request header: a retry with the same key and
+    body gets the recorded response (with `Idempotent-Replayed: true`) and runs no stage again, a
+    duplicate sent while the original is still running waits for it. Server errors (5xx) are not
+    recorded, so they can be retried. Requests without the header are handled as usual.
+    """
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if key is None:
+            return handler(*args, **kwargs)
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return json_response_with_violations(
+                400, f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters", [])
+
+        fingerprint = request_fingerprint(request.method, request.path, request.get_data())
+        try:
+            recorded = idempotency_cache.begin(key, fingerprint)
+        except IdempotencyKeyMismatch as e:
+            return json_response_with_violations(422, str(e), [])
+        except IdempotencyKeyInProgress as e:
+            return json_response_with_violations(409, str(e), [])
+        if recorded is not None:
+            resp = Response(recorded["body"], status=recorded["status"], headers=recorded["headers"])
+            resp.headers["Idempotent-Replayed"] = "true"
+            return resp
+
+        try:
+            resp = make_response(handler(*args, **kwargs))
+        except Exception:
+            idempotency_cache.release(key)
+            raise
+        if resp.status_code >= 500:
+            idempotency_cache.release(key)
+        else:
+            headers = {name: resp.headers[name] for name in IDEMPOTENCY_REPLAYED_HEADERS if name in resp.headers}
+            idempotency_cache.complete(key, fingerprint, resp.status_code, resp.get_data(), headers)
+        return resp
+
+    return wrapper
+
+
+@app.route("/intent", methods=["POST"])
+@idempotent
+def create_intent():
+    payload = request.get_json(force=True, silent=True)
+    if payload is None:
+        return json_response_with_violations(400, "Invalid JSON body", [])
+    invalid = validate_intent_payload(payload)
+    if invalid:
+        return json_response_with_violations(400, *invalid)
+
+    apply_intent_defaults(payload)
+    intent_id = payload["id"]
+
+    ## Conflict check and insert are atomic, so two concurrent requests cannot both be admitted
+    with ADMISSION_LOCK:
+        violations = conflict_violations(payload)
+        if violations:
+            return json_response_with_violations(409, "Intent conflicts with an existing Intent", violations)
+        INTENT_STORE[intent_id] = payload
+
+    job = ProvisioningJob(intent_id, provisioning_stages(payload))
+
+    if Config.ASYNC_PROVISIONING:
+        try:
+            provisioning_runner.submit(job, lambda j: provision_intent(intent_id, j))
+        except JobQueueFullError as e:
+            del INTENT_STORE[intent_id]
+            return json_response_with_violations(503, str(e), [])
+
+        resp_body = payload.copy()
+        resp_body["provisioningJob"] = job.to_dict()
+        resp = make_response(jsonify(resp_body), 202)
+        resp.headers["Location"] = f"/intent/{intent_id}"
+        return resp
+
+    ## Synchronous mode: run every stage on the request thread
+    provisioning_runner.run_inline(job, lambda j: provision_intent(intent_id, j))
+    if job.state == "failed":
         return json_response_with_violations(
-            500, "Failed to generate Helm resources",
-            [{"location": ["server"], "severity": "Error", "code": "server_error", "message": str(e)}]
+            500, f"Provisioning stage '{job.failed_stage}' failed",
+            [{"location": ["server"], "severity": "Error", "code": "server_error", "message": job.error}]
         )
 
-    resp_body = payload.copy()
-    resp_body["generatedFiles"] = generated
+    return jsonify({
+        "message": "A new service order is being processed by Maestro.",
+        "serviceOrderId": INTENT_STORE[intent_id]["serviceOrderId"],
+        "chartCacheHit": INTENT_STORE[intent_id]["chartArtifact"]["cacheHit"]
+    }), 201
 
-    resp = make_response(jsonify(resp_body), 201)
-    resp.headers["Location"] = f"/intent/{intent_id}"
 
-    intent_name = payload.get("name", str(uuid.uuid4()))
-    helm_pkg_name = f"{intent_name}-hpa"
-    ## The creation of the Helm package
+@app.route("/intent/batch", methods=["POST"])
+@idempotent
+def create_intent_batch():
+    """
+    Create several intents at once. Every item is validated before anything is written;
+    the adapter rules of the whole batch go to disk in one write, and the chart, push and
+    service order stages run with up to Config.BATCH_PARALLELISM items in parallel.
+    """
+    payload = request.get_json(force=True, silent=True)
+    if not isinstance(payload, list) or not payload:
+        return json_response_with_violations(400, "Expected a non-empty JSON array of Intents", [])
+
+    violations = []
+    for index, item in enumerate(payload):
+        invalid = validate_intent_payload(item) if isinstance(item, dict) else ("Intent must be an object", [])
+        if invalid:
+            message, item_violations = invalid
+            violations.append({
+                "location": ["request", "body", index],
+                "severity": "Error",
+                "code": "invalidItem",
+                "message": message
+            })
+            for v in item_violations:
+                v["location"] = ["request", "body", index] + v["location"][2:]
+            violations.extend(item_violations)
+    if violations:
+        return json_response_with_violations(400, "Intent batch validation failed", violations)
+
+    intents = [apply_intent_defaults(item) for item in payload]
+    ## Items sharing an id or a name would overwrite each other's record or chart directory
+    first_index = {}
+    for index, intent in enumerate(intents):
+        for field in ("id", "name"):
+            earlier = first_index.setdefault((field, intent[field]), index)
+            if earlier != index:
+                violations.append({
+                    "location": ["request", "body", index, field],
+                    "severity": "Error",
+                    "code": "conflict",
+                    "message": f"{field} '{intent[field]}' is already used by item {earlier} of the batch"
+                })
+    with ADMISSION_LOCK:
+        for index, intent in enumerate(intents):
+            for v in conflict_violations(intent, others=intents[:index]):
+                v["location"] = ["request", "body", index] + v["location"][2:]
+                violations.append(v)
+        if violations:
+            return json_response_with_violations(409, "Intent batch conflicts with existing Intents", violations)
+        for intent in intents:
+            INTENT_STORE[intent["id"]] = intent
+
+    jobs = []
+    for intent in intents:
+        job = ProvisioningJob(intent["id"], provisioning_stages(intent))
+        provisioning_runner.track(job)
+        jobs.append(job)
+
+    ## One read and one atomic write of the shared adapter values for the whole batch
+    adapter_values_path = None
     try:
-        push_successful = helm.helm_package_and_push(
-            helm_pkg_name,
-            version_to_use,
-            chart_path=Path(hpa_chart_dir),
-            registry_url=Config.HELM_REGISTRY
-        )
+        with ExitStack() as stack:
+            for job in jobs:
+                stack.enter_context(job.stage("adapterValues"))
+            adapter_values_path = update_adapter_values_yaml_many(intents)
     except Exception as e:
-        return jsonify({"helm_error": str(e)}), 400
+        print("Error updating adapter values for batch:", e)
+        for job in jobs:
+            update_intent_fields(job.intent_id, lifecycleStatus="FAILED")
+            job.finish(e)
+
+    if adapter_values_path:
+        with ThreadPoolExecutor(max_workers=Config.BATCH_PARALLELISM, thread_name_prefix="batch") as executor:
+            for job in jobs:
+                executor.submit(
+                    provisioning_runner.run_inline, job,
+                    lambda j: provision_intent(j.intent_id, j, adapter_values_path=adapter_values_path)
+                )
+
+    results = []
+    for job in jobs:
+        intent = INTENT_STORE.get(job.intent_id, {})
+        results.append({
+            "id": job.intent_id,
+            "name": intent.get("name"),
+            "status": 201 if job.state == "completed" else 500,
+            "lifecycleStatus": intent.get("lifecycleStatus"),
+            "serviceOrderId": intent.get("serviceOrderId"),
+            "chartCacheHit": intent.get("chartArtifact", {}).get("cacheHit"),
+            "error": job.error,
+            "failedStage": job.failed_stage
+        })
+
+    status_code = 201 if all(r["status"] == 201 for r in results) else 207
+    return jsonify(results), status_code
+
+
+def update_intent_fields(intent_id, **fields):
+    """
+    Replace the stored intent with a copy carrying the given fields, so that
+    readers on other threads never observe a dict being mutated.
+    """
+    with INTENT_UPDATE_LOCK:
+        intent = INTENT_STORE.get(intent_id)
+        if intent is None:
+            return None
+        updated = {**intent, **fields}
+        INTENT_STORE[intent_id] = updated
+    return updated
+
+
+def record_provisioning_job(job):
+    """Store the progress of a provisioning job on its intent (ProvisioningJobRunner.on_change)."""
+    update_intent_fields(job.intent_id, provisioningJob=job.to_dict())
 
-    if not push_successful:
-        return jsonify({
-            "status": "error",
-            "message": "Helm push failed. See server logs for details."
-        }), 500
 
-    ## The logic of the service order creation
+def intent_in_provisioning(intent):
+    """
+    Whether a provisioning job is queued or running for the intent, in this or any other worker
+    process. A job recorded as active whose record was not updated for PROVISIONING_TIMEOUT seconds
+    is taken as lost (its process exited).
+    """
+    job = provisioning_runner.get(intent["id"])
+    if job is not None:
+        return job.active
+    record = intent.get("provisioningJob") or {}
+    if record.get("state") not in ("pending", "running"):
+        return False
+    age = seconds_since(record.get("lastUpdate"))
+    return age is not None and age < Config.PROVISIONING_TIMEOUT
+
+
+def package_and_push_chart(helm_pkg_name, version, chart_dir):
+    """
+    Package and push the chart unless an artifact with the same content digest was already
+    pushed, in which case that artifact is reused. Returns the artifact with a 'cacheHit' flag.
+    """
+    digest = helm.chart_content_digest(chart_dir, version, Config.HELM_REGISTRY)
+    cached = chart_digest_cache.get(digest)
+    CHART_CACHE_TOTAL.inc(result="hit" if cached else "miss")
+    if cached:
+        print(f"Chart {helm_pkg_name}:{version} unchanged ({digest}), reusing {cached['reference']}")
+        return {**cached, "digest": digest, "cacheHit": True}
+
+    reference = helm.helm_package_and_push(
+        helm_pkg_name,
+        version,
+        chart_path=Path(chart_dir),
+        registry_url=Config.HELM_REGISTRY
+    )
+    if not reference:
+        raise RuntimeError("Helm push failed. See server logs for details.")
+    chart_digest_cache.put(digest, helm_pkg_name, version, reference)
+    return {"chartName": helm_pkg_name, "version": version, "reference": reference,
+            "digest": digest, "cacheHit": False}
+
+
+def provision_intent(intent_id, job, adapter_values_path=None):
+    """
+    Run the provisioning stages for a stored intent:
+    adapter rule -> HPA chart -> helm package/push -> Maestro service order.
+    lifecycleStatus goes PENDING -> PACKAGED -> ORDERED, or FAILED on any error; the order tracker
+    takes it from there.
+    `adapter_values_path` is given when the adapter rule was already written (batch mode).
+    """
+    intent = INTENT_STORE[intent_id]
+    intent_name = intent.get("name", str(uuid.uuid4()))
+    version_to_use = intent["version"]
+    helm_pkg_name = f"{intent_name}-hpa"
+
     try:
-        maestro_client.get_access_token_keycloak()
-        service_order_id = maestro_client.create_service_order(helm_pkg_name, version_to_use)
+        if adapter_values_path is None:
+            with job.stage("adapterValues"):
+                adapter_values_path = update_adapter_values_yaml(intent)
+        if intent.get("chartGroup"):
+            ## Chart, push and service order are shared with (and coalesced across) the whole group
+            with job.stage("chartGroup"):
+                result = chart_groups.run(intent["chartGroup"], sync_chart_group)
+                job.annotate("chartGroup", group=intent["chartGroup"],
+                             version=result["chartArtifact"]["version"],
+                             cacheHit=result["chartArtifact"]["cacheHit"])
+            return
+        with job.stage("helmChart"):
+            hpa_chart_dir = create_or_update_hpa_chart(intent)
+        update_intent_fields(intent_id, generatedFiles={
+            "adapter_values": adapter_values_path,
+            "hpa_chart_dir": hpa_chart_dir
+        })
+
+        ## The creation of the Helm package, skipped when this exact chart was already pushed
+        with job.stage("helmPush"), CHART_LOCKS[intent_name]:
+            chart_artifact = package_and_push_chart(helm_pkg_name, version_to_use, hpa_chart_dir)
+            job.annotate("helmPush", cacheHit=chart_artifact["cacheHit"])
+        update_intent_fields(intent_id, lifecycleStatus="PACKAGED", chartArtifact=chart_artifact)
 
+        ## The logic of the service order creation
+        with job.stage("serviceOrder"):
+            service_order_id = maestro_client.create_service_order(helm_pkg_name, version_to_use)
         map_intent_to_so_ids[service_order_id] = intent_id
-        return jsonify({
-            "message": "A new service order is being processed by Maestro.",
-            "serviceOrderId": service_order_id
-        }), 201
+        update_intent_fields(intent_id, lifecycleStatus="ORDERED", serviceOrderId=service_order_id)
+        if Config.ORDER_TRACKING:
+            order_tracker.track(service_order_id, intent_id)
+    except Exception:
+        update_intent_fields(intent_id, lifecycleStatus="FAILED")
+        raise
 
-    except Exception as e:
-        return jsonify({"client_error": e.args[0]}), 400
 
-    return resp
+def semver_key(version):
+    return tuple(int(part) if part.isdigit() else 0 for part in str(version).split("-")[0].split("."))
+
+
+def bump_patch_version(version):
+    major, minor, patch = (semver_key(version) + (0, 0, 0))[:3]
+    return f"{major}.{minor}.{patch + 1}"
+
+
+def chart_group_artifact(group, members):
+    """The latest umbrella chart pushed for a group, as recorded on its members (None before the first push)."""
+    artifacts = [m["chartArtifact"] for m in members
+                 if m.get("chartArtifact", {}).get("chartName") == f"{group}-hpa-group"]
+    return max(artifacts, key=lambda a: semver_key(a["version"]), default=None)
+
+
+def sync_chart_group(group):
+    """
+    Bring the umbrella chart of a group in line with its current member intents: render it,
+    and when it changed, push it under a bumped version and move the group's single service
+    order to that version (placing the order the first time). With no members left the order
+    is terminated. Returns {"chartArtifact", "serviceOrderId"}, or None for an emptied group.
+    """
+    members, _ = store.find_intents(chart_group=group)
+    service_order_key = CHART_GROUP_PREFIX + group
+    service_order_id = store.service_order_for_intent(service_order_key)
+    chart_dir = os.path.join("helm", "hpa-groups", group)
+    helm_pkg_name = f"{group}-hpa-group"
+
+    if not members:
+        shutil.rmtree(chart_dir, ignore_errors=True)
+        if service_order_id:
+            terminate_service_order(service_order_id)
+        return None
+
+    write_hpa_group_chart(helm_pkg_name, members, chart_dir)
+    current = chart_group_artifact(group, members)
+    version = Config.DEFAULT_VERSION
+    if current is not None:
+        version = current["version"]
+        if helm.chart_content_digest(chart_dir, version, Config.HELM_REGISTRY) != current.get("digest"):
+            version = bump_patch_version(version)
+    chart_artifact = package_and_push_chart(helm_pkg_name, version, chart_dir)
+
+    ordered = True
+    if service_order_id is None:
+        service_order_id = maestro_client.create_service_order(helm_pkg_name, version)
+        map_intent_to_so_ids[service_order_id] = service_order_key
+    elif current is None or current["version"] != version:
+        maestro_client.update_service_artifact(service_order_id, helm_pkg_name, version)
+    else:
+        ordered = False
+
+    for member in members:
+        fields = {
+            "chartArtifact": chart_artifact,
+            "serviceOrderId": service_order_id,
+            "generatedFiles": {**member.get("generatedFiles", {}), "hpa_chart_dir": chart_dir},
+        }
+        if ordered or member.get("lifecycleStatus") in ("PENDING", "PACKAGED", "FAILED"):
+            fields["lifecycleStatus"] = "ORDERED"
+        update_intent_fields(member["id"], **fields)
+    if ordered and Config.ORDER_TRACKING:
+        order_tracker.track(service_order_id, service_order_key)
+    return {"chartArtifact": chart_artifact, "serviceOrderId": service_order_id}
+
+
+## Concurrent changes to one group are served by a single render/push/order round
+chart_groups = Coalescer(lambda group: CHART_LOCKS["group-" + group])
+
+
+def reprovision_intent(intent_id, previous, job):
+    """
+    Bring the artifacts of an updated intent in line with it, running only the stages of the
+    job (see plan_intent_update). A chart of its own is pushed under the next patch version and
+    the existing service order is moved to it rather than recreated; grouped intents re-sync
+    their group (and leave the previous one).
+    """
+    intent = INTENT_STORE[intent_id]
+    intent_name = intent["name"]
+    helm_pkg_name = f"{intent_name}-hpa"
+    previous_group, group = previous.get("chartGroup"), intent.get("chartGroup")
+
+    try:
+        if "adapterValues" in job.stages:
+            with job.stage("adapterValues"):
+                previous_metric = previous.get("target", {}).get("metric")
+                if previous_metric != intent.get("target", {}).get("metric"):
+                    remove_adapter_rules({previous_metric})
+                adapter_values_path = update_adapter_values_yaml(intent)
+            update_intent_fields(intent_id, generatedFiles={
+                **intent.get("generatedFiles", {}), "adapter_values": adapter_values_path
+            })
+
+        if previous_group and previous_group != group:
+            ## The store no longer lists the intent in its previous group
+            chart_groups.run(previous_group, sync_chart_group)
+
+        if "chartGroup" in job.stages:
+            if not previous_group:
+                ## Its own chart and order give way to the group's
+                withdraw_intent_deployment(previous)
+                with CHART_LOCKS[intent_name]:
+                    shutil.rmtree(os.path.join("helm", "hpa", intent_name), ignore_errors=True)
+            with job.stage("chartGroup"):
+                result = chart_groups.run(group, sync_chart_group)
+                job.annotate("chartGroup", group=group, version=result["chartArtifact"]["version"],
+                             cacheHit=result["chartArtifact"]["cacheHit"])
+            return
+        if "helmChart" not in job.stages:
+            return
+
+        version = intent["version"]
+        if intent.get("chartArtifact", {}).get("chartName") == helm_pkg_name:
+            version = bump_patch_version(version)
+        with job.stage("helmChart"):
+            hpa_chart_dir = create_or_update_hpa_chart(intent)
+        with job.stage("helmPush"), CHART_LOCKS[intent_name]:
+            chart_artifact = package_and_push_chart(helm_pkg_name, version, hpa_chart_dir)
+            job.annotate("helmPush", cacheHit=chart_artifact["cacheHit"])
+        update_intent_fields(intent_id, version=version, lifecycleStatus="PACKAGED", chartArtifact=chart_artifact,
+                             generatedFiles={**intent.get("generatedFiles", {}), "hpa_chart_dir": hpa_chart_dir})
+
+        with job.stage("serviceOrder"):
+            service_order_id = store.service_order_for_intent(intent_id)
+            if service_order_id:
+                maestro_client.update_service_artifact(service_order_id, helm_pkg_name, version)
+                job.annotate("serviceOrder", action="update")
+            else:
+                service_order_id = maestro_client.create_service_order(helm_pkg_name, version)
+                map_intent_to_so_ids[service_order_id] = intent_id
+                job.annotate("serviceOrder", action="create")
+        update_intent_fields(intent_id, lifecycleStatus="ORDERED", serviceOrderId=service_order_id)
+        if Config.ORDER_TRACKING:
+            order_tracker.track(service_order_id, intent_id)
+    except Exception:
+        update_intent_fields(intent_id, lifecycleStatus="FAILED")
+        raise
+
+
+def apply_service_order_state(intent_id, order):
+    """
+    Mirror a polled service order onto its intent (lifecycleStatus and deploymentDetails),
+    or onto every member intent of a chart group.
+    """
+    if intent_id.startswith(CHART_GROUP_PREFIX):
+        members, _ = store.find_intents(chart_group=intent_id[len(CHART_GROUP_PREFIX):])
+        for member in members:
+            apply_service_order_state(member["id"], order)
+        return
+    fields = {
+        "deploymentDetails": {
+            "serviceOrderState": order.get("state"),
+            "completionDate": order.get("completionDate"),
+            "items": order.get("deploymentDetails", []),
+            "lastUpdate": now_utc(),
+        }
+    }
+    lifecycle_status = order_lifecycle_status(order.get("state"))
+    if lifecycle_status:
+        fields["lifecycleStatus"] = lifecycle_status
+    update_intent_fields(intent_id, **fields)
+
+
+def mark_service_order_lost(intent_id, service_order_id, error, gone):
+    """
+    Record that polling stopped: the intent is FAILED when Maestro no longer has the order, and
+    UNKNOWN after too many failed polls (tracked again by the reconciler or on restart).
+    """
+    if intent_id.startswith(CHART_GROUP_PREFIX):
+        members, _ = store.find_intents(chart_group=intent_id[len(CHART_GROUP_PREFIX):])
+        for member in members:
+            mark_service_order_lost(member["id"], service_order_id, error, gone)
+        return
+    intent = INTENT_STORE.get(intent_id)
+    if intent is None:
+        return
+    details = dict(intent.get("deploymentDetails") or {})
+    details.update({"error": f"Service order {service_order_id}: {error}", "lastUpdate": now_utc()})
+    update_intent_fields(intent_id, lifecycleStatus="FAILED" if gone else "UNKNOWN", deploymentDetails=details)
+
+
+## Service order states are polled here, so GET /intent/<id> is answered from the store without calling Maestro
+order_tracker = ServiceOrderTracker(
+    fetch=lambda service_order_id: maestro_client.get_service_order(service_order_id),
+    on_change=apply_service_order_state,
+    initial_interval=Config.ORDER_POLL_INTERVAL,
+    max_interval=Config.ORDER_POLL_MAX_INTERVAL,
+    backoff=Config.ORDER_POLL_BACKOFF,
+    max_concurrency=Config.ORDER_POLL_CONCURRENCY,
+    max_errors=Config.ORDER_POLL_MAX_ERRORS,
+    is_gone=lambda error: is_not_found(error),
+    on_lost=mark_service_order_lost
+)
+ORDER_TRACKER_LEADER_LOCK = FileLock(os.path.join(Config.LOCK_DIR, "order-tracker.lock"))
+
+
+def resume_order_tracking():
+    """
+    Track again the orders of intents left in a non-terminal state by a previous run.
+    With several workers only the one holding the leader lock resumes them, so each
+    order is polled by a single process.
+    """
+    if not ORDER_TRACKER_LEADER_LOCK.acquire(blocking=False):
+        return
+    for lifecycle_status in ("ORDERED", "DEPLOYING", "CANCELLING", "UNKNOWN"):
+        intents, _ = store.find_intents(lifecycle_status=lifecycle_status)
+        for intent in intents:
+            service_order_id = intent.get("serviceOrderId")
+            if service_order_id:
+                ## UNKNOWN: no known state, so the first poll writes one back
+                order_state = None if lifecycle_status == "UNKNOWN" else \
+                    intent.get("deploymentDetails", {}).get("serviceOrderState")
+                tracked_id = CHART_GROUP_PREFIX + intent["chartGroup"] if intent.get("chartGroup") else intent["id"]
+                order_tracker.track(service_order_id, tracked_id, state=order_state)
 
 
 @app.route("/intent/<intent_id>", methods=["GET"])
 def get_intent(intent_id):
-    it = INTENT_STORE.get(intent_id)
-    if not it:
+    def render():
+        it = INTENT_STORE.get(intent_id)
+        return it and (json_bytes(it), {})
+
+    resp = conditional_json_response(INTENT_STORE.version(intent_id), render)
+    if resp is None:
         return json_response_with_violations(404, f"Intent {intent_id} not found", [])
-    return jsonify(it), 200
+    return resp
 
 
-## Optional: persist store to file (called on shutdown)
-PERSIST_FILE = Config.INTENT_SAVE_DIR and os.path.join(Config.INTENT_SAVE_DIR, "intents.json") if Config.INTENT_SAVE_DIR else None
+@app.route("/intent/<intent_id>/job", methods=["GET"])
+def get_intent_job(intent_id):
+    job = provisioning_runner.get(intent_id)
+    if job:
+        return jsonify(job.to_dict()), 200
+    ## Run by another worker process, or dropped from this one after PROVISIONING_JOB_TTL
+    record = (INTENT_STORE.get(intent_id) or {}).get("provisioningJob")
+    if not record:
+        return json_response_with_violations(404, f"No provisioning job for Intent {intent_id}", [])
+    return jsonify(record), 200
+
+
+@app.route("/intent/<intent_id>", methods=["PUT", "PATCH"])
+def update_intent(intent_id):
+    """
+    Replace (PUT) or merge-patch (PATCH) an intent, then regenerate only the artifacts the
+    change affects and move its existing deployment to the new chart version.
+    """
+    body = request.get_json(force=True, silent=True)
+    if not isinstance(body, dict):
+        return json_response_with_violations(400, "Invalid JSON body", [])
+
+    with ADMISSION_LOCK:
+        previous = INTENT_STORE.get(intent_id)
+        if not previous:
+            return json_response_with_violations(404, f"Intent {intent_id} not found", [])
+        if intent_in_provisioning(previous):
+            return json_response_with_violations(409, f"Intent {intent_id} is still being provisioned", [])
+        updated = updated_intent(previous, body, partial=request.method == "PATCH")
+        if updated.get("name") != previous.get("name"):
+            return json_response_with_violations(400, "Intent name cannot be changed", [{
+                "location": ["request", "body", "name"],
+                "severity": "Error",
+                "code": "immutable",
+                "message": "The name of an Intent names its Helm chart and cannot be changed"
+            }])
+        invalid = validate_intent_payload(updated)
+        if invalid:
+            return json_response_with_violations(400, *invalid)
+        violations = conflict_violations(updated)
+        if violations:
+            return json_response_with_violations(409, "Intent conflicts with an existing Intent", violations)
+        INTENT_STORE[intent_id] = updated
+
+    stages = plan_intent_update(previous, updated)
+    if not stages:
+        return jsonify(updated), 200
+    job = ProvisioningJob(intent_id, stages)
+
+    if Config.ASYNC_PROVISIONING:
+        try:
+            provisioning_runner.submit(job, lambda j: reprovision_intent(intent_id, previous, j))
+        except JobQueueFullError as e:
+            INTENT_STORE[intent_id] = previous
+            return json_response_with_violations(503, str(e), [])
+        resp_body = updated.copy()
+        resp_body["provisioningJob"] = job.to_dict()
+        return jsonify(resp_body), 202
+
+    provisioning_runner.run_inline(job, lambda j: reprovision_intent(intent_id, previous, j))
+    if job.state == "failed":
+        return json_response_with_violations(
+            500, f"Provisioning stage '{job.failed_stage}' failed",
+            [{"location": ["server"], "severity": "Error", "code": "server_error", "message": job.error}]
+        )
+    return jsonify(INTENT_STORE[intent_id]), 200
+
+
+def remove_intent_locally(intent):
+    """
+    Drop an intent from the store and remove its generated Helm chart directory.
+    The adapter rule is removed by the caller so that bulk deletes can share one write.
+    """
+    intent_id = intent["id"]
+    INTENT_STORE.pop(intent_id, None)
+    provisioning_runner.forget(intent_id)
+
+    ## Remove generated Helm chart directory
+    chart_dir = os.path.join("helm", "hpa", intent.get("name"))
+    with CHART_LOCKS[intent.get("name")]:
+        if os.path.exists(chart_dir):
+            shutil.rmtree(chart_dir, ignore_errors=True)
+
+
+def withdraw_intent_deployment(intent):
+    """
+    Stop deploying a removed intent: terminate its own service order, or update the
+    umbrella chart (and order) of its group without it.
+    """
+    if intent.get("chartGroup"):
+        chart_groups.run(intent["chartGroup"], sync_chart_group)
+        return
+    service_order_id = store.service_order_for_intent(intent["id"])
+    if service_order_id:
+        terminate_service_order(service_order_id)
+
+
+def terminate_service_order(service_order_id):
+    """
+    Terminate the OCM inventory item behind a service order and delete the order.
+    Raises LookupError when the order has no OCM item; any Maestro error propagates.
+    """
+    order_tracker.untrack(service_order_id)
+    res = maestro_client.get_service_order(service_order_id, False)
+
+    service_item_id = models.ocm_service_item_id(res)
+    if not service_item_id:
+        raise LookupError(f"Service order with id '{service_order_id}', has no valid 'OCM' order item")
+
+    service_item_body = maestro_client.get_service_inventory_item(service_item_id)
+
+    service_item_body["state"] = "TERMINATED"
+    maestro_client.patch_service_inventory_item(service_item_id, service_item_body)
+
+    maestro_client.delete_service_order(service_order_id)
+
+    if service_order_id in map_intent_to_so_ids:
+        del map_intent_to_so_ids[service_order_id]
+        print(f"    the serviceOrderId '{service_order_id}' is been cleaned from cache", flush=True)
+
 
 @app.route("/intent/<intent_id>", methods=["DELETE"])
 def delete_intent(intent_id):
@@ -490,94 +1590,511 @@ def delete_intent(intent_id):
     if not intent:
         return json_response_with_violations(404, f"Intent {intent_id} not found", [])
 
-    ## Remove from runtime store
-    del INTENT_STORE[intent_id]
+    if intent_in_provisioning(intent):
+        return json_response_with_violations(
+            409, f"Intent {intent_id} is still being provisioned", []
+        )
 
-    ## Remove generated Helm chart directory
-    intent_name = intent.get("name")
-    chart_dir = os.path.join("helm", "hpa", intent_name)
-    if os.path.exists(chart_dir):
-        import shutil
-        shutil.rmtree(chart_dir, ignore_errors=True)
+    remove_intent_locally(intent)
 
     ## Remove Prometheus Adapter rule from values.yaml
-    adapter_file = "manifests/prometheus-adapter-values.yaml"
-    if os.path.exists(adapter_file):
-        with open(adapter_file) as f:
-            values = yaml.safe_load(f) or {}
+    remove_adapter_rules({intent.get("target", {}).get("metric")})
+
+    ## Remove service order mapping (if created) ---
+    try:
+        withdraw_intent_deployment(intent)
+    except LookupError as e:
+        return jsonify({404: str(e)}), 404
+    except Exception as e:
+        return jsonify({"client_error": e.args[0]}), 400
+
+    return jsonify({"status": 'OK'}), 200
 
-        rules = values.get("rules", {}).get("external", [])
-        metric_name = intent.get("target", {}).get("metric")
 
-        new_rules = [r for r in rules if r.get("name", {}).get("as") != metric_name]
+@app.route("/intent/batch", methods=["DELETE"])
+def delete_intent_batch():
+    """
+    Delete several intents at once. The body is a JSON array of intent ids.
+    Adapter rules are dropped with a single write and the Maestro teardowns run in parallel.
+    """
+    payload = request.get_json(force=True, silent=True)
+    if not isinstance(payload, list) or not payload:
+        return json_response_with_violations(400, "Expected a non-empty JSON array of Intent ids", [])
+    violations = [
+        {"location": ["request", "body", index], "severity": "Error", "code": "type",
+         "message": "Intent id must be a non-empty string"}
+        for index, intent_id in enumerate(payload) if not isinstance(intent_id, str) or not intent_id
+    ]
+    if violations:
+        return json_response_with_violations(400, "Expected a non-empty JSON array of Intent ids", violations)
+    ## A repeated id is deleted (and torn down in Maestro) once
+    intent_ids = list(dict.fromkeys(payload))
+
+    results = {}
+    intents = []
+    for intent_id in intent_ids:
+        intent = INTENT_STORE.get(intent_id)
+        if not intent:
+            results[intent_id] = {"id": intent_id, "status": 404, "error": f"Intent {intent_id} not found"}
+        elif intent_in_provisioning(intent):
+            results[intent_id] = {"id": intent_id, "status": 409, "error": f"Intent {intent_id} is still being provisioned"}
+        else:
+            intents.append(intent)
+
+    for intent in intents:
+        remove_intent_locally(intent)
+    if intents:
+        remove_adapter_rules({intent.get("target", {}).get("metric") for intent in intents})
+
+    def teardown(intent):
+        try:
+            withdraw_intent_deployment(intent)
+        except LookupError as e:
+            return {"id": intent["id"], "status": 404, "error": str(e)}
+        except Exception as e:
+            return {"id": intent["id"], "status": 400, "error": str(e)}
+        return {"id": intent["id"], "status": 200, "error": None}
+
+    with ThreadPoolExecutor(max_workers=Config.BATCH_PARALLELISM, thread_name_prefix="batch") as executor:
+        for result in executor.map(teardown, intents):
+            results[result["id"]] = result
+
+    ordered = [results[intent_id] for intent_id in intent_ids]
+    status_code = 200 if all(r["status"] == 200 for r in ordered) else 207
+    return jsonify(ordered), status_code
 
-        values["rules"]["external"] = new_rules
 
-        with open(adapter_file, "w") as f:
-            yaml.dump(values, f, sort_keys=False)
+# -------------------
+# Reconciliation
+# -------------------
+## Intents that pushed their chart and placed their order, and intents whose provisioning is still under way
+DEPLOYED_STATES = ("ORDERED", "DEPLOYING", "DEPLOYED", "UNKNOWN")
+PROVISIONING_STATES = ("PENDING", "PACKAGED")
+HPA_CHART_FILES = ("Chart.yaml", "values.yaml", os.path.join("templates", "hpa.yaml"))
+HPA_GROUP_CHART_FILES = ("Chart.yaml", "values.yaml", os.path.join("templates", "hpas.yaml"))
 
-    ## Remove service order mapping (if created) ---
 
-    res = None
+def intent_settled(intent):
+    """
+    Whether the reconciler may look at an intent: it is not being provisioned, and it was not
+    created or updated in the last RECONCILE_GRACE seconds.
+    """
+    if intent_in_provisioning(intent):
+        return False
+    age = seconds_since(intent.get("lastUpdate") or intent.get("creationDate"))
+    return age is None or age >= Config.RECONCILE_GRACE
+
+
+def file_stamps(directory, names):
+    """(mtime, size) of each file, None when missing: changes whenever one of them is rewritten or removed."""
+    stamps = []
+    for name in names:
+        try:
+            st = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            stamps.append(None)
+        else:
+            stamps.append((st.st_mtime_ns, st.st_size))
+    return tuple(stamps)
+
+
+def read_text(path):
     try:
-        maestro_client.get_access_token_keycloak()
-        if intent_id in map_intent_to_so_ids.values():
-            id = [so_id for so_id, name in map_intent_to_so_ids.items() if name == intent_id][0]
-        res = maestro_client.get_service_order(id, False)
-    except Exception as e:
-        return jsonify({"client_error": e.args[0]}), 400
+        return Path(path).read_text()
+    except FileNotFoundError:
+        return None
+
 
-    service_item_id = ""
-    for order_item in res["serviceOrderItem"]:
-        if order_item["service"]["name"] == "service-spec-end-user-cfs-ocm":
-            service_item_id = order_item["service"]["id"]
-            break
+def is_not_found(error):
+    return isinstance(error, ConnectionError) and str(error).startswith("Error 404")
 
-    if service_item_id == "":
-        return jsonify({404: f"Service order with id '{id}', has no valid 'OCM' order item"}), 404
 
+def service_order_missing(service_order_id):
+    """Whether Maestro no longer knows a service order; any other error propagates."""
     try:
-        service_item_body = maestro_client.get_service_inventory_item(service_item_id)
+        maestro_client.get_service_order(service_order_id, False)
+    except ConnectionError as e:
+        if is_not_found(e):
+            return True
+        raise
+    return False
+
+
+def adapter_drift(intent):
+    metric = intent.get("target", {}).get("metric")
+    rule, contribution = adapter_contribution(intent)
+    if rule is not None:
+        in_sync = adapter_values.contribution(metric) is None and adapter_values.get(metric) == rule
+    else:
+        in_sync = adapter_values.contribution(metric) == contribution[1:]
+    if in_sync:
+        return []
+    kind = "adapterRuleStale" if metric in adapter_values else "adapterRuleMissing"
+    return [Drift(kind, f"adapter:{intent['id']}", f"Adapter values do not serve metric '{metric}' as the Intent requires",
+                  repair=lambda: repair_adapter_rule(intent["id"]))]
 
-        service_item_body["state"] = "TERMINATED"
-        maestro_client.patch_service_inventory_item(service_item_id, service_item_body)
 
-        maestro_client.delete_service_order(id)
-    except Exception as e:
-        return jsonify({"client_error": e.args[0]}), 400
+def repair_adapter_rule(intent_id):
+    intent = INTENT_STORE.get(intent_id)
+    if intent is not None:
+        update_adapter_values_yaml(intent)
+
+
+def chart_drift(intent):
+    chart_dir = os.path.join("helm", "hpa", intent["name"])
+    key = f"chart:{intent['id']}"
+    repair = lambda: repair_intent_chart(intent["id"])
+    if None in file_stamps(chart_dir, HPA_CHART_FILES):
+        return [Drift("chartMissing", key, f"Chart {chart_dir} is missing or incomplete", repair, cost=3)]
+    if read_text(os.path.join(chart_dir, "values.yaml")) != hpa_values_yaml(intent) \
+            or read_text(os.path.join(chart_dir, HPA_CHART_FILES[2])) != HPA_TEMPLATE:
+        return [Drift("chartStale", key, f"Chart {chart_dir} does not render the Intent", repair, cost=3)]
+    artifact = intent.get("chartArtifact") or {}
+    if artifact.get("digest"):
+        with CHART_LOCKS[intent["name"]]:
+            digest = helm.chart_content_digest(chart_dir, artifact["version"], Config.HELM_REGISTRY)
+        if digest != artifact["digest"]:
+            return [Drift("chartNotPushed", key, f"Chart {chart_dir} differs from the pushed {artifact.get('reference')}",
+                          repair, cost=3)]
+    return []
+
+
+def repair_intent_chart(intent_id):
+    """
+    Write the chart of an intent again. When it is not the chart last pushed (an update was
+    interrupted before its push), push it under the next version and move the order to it.
+    """
+    intent = INTENT_STORE.get(intent_id)
+    if intent is None or intent.get("chartGroup") or intent.get("lifecycleStatus") not in DEPLOYED_STATES:
+        return
+    chart_dir = create_or_update_hpa_chart(intent)
+    artifact = intent.get("chartArtifact") or {}
+    if not artifact.get("digest"):
+        return
+    with CHART_LOCKS[intent["name"]]:
+        digest = helm.chart_content_digest(chart_dir, artifact["version"], Config.HELM_REGISTRY)
+    if digest == artifact["digest"]:
+        return
+    job = ProvisioningJob(intent_id, ["helmChart", "helmPush", "serviceOrder"])
+    provisioning_runner.run_inline(job, lambda j: reprovision_intent(intent_id, intent, j))
+    if job.state == "failed":
+        raise RuntimeError(f"Provisioning stage '{job.failed_stage}' failed: {job.error}")
+
+
+def service_order_drift(intent):
+    intent_id, service_order_id = intent["id"], intent["serviceOrderId"]
+    key = f"order:{intent_id}"
+    if map_intent_to_so_ids.get(service_order_id) != intent_id:
+        def remap():
+            map_intent_to_so_ids[service_order_id] = intent_id
+        return [Drift("serviceOrderUnmapped", key, f"Service order {service_order_id} is missing from the order mapping",
+                      remap)]
+    if service_order_missing(service_order_id):
+        return [Drift("serviceOrderMissing", key, f"Maestro has no service order {service_order_id}",
+                      lambda: replace_service_order(intent_id), cost=1)]
+    if intent.get("lifecycleStatus") == "UNKNOWN" and Config.ORDER_TRACKING:
+        ## Polling gave up while Maestro was unreachable; it answers again
+        return [Drift("serviceOrderUntracked", key, f"Service order {service_order_id} is no longer polled",
+                      lambda: order_tracker.track(service_order_id, intent_id))]
+    return []
+
+
+def replace_service_order(intent_id):
+    """Order the pushed chart of an intent again, after Maestro lost its previous order."""
+    intent = INTENT_STORE.get(intent_id)
+    if intent is None or intent.get("lifecycleStatus") not in DEPLOYED_STATES:
+        return
+    artifact = intent["chartArtifact"]
+    previous = intent.get("serviceOrderId")
+    if previous:
+        order_tracker.untrack(previous)
+        map_intent_to_so_ids.pop(previous, None)
+    service_order_id = maestro_client.create_service_order(artifact["chartName"], artifact["version"])
+    map_intent_to_so_ids[service_order_id] = intent_id
+    update_intent_fields(intent_id, lifecycleStatus="ORDERED", serviceOrderId=service_order_id)
+    if Config.ORDER_TRACKING:
+        order_tracker.track(service_order_id, intent_id)
+
+
+def provisioning_drift(intent):
+    return [Drift("provisioningStalled", f"provisioning:{intent['id']}",
+                  f"Intent is {intent.get('lifecycleStatus')} and no provisioning job is running for it",
+                  lambda: resume_provisioning(intent["id"]), cost=1)]
+
+
+def resume_provisioning(intent_id):
+    """Finish the provisioning of an intent whose job was lost with a previous process."""
+    intent = INTENT_STORE.get(intent_id)
+    if intent is None or intent.get("lifecycleStatus") not in PROVISIONING_STATES:
+        return
+    service_order_id = None if intent.get("chartGroup") else store.service_order_for_intent(intent_id)
+    if service_order_id:
+        ## The order was placed but not yet recorded on the intent
+        update_intent_fields(intent_id, lifecycleStatus="ORDERED", serviceOrderId=service_order_id)
+        if Config.ORDER_TRACKING:
+            order_tracker.track(service_order_id, intent_id)
+        return
+    job = ProvisioningJob(intent_id, provisioning_stages(intent))
+    provisioning_runner.run_inline(job, lambda j: provision_intent(intent_id, j))
+    if job.state == "failed":
+        raise RuntimeError(f"Provisioning stage '{job.failed_stage}' failed: {job.error}")
+
+
+def chart_group_drift(group, members):
+    key = f"group:{group}"
+    chart_dir = os.path.join("helm", "hpa-groups", group)
+    service_order_id = store.service_order_for_intent(CHART_GROUP_PREFIX + group)
+    repair = lambda: chart_groups.run(group, sync_chart_group)
+
+    if not members:
+        return [Drift("orphanChartGroup", key, f"Chart group '{group}' has no member Intent left", repair, cost=4)]
+    if None in file_stamps(chart_dir, HPA_GROUP_CHART_FILES):
+        return [Drift("chartGroupMissing", key, f"Chart {chart_dir} is missing or incomplete", repair, cost=3)]
+    if read_text(os.path.join(chart_dir, "values.yaml")) != hpa_group_values_yaml(members) \
+            or read_text(os.path.join(chart_dir, HPA_GROUP_CHART_FILES[2])) != HPA_GROUP_TEMPLATE:
+        return [Drift("chartGroupStale", key, f"Chart {chart_dir} does not render the group's Intents", repair, cost=3)]
+    current = chart_group_artifact(group, members)
+    if current is None or (current.get("digest") and current["digest"] != helm.chart_content_digest(
+            chart_dir, current["version"], Config.HELM_REGISTRY)):
+        return [Drift("chartGroupNotPushed", key, f"Chart {chart_dir} differs from the pushed chart", repair, cost=3)]
+    if service_order_id is None or any(m.get("serviceOrderId") != service_order_id
+                                       or m.get("chartArtifact", {}).get("version") != current["version"]
+                                       for m in members):
+        return [Drift("chartGroupMemberStale", key, "Members do not share the group's chart and service order",
+                      repair, cost=3)]
+    if service_order_missing(service_order_id):
+        def reorder():
+            order_tracker.untrack(service_order_id)
+            map_intent_to_so_ids.pop(service_order_id, None)
+            chart_groups.run(group, sync_chart_group)
+        return [Drift("serviceOrderMissing", key, f"Maestro has no service order {service_order_id}", reorder, cost=1)]
+    return []
+
+
+def orphan_chart_drift(own_charts):
+    base_dir = os.path.join("helm", "hpa")
+    names = sorted(os.listdir(base_dir)) if os.path.isdir(base_dir) else []
+    return [
+        Drift("orphanChart", f"chart-dir:{name}", f"{os.path.join(base_dir, name)} belongs to no Intent",
+              lambda name=name: remove_orphan_chart(name))
+        for name in names if name not in own_charts and os.path.isdir(os.path.join(base_dir, name))
+    ]
+
+
+def remove_orphan_chart(name):
+    ## Checked again under the chart lock, which an intent taking the name needs to write its chart
+    with CHART_LOCKS[name]:
+        if any(i.get("name") == name and not i.get("chartGroup") for i in INTENT_STORE.values()):
+            return
+        shutil.rmtree(os.path.join("helm", "hpa", name), ignore_errors=True)
+
+
+def orphan_adapter_drift(metrics):
+    return [
+        Drift("orphanAdapterRule", f"adapter-metric:{metric}", f"Adapter rule for metric '{metric}' belongs to no Intent",
+              lambda metric=metric: remove_orphan_adapter_rule(metric))
+        for metric in sorted(adapter_values.metric_names() - metrics)
+    ]
+
+
+def remove_orphan_adapter_rule(metric):
+    _, total = store.find_intents(limit=0, metric=metric)
+    if not total:
+        remove_adapter_rules({metric})
+
+
+def orphan_service_order_drift(service_orders, intent_ids):
+    return [
+        Drift("orphanServiceOrder", f"service-order:{service_order_id}",
+              f"Service order {service_order_id} belongs to deleted Intent {owner}",
+              lambda service_order_id=service_order_id: terminate_orphan_service_order(service_order_id), cost=4)
+        for service_order_id, owner in service_orders
+        if not owner.startswith(CHART_GROUP_PREFIX) and owner not in intent_ids
+    ]
+
+
+def terminate_orphan_service_order(service_order_id):
+    """Terminate the order of a deleted intent whose teardown failed (or never ran)."""
+    owner = map_intent_to_so_ids.get(service_order_id)
+    if owner is None or owner in INTENT_STORE:
+        return
+    try:
+        terminate_service_order(service_order_id)
+    except (LookupError, ConnectionError) as e:
+        ## Nothing left to terminate: the order is gone, or never got an OCM item
+        if not isinstance(e, LookupError) and not is_not_found(e):
+            raise
+        order_tracker.untrack(service_order_id)
+        map_intent_to_so_ids.pop(service_order_id, None)
 
-    if id in map_intent_to_so_ids:
-        del map_intent_to_so_ids[id]
-        print(f"    the serviceOrderId '{id}' is been cleaned from cache", flush=True)
 
-    return jsonify({"status": 'OK'}), 200
+def reconcile_observations():
+    """
+    Everything the reconciler compares, one item per intent artifact (adapter rule, chart, service
+    order), per chart group, plus the orphan sweeps. Fingerprints are built from the store generations
+    of the intent and its IntentSpecification, the adapter values generation and chart file stamps.
+    """
+    adapter_values.refresh()
+    spec_versions = {spec_id: version for spec_id, version, _ in INTENT_SPEC_STORE.versioned_items()}
+    intents = INTENT_STORE.versioned_items()
+    service_orders = list(map_intent_to_so_ids.items())
+    intent_ids, own_charts, metrics, groups = set(), set(), set(), {}
+
+    for intent_id, generation, intent in intents:
+        spec_id = intent.get("intentSpecification", {}).get("id")
+        inputs = (intent_id, generation, spec_versions.get(spec_id, 0))
+        intent_ids.add(intent_id)
+        metrics.add(intent.get("target", {}).get("metric"))
+        group = intent.get("chartGroup")
+        if group:
+            groups.setdefault(group, []).append((inputs, intent))
+        else:
+            own_charts.add(intent.get("name"))
+
+        if not intent_settled(intent):
+            continue
+        lifecycle_status = intent.get("lifecycleStatus")
+        if lifecycle_status in PROVISIONING_STATES:
+            yield Observation(f"provisioning:{intent_id}", inputs, lambda intent=intent: provisioning_drift(intent))
+            continue
+        if lifecycle_status not in DEPLOYED_STATES:
+            continue
+        yield Observation(f"adapter:{intent_id}", (inputs, adapter_values.generation),
+                          lambda intent=intent: adapter_drift(intent))
+        if group:
+            continue
+        chart_dir = os.path.join("helm", "hpa", intent["name"])
+        yield Observation(f"chart:{intent_id}", (inputs, file_stamps(chart_dir, HPA_CHART_FILES)),
+                          lambda intent=intent: chart_drift(intent))
+        if intent.get("serviceOrderId"):
+            yield Observation(f"order:{intent_id}", (inputs, intent["serviceOrderId"]),
+                              lambda intent=intent: service_order_drift(intent), cost=1)
+
+    group_orders = {owner[len(CHART_GROUP_PREFIX):]: service_order_id for service_order_id, owner in service_orders
+                    if owner.startswith(CHART_GROUP_PREFIX)}
+    groups_dir = os.path.join("helm", "hpa-groups")
+    group_dirs = set(os.listdir(groups_dir)) if os.path.isdir(groups_dir) else set()
+    for group in sorted(groups.keys() | group_orders.keys() | group_dirs):
+        members = groups.get(group, [])
+        if not all(intent_settled(m) and m.get("lifecycleStatus") not in PROVISIONING_STATES for _, m in members):
+            continue
+        chart_dir = os.path.join(groups_dir, group)
+        fingerprint = (tuple(sorted(inputs for inputs, _ in members)), file_stamps(chart_dir, HPA_GROUP_CHART_FILES),
+                       group_orders.get(group))
+        yield Observation(f"group:{group}", fingerprint,
+                          lambda group=group, members=[m for _, m in members]: chart_group_drift(group, members),
+                          cost=1 if members and group in group_orders else 0)
+
+    yield Observation("orphans:charts", (frozenset(own_charts), file_stamps("helm", ("hpa",))),
+                      lambda: orphan_chart_drift(own_charts))
+    yield Observation("orphans:adapterRules", (frozenset(metrics), adapter_values.generation),
+                      lambda: orphan_adapter_drift(metrics))
+    yield Observation("orphans:serviceOrders", (frozenset(intent_ids), frozenset(service_orders)),
+                      lambda: orphan_service_order_drift(service_orders, intent_ids))
+
+
+## Repairing runs are serialized across worker processes; only the leader runs them on a schedule
+RECONCILE_LOCK = FileLock(os.path.join(Config.LOCK_DIR, "reconcile.lock"))
+RECONCILER_LEADER_LOCK = FileLock(os.path.join(Config.LOCK_DIR, "reconciler-leader.lock"))
+reconciler = Reconciler(
+    reconcile_observations,
+    rate_limiter=RateLimiter(Config.RECONCILE_MAESTRO_RATE),
+    full_interval=Config.RECONCILE_FULL_INTERVAL,
+    lock=RECONCILE_LOCK
+)
 
 
-def persist_to_file():
-    if not PERSIST_FILE:
+def start_reconciliation():
+    """Reconcile now and then every RECONCILE_INTERVAL seconds, in the one worker holding the leader lock."""
+    if Config.RECONCILE_INTERVAL <= 0 or not RECONCILER_LEADER_LOCK.acquire(blocking=False):
         return
-    data = {
-        "intentSpecification": INTENT_SPEC_STORE,
-        "intent": INTENT_STORE
-    }
-    with open(PERSIST_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    reconciler.start(Config.RECONCILE_INTERVAL)
+
+
+def full_reconcile_requested():
+    return request.args.get("full", "").lower() in ("1", "true", "yes")
+
+
+@app.route("/reconcile", methods=["GET"])
+def reconcile_report():
+    """Dry run: the drift between the store, the generated artifacts and Maestro, left unrepaired."""
+    return jsonify(reconciler.run(dry_run=True, full=full_reconcile_requested())), 200
 
 
-def load_from_file():
-    if not PERSIST_FILE:
+@app.route("/reconcile", methods=["POST"])
+def reconcile_now():
+    """Run a repairing reconciliation right away and report what it found and repaired."""
+    return jsonify(reconciler.run(full=full_reconcile_requested())), 200
+
+
+## Optional: persist the 'memory' store to file (called on shutdown)
+def persist_to_file():
+    if not PERSIST_FILE or not isinstance(store, DictIntentStore):
         return
-    if os.path.exists(PERSIST_FILE):
-        with open(PERSIST_FILE) as f:
-            data = json.load(f)
-        INTENT_SPEC_STORE.update(data.get("intentSpecification", {}))
-        INTENT_STORE.update(data.get("intent", {}))
+    store.dump(PERSIST_FILE)
+
+
+def shutdown():
+    """Drain this process: finish queued provisioning, write pending files, close the store."""
+    reconciler.stop()
+    provisioning_runner.shutdown()
+    order_tracker.shutdown()
+    adapter_values.flush()
+    persist_to_file()
+    helm.close_registry_clients()
+    store.close()
+    metrics.REGISTRY.close()
+
+
+# -------------------
+# Metrics
+# -------------------
+## Sizes and queue depths are read at scrape time
+metrics.gauge(
+    "tmf_store_documents", "Documents in the intent store", ["collection"],
+    collect=lambda: {
+        ("intentSpecification",): len(INTENT_SPEC_STORE),
+        ("intent",): len(INTENT_STORE),
+        ("serviceOrder",): len(map_intent_to_so_ids),
+    },
+    multiprocess_mode="max"
+)
+metrics.gauge("tmf_provisioning_queue_depth", "Provisioning jobs queued or running",
+              collect=lambda: {(): provisioning_runner.queue_depth()})
+metrics.gauge("tmf_tracked_service_orders", "Service orders polled by the order tracker",
+              collect=lambda: {(): len(order_tracker)})
+metrics.gauge("tmf_adapter_rules", "Rules in the Prometheus Adapter values",
+              collect=lambda: {(): len(adapter_values)}, multiprocess_mode="max")
+metrics.gauge("tmf_adapter_metrics", "External metrics served by the Prometheus Adapter rules",
+              collect=lambda: {(): adapter_values.metric_count()}, multiprocess_mode="max")
+metrics.gauge("tmf_representation_cache_entries", "Serialized GET responses cached",
+              collect=lambda: {(): len(representation_cache)})
+
+## With several worker processes, every worker serves the metrics of all of them
+if Config.PROMETHEUS_MULTIPROC_DIR:
+    metrics.REGISTRY.enable_multiprocess(Config.PROMETHEUS_MULTIPROC_DIR)
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype=None, content_type=metrics.REGISTRY.content_type)
+
+
+def start_background_tasks():
+    """
+    Resume polling the orders left in progress and start the periodic reconciliation. Called once the
+    app runs (gunicorn's post_worker_init hook, or the development server), never on import, so tests,
+    benchmarks and tools importing the module do not reach Maestro or the registry on their own.
+    """
+    if Config.ORDER_TRACKING:
+        resume_order_tracking()
+    start_reconciliation()
 
 
+## Development server only; in production run `gunicorn -c gunicorn.conf.py tmf_server:app`
 if __name__ == "__main__":
-    load_from_file()
-    port = int(os.environ.get("PORT", "4000"))
+    start_background_tasks()
     try:
-        app.run(host="0.0.0.0", port=port, debug=True)
+        app.run(host="0.0.0.0", port=Config.PORT, debug=Config.FLASK_DEBUG)
     finally:
-        persist_to_file()
+        shutdown()
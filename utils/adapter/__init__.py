@@ -0,0 +1,4 @@
+from .values import AdapterValuesModel
+from .consolidation import template_shape, shape_suffix, metric_selector, consolidated_rule
+
+__all__ = ["AdapterValuesModel", "template_shape", "shape_suffix", "metric_selector", "consolidated_rule"]
@@ -0,0 +1,66 @@
+import re
+from typing import Iterable, Mapping, Optional
+from utils.promql import QueryTemplate, compose_query
+
+## Kubernetes label values, which the HPA metric selector (matchLabels) is limited to
+K8S_LABEL_VALUE_RE = re.compile(r"^(([A-Za-z0-9][-A-Za-z0-9_.]*)?[A-Za-z0-9])?$")
+ADAPTER_SELECTOR = "<<.Series>>{<<.LabelMatchers>>}"
+
+
+def template_shape(template: QueryTemplate) -> dict:
+    """The parts of a template shared by every intent of one consolidated rule (queryTemplate field names)."""
+    return {
+        "aggregation": template.aggregation,
+        "function": template.function,
+        "window": template.window,
+        "groupBy": list(template.group_by),
+        "quantile": template.quantile,
+    }
+
+
+def shape_suffix(shape: Mapping) -> str:
+    """Suffix appended to the source metric name to form the exposed metric, unique per shape."""
+    parts = [shape["aggregation"], shape["function"] or "value"]
+    if shape["window"]:
+        parts.append(shape["window"])
+    if shape["quantile"] is not None:
+        parts.append("p" + format(shape["quantile"] * 100, "g").replace(".", "_"))
+    if list(shape["groupBy"]) != ["namespace"]:
+        parts.append("by_" + "_".join(shape["groupBy"]) if shape["groupBy"] else "total")
+    return "_".join(parts)
+
+
+def metric_selector(template: QueryTemplate, target: Mapping) -> Optional[dict]:
+    """
+    The HPA metric selector standing in for the template's label matchers, or None when the
+    intent cannot share a consolidated rule (non-equality matchers or values that are not label values).
+    """
+    selector = {}
+    for matcher in template.label_matchers:
+        resolved = matcher.resolve(target)
+        if resolved is None:
+            continue
+        label, op, value = resolved
+        if op != "=" or len(value) > 63 or not K8S_LABEL_VALUE_RE.match(value):
+            return None
+        selector[label] = value
+    return selector
+
+
+def consolidated_rule(shape: Mapping, source_metrics: Iterable[str]) -> dict:
+    """
+    One rule serving every intent of a shape: discovers all the source metrics and exposes each
+    as `<source metric>_<suffix>`; the HPA metric selector supplies the label matchers.
+    """
+    names = "|".join(sorted(set(source_metrics)))
+    template = QueryTemplate(
+        aggregation=shape["aggregation"], function=shape["function"], window=shape["window"],
+        group_by=tuple(shape["groupBy"]), label_matchers=(), quantile=shape["quantile"],
+    )
+    return {
+        "seriesQuery": f'{{__name__=~"^({names})$"}}',
+        ## The selector (not the HPA's namespace) decides which namespace is queried
+        "resources": {"namespaced": False},
+        "name": {"matches": "^(.*)$", "as": "${1}_" + shape_suffix(shape)},
+        "metricsQuery": compose_query(template, ADAPTER_SELECTOR),
+    }
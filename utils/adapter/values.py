@@ -0,0 +1,309 @@
+import os
+import tempfile
+import threading
+from typing import Callable, Optional
+import yaml
+from utils.locking import FileLock
+from .consolidation import consolidated_rule
+
+## Prefer the libyaml bindings when PyYAML was built with them
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+
+def rule_metric_name(rule: dict) -> Optional[str]:
+    name = rule.get("name")
+    return name.get("as") if isinstance(name, dict) else None
+
+
+class AdapterValuesModel:
+    """
+    Authoritative in-process copy of the shared Prometheus Adapter values file.
+
+    `rules.external` is kept as a dict keyed by the exposed metric name (`name.as`),
+    so adding, replacing or dropping a rule is O(1). Rules without `name.as`
+    (e.g. hand-written `name.matches` rules) are preserved untouched.
+
+    Mutations only mark the model dirty; the file is rewritten at most once per
+    `write_delay` seconds by a background timer (0 writes synchronously), always
+    through a temp file + rename. Call `flush()` to force the write, e.g. on shutdown.
+
+    Several worker processes may share the file: writes hold an advisory file lock,
+    and when the file changed since this process last read or wrote it, it is
+    reloaded and this process's pending upserts/removals are replayed on top.
+
+    In consolidation mode intents are added with `contribute_many` instead: intents whose queries
+    share a shape are served by one `name.matches` rule listing their source metrics. Which metric
+    contributes to which rule is kept in the values file (`policyEngine.consolidatedRules`), so
+    removing a metric only drops its contribution, and the rule once nothing contributes to it.
+    """
+
+    def __init__(self, values_path: str, default_values: Callable[[], dict], write_delay: float = 0.5,
+                 lock_path: Optional[str] = None):
+        self.values_path = values_path
+        self.write_delay = write_delay
+        self._default_values = default_values
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._file_lock = FileLock(lock_path or values_path + ".lock")
+        self._values: Optional[dict] = None
+        self._rules: dict[str, dict] = {}
+        self._unindexed_rules: list[dict] = []
+        ## Consolidated rule key (its name.as) -> {"shape": ..., "members": {metric name: source metric}}
+        self._groups: dict[str, dict] = {}
+        self._member_group: dict[str, str] = {}
+        ## Metric name -> rule (None when removed) changed since the last write
+        self._pending: dict[str, Optional[dict]] = {}
+        ## Metric name -> (shape, source metric) (None when removed) contributed since the last write
+        self._pending_members: dict[str, Optional[tuple]] = {}
+        self._file_stamp = None
+        ## Bumped on every change of the rules, made here or picked up from the file
+        self.generation = 0
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+
+    def _stamp(self):
+        try:
+            st = os.stat(self.values_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _ensure_loaded(self):
+        if self._values is not None:
+            return
+        self._load()
+
+    def _load(self):
+        values = None
+        self.generation += 1
+        self._file_stamp = self._stamp()
+        if os.path.exists(self.values_path):
+            with open(self.values_path) as f:
+                values = yaml.load(f, Loader=SafeLoader)
+        values = values or self._default_values()
+        self._rules = {}
+        self._unindexed_rules = []
+        self._groups = {}
+        self._member_group = {}
+
+        ## Ensure 'rules.external' exists
+        values.setdefault("rules", {})
+        external_rules = values["rules"].pop("external", None) or []
+        for rule in external_rules:
+            metric_name = rule_metric_name(rule)
+            if metric_name is None:
+                self._unindexed_rules.append(rule)
+            else:
+                self._rules[metric_name] = rule
+        engine_state = values.pop("policyEngine", None) or {}
+        for key, group in (engine_state.get("consolidatedRules") or {}).items():
+            self._groups[key] = group
+            for member in group["members"]:
+                self._member_group[member] = key
+        self._values = values
+
+    def get(self, metric_name: str) -> Optional[dict]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._rules.get(self._member_group.get(metric_name, metric_name))
+
+    def __contains__(self, metric_name: str) -> bool:
+        return self.get(metric_name) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._rules) + len(self._unindexed_rules)
+
+    def metric_count(self) -> int:
+        """Metrics served: one per plain rule plus every contribution to a consolidated rule."""
+        with self._lock:
+            self._ensure_loaded()
+            return len(self) - len(self._groups) + len(self._member_group)
+
+    def metric_names(self) -> set:
+        """Names of the metrics served: plain rules (by `name.as`) and contributions to consolidated rules."""
+        with self._lock:
+            self._ensure_loaded()
+            return (self._rules.keys() - self._groups.keys()) | self._member_group.keys()
+
+    def contribution(self, metric_name: str) -> Optional[tuple]:
+        """(shape, source metric) of a metric served by a consolidated rule, else None."""
+        with self._lock:
+            self._ensure_loaded()
+            key = self._member_group.get(metric_name)
+            if key is None:
+                return None
+            group = self._groups[key]
+            return group["shape"], group["members"][metric_name]
+
+    def refresh(self):
+        """Pick up a values file rewritten by another process, keeping this process's pending changes."""
+        ## Writers replace the file atomically, so it can be read without the file lock
+        with self._lock:
+            self._ensure_loaded()
+            self._replay_on_disk_changes()
+
+    def upsert_many(self, rules: list[dict]):
+        """Append new rules, or update in place the rule with the same metric name."""
+        with self._lock:
+            self._ensure_loaded()
+            touched = set()
+            for rule in rules:
+                metric_name = rule_metric_name(rule)
+                if metric_name in self._member_group:
+                    touched.add(self._leave(metric_name))
+                    self._pending_members[metric_name] = None
+                existing = self._rules.get(metric_name)
+                if existing is not None:
+                    existing.update(rule)
+                else:
+                    existing = self._rules[metric_name] = rule
+                self._pending[metric_name] = existing
+            self._rebuild(touched)
+            self._mark_dirty()
+
+    def upsert(self, rule: dict):
+        self.upsert_many([rule])
+
+    def contribute_many(self, contributions):
+        """
+        Serve metrics from consolidated rules. `contributions` are (metric name, shape, source metric)
+        tuples; the shape is `consolidation.template_shape()` of the metric's query template.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            touched = set()
+            for metric_name, shape, source_metric in contributions:
+                if self._rules.pop(metric_name, None) is not None:
+                    self._pending[metric_name] = None
+                touched |= self._join(metric_name, shape, source_metric)
+                self._pending_members[metric_name] = (shape, source_metric)
+            self._rebuild(touched)
+            self._mark_dirty()
+
+    def remove_many(self, metric_names) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            removed = 0
+            touched = set()
+            for name in metric_names:
+                if name in self._member_group:
+                    touched.add(self._leave(name))
+                    self._pending_members[name] = None
+                    removed += 1
+                elif self._rules.pop(name, None) is not None:
+                    self._pending[name] = None
+                    removed += 1
+            if removed:
+                self._rebuild(touched)
+                self._mark_dirty()
+            return removed
+
+    def remove(self, metric_name: str) -> bool:
+        return self.remove_many([metric_name]) == 1
+
+    def _join(self, metric_name: str, shape: dict, source_metric: str) -> set:
+        ## Group keys whose rule must be rebuilt
+        touched = {self._leave(metric_name)} if metric_name in self._member_group else set()
+        key = consolidated_rule(shape, [source_metric])["name"]["as"]
+        group = self._groups.setdefault(key, {"shape": shape, "members": {}})
+        group["members"][metric_name] = source_metric
+        self._member_group[metric_name] = key
+        touched.add(key)
+        return touched
+
+    def _leave(self, metric_name: str) -> str:
+        key = self._member_group.pop(metric_name)
+        self._groups[key]["members"].pop(metric_name, None)
+        return key
+
+    def _rebuild(self, keys):
+        for key in keys:
+            group = self._groups.get(key)
+            if group is None:
+                continue
+            if group["members"]:
+                self._rules[key] = consolidated_rule(group["shape"], group["members"].values())
+            else:
+                del self._groups[key]
+                self._rules.pop(key, None)
+
+    def snapshot(self) -> dict:
+        """The full values document as it will be written to disk."""
+        with self._lock:
+            self._ensure_loaded()
+            values = dict(self._values)
+            values["rules"] = dict(values["rules"])
+            values["rules"]["external"] = list(self._rules.values()) + self._unindexed_rules
+            if self._groups:
+                values["policyEngine"] = {"consolidatedRules": self._groups}
+            return values
+
+    def _mark_dirty(self):
+        self.generation += 1
+        self._dirty = True
+        if self.write_delay <= 0:
+            self.flush()
+        elif self._timer is None:
+            ## Coalesce every mutation within the window into one write
+            self._timer = threading.Timer(self.write_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _replay_on_disk_changes(self):
+        ## Another process rewrote the file: start from its version and re-apply ours
+        if self._file_stamp == self._stamp():
+            return
+        pending = self._pending
+        self._load()
+        for metric_name, rule in pending.items():
+            if rule is None:
+                self._rules.pop(metric_name, None)
+            else:
+                self._rules[metric_name] = rule
+        touched = set()
+        for metric_name, contribution in self._pending_members.items():
+            if metric_name in self._member_group:
+                touched.add(self._leave(metric_name))
+            if contribution is not None:
+                touched |= self._join(metric_name, *contribution)
+        self._rebuild(touched)
+
+    def flush(self):
+        ## Writers are serialized so that an older snapshot can never replace a newer one
+        with self._write_lock, self._file_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                self._replay_on_disk_changes()
+                document = yaml.dump(self.snapshot(), Dumper=SafeDumper, sort_keys=False)
+                rule_count, metric_count = len(self), self.metric_count()
+                self._dirty = False
+                pending, self._pending = self._pending, {}
+                pending_members, self._pending_members = self._pending_members, {}
+
+            directory = os.path.dirname(self.values_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            ## Write next to the target and rename, so readers never see a half-written file
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(document)
+                os.replace(tmp_path, self.values_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                with self._lock:
+                    self._dirty = True
+                    self._pending = {**pending, **self._pending}
+                    self._pending_members = {**pending_members, **self._pending_members}
+                raise
+            with self._lock:
+                self._file_stamp = self._stamp()
+        print(f"Wrote {self.values_path} ({rule_count} rules for {metric_count} metrics)", flush=True)
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import threading
+from typing import Optional
+from utils import jsoncodec
+from utils.locking import FileLock
+
+
+class ChartDigestCache:
+    """
+    Persistent map of chart content digest -> pushed artifact
+    ({"chartName", "version", "reference"}), stored as a JSON file.
+    A hit means the exact same chart was already packaged and pushed.
+
+    The file may be shared by several worker processes: it is re-read whenever it
+    changed on disk, and updated under an advisory file lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(path + ".lock")
+        self._entries: dict[str, dict] = {}
+        self._file_stamp = None
+        self._reload_if_changed()
+
+    def _reload_if_changed(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp == self._file_stamp:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                self._entries = jsoncodec.loads(f.read())
+        except (OSError, ValueError) as e:
+            print(f"!!! Ignoring unreadable chart digest cache {self.path}: {e}")
+        self._file_stamp = stamp
+
+    def get(self, digest: str) -> Optional[dict]:
+        with self._lock:
+            self._reload_if_changed()
+            return self._entries.get(digest)
+
+    def put(self, digest: str, chart_name: str, version: str, reference: str):
+        with self._lock, self._file_lock:
+            self._reload_if_changed()
+            ## The push overwrote the <chart name>:<version> tag, so older digests for it are stale
+            self._entries = {
+                d: e for d, e in self._entries.items()
+                if (e["chartName"], e["version"]) != (chart_name, version)
+            }
+            self._entries[digest] = {"chartName": chart_name, "version": version, "reference": reference}
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(jsoncodec.dumps(self._entries, indent=True))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        st = os.stat(self.path)
+        self._file_stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
@@ -1,34 +1,107 @@
-import shutil
 import subprocess
 import os
+import tempfile
+import threading
+import requests
+from typing import Optional
+from config import Config
+from utils.metrics import histogram
+from .package import package_chart, chart_content_digest
+from .oci import OciRegistryClient, OciPushError, parse_oci_reference
+
+HELM_SECONDS = histogram(
+    "tmf_helm_operation_duration_seconds", "Duration of helm chart packaging and pushing", ["operation", "mode"]
+)
+
 
 def helm_package_and_push(
     application_name: str,
     version: str,
     chart_path: str = ".",
     registry_url: str = None
-) -> bool:
+) -> Optional[str]:
+    """
+    Package the chart and push it to the registry.
+    Returns the pushed reference, or None when the push failed.
+    """
     target_registry = registry_url or Config.HELM_REGISTRY
-    
-    try:
-        ## Package the chart
-        package_cmd = ["helm", "package", str(chart_path)]
-        subprocess.run(package_cmd, check=True)
-        
-        ## Identify the file (Helm names it: name-version.tgz)
-        package_file = f"{application_name}-{version}.tgz"
-        
-        ## Push to registry
-        push_cmd = ["helm", "push", package_file, target_registry]
-        subprocess.run(push_cmd, check=True)
-        
-        ## Cleanup
-        if os.path.exists(package_file):
-            os.remove(package_file)
-            
-        return True
-
-    except subprocess.CalledProcessError as e:
-        print(f"!!! Helm Command Failed: {e.cmd}")
-        print(f"!!! Output: {e.output}")
-        return False # This tells the caller that it failed!
+
+    if Config.HELM_IN_PROCESS:
+        try:
+            return package_and_push_in_process(application_name, version, chart_path, target_registry)
+        except (OciPushError, ValueError, KeyError, OSError, requests.RequestException) as e:
+            print(f"!!! In-process Helm push failed, falling back to the helm CLI: {e}")
+
+    return helm_cli_package_and_push(application_name, version, chart_path, target_registry)
+
+
+## One client per registry host, so pushes reuse its connections and auth tokens
+_registry_clients: dict[str, OciRegistryClient] = {}
+_registry_clients_lock = threading.Lock()
+
+
+def registry_client(host: str) -> OciRegistryClient:
+    with _registry_clients_lock:
+        client = _registry_clients.get(host)
+        if client is None:
+            client = _registry_clients[host] = OciRegistryClient(host, plain_http=Config.HELM_REGISTRY_PLAIN_HTTP)
+        return client
+
+
+def close_registry_clients():
+    """Close the HTTP sessions of the registry clients; a later push opens new ones."""
+    with _registry_clients_lock:
+        clients = list(_registry_clients.values())
+        _registry_clients.clear()
+    for client in clients:
+        client.close()
+
+
+def package_and_push_in_process(application_name: str, version: str, chart_path, registry_url: str) -> str:
+    """
+    Package the chart in memory and push it through the OCI distribution API,
+    without spawning the helm binary. Returns the pushed reference.
+    """
+    with HELM_SECONDS.time(operation="package", mode="in-process"):
+        chart_archive, metadata = package_chart(chart_path, version=version)
+    if metadata["name"] != application_name:
+        raise ValueError(f"Chart name '{metadata['name']}' does not match '{application_name}'")
+
+    host, path = parse_oci_reference(registry_url)
+    repository = f"{path}/{application_name}" if path else application_name
+    ## OCI tags cannot contain '+', helm uses '_' instead
+    tag = str(metadata["version"]).replace("+", "_")
+
+    client = registry_client(host)
+    with HELM_SECONDS.time(operation="push", mode="in-process"):
+        digest = client.push_chart(repository, tag, chart_archive, metadata)
+    reference = f"{host}/{repository}:{tag}@{digest}"
+    print(f"Pushed {reference}")
+    return reference
+
+
+def helm_cli_package_and_push(application_name: str, version: str, chart_path, target_registry: str) -> Optional[str]:
+    ## Package into a private temporary directory, so concurrent requests never share a .tgz path
+    with tempfile.TemporaryDirectory(prefix="helm-package-") as package_dir:
+        try:
+            ## Package the chart
+            package_cmd = ["helm", "package", str(chart_path), "--version", version, "--destination", package_dir]
+            with HELM_SECONDS.time(operation="package", mode="cli"):
+                subprocess.run(package_cmd, check=True)
+
+            ## Identify the file (Helm names it: name-version.tgz)
+            package_file = os.path.join(package_dir, f"{application_name}-{version}.tgz")
+
+            ## Push to registry
+            push_cmd = ["helm", "push", package_file, target_registry]
+            if Config.HELM_REGISTRY_PLAIN_HTTP:
+                push_cmd.append("--plain-http")
+            with HELM_SECONDS.time(operation="push", mode="cli"):
+                subprocess.run(push_cmd, check=True)
+
+            return f"{target_registry}/{application_name}:{version}"
+
+        except subprocess.CalledProcessError as e:
+            print(f"!!! Helm Command Failed: {e.cmd}")
+            print(f"!!! Output: {e.output}")
+            return None # This tells the caller that it failed!
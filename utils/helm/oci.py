@@ -0,0 +1,156 @@
+import base64
+import hashlib
+import json
+import os
+from typing import Optional
+from urllib.parse import urljoin
+import requests
+
+HELM_CONFIG_MEDIA_TYPE = "application/vnd.cncf.helm.config.v1+json"
+HELM_CHART_MEDIA_TYPE = "application/vnd.cncf.helm.chart.content.v1.tar+gzip"
+OCI_MANIFEST_MEDIA_TYPE = "application/vnd.oci.image.manifest.v1+json"
+
+## Where `helm registry login` stores credentials
+HELM_REGISTRY_CONFIG = os.path.expanduser(
+    os.getenv("HELM_REGISTRY_CONFIG", "~/.config/helm/registry/config.json")
+)
+
+
+class OciPushError(RuntimeError):
+    pass
+
+
+def sha256_digest(data: bytes) -> str:
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def parse_oci_reference(registry_url: str) -> tuple[str, str]:
+    """
+    Split 'oci://registry.example.com/some/path' into ('registry.example.com', 'some/path').
+    """
+    if not registry_url.startswith("oci://"):
+        raise ValueError(f"Not an OCI registry URL: {registry_url}")
+    host, _, path = registry_url[len("oci://"):].partition("/")
+    return host, path.strip("/")
+
+
+def registry_credentials(host: str) -> Optional[tuple[str, str]]:
+    """
+    Credentials from HELM_REGISTRY_USERNAME/HELM_REGISTRY_PASSWORD, otherwise from the
+    `helm registry login` config file.
+    """
+    username = os.getenv("HELM_REGISTRY_USERNAME")
+    password = os.getenv("HELM_REGISTRY_PASSWORD")
+    if username and password:
+        return username, password
+    try:
+        with open(HELM_REGISTRY_CONFIG) as f:
+            auths = json.load(f).get("auths", {})
+    except (OSError, ValueError):
+        return None
+    auth = auths.get(host, {}).get("auth")
+    if not auth:
+        return None
+    username, _, password = base64.b64decode(auth).decode("utf-8").partition(":")
+    return username, password
+
+
+class OciRegistryClient:
+    """
+    Minimal OCI distribution API client able to push a Helm chart:
+    blobs are only uploaded when the registry does not already have them.
+    """
+
+    def __init__(self, host: str, plain_http: bool = False, timeout: float = 60,
+                 session: Optional[requests.Session] = None):
+        self.base_url = f"{'http' if plain_http else 'https'}://{host}"
+        self.credentials = registry_credentials(host)
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self._tokens: dict[str, str] = {}
+
+    def _request(self, method: str, url: str, scope: str, **kwargs) -> requests.Response:
+        headers = dict(kwargs.pop("headers", None) or {})
+        if scope in self._tokens:
+            headers["Authorization"] = self._tokens[scope]
+        response = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+        if response.status_code == 401:
+            ## No token for this scope yet, or the cached one expired (clients live across pushes)
+            self._tokens[scope] = self._authenticate(response.headers.get("WWW-Authenticate", ""), scope)
+            headers["Authorization"] = self._tokens[scope]
+            response = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+        return response
+
+    def _authenticate(self, challenge: str, scope: str) -> str:
+        scheme, _, params = challenge.partition(" ")
+        if scheme.lower() == "basic":
+            if not self.credentials:
+                raise OciPushError("Registry requires credentials but none are configured")
+            return "Basic " + base64.b64encode(":".join(self.credentials).encode("utf-8")).decode("ascii")
+        if scheme.lower() != "bearer":
+            raise OciPushError(f"Unsupported registry auth challenge: {challenge!r}")
+
+        fields = {}
+        for part in params.split(","):
+            key, _, value = part.strip().partition("=")
+            fields[key] = value.strip('"')
+        query = {"service": fields.get("service"), "scope": scope}
+        response = self.session.get(fields["realm"], params=query, auth=self.credentials, timeout=self.timeout)
+        if response.status_code != 200:
+            raise OciPushError(f"Registry token request failed: {response.status_code} {response.text}")
+        token_data = response.json()
+        return "Bearer " + (token_data.get("token") or token_data.get("access_token"))
+
+    def close(self):
+        self.session.close()
+
+    def blob_exists(self, repository: str, digest: str) -> bool:
+        url = f"{self.base_url}/v2/{repository}/blobs/{digest}"
+        response = self._request("HEAD", url, f"repository:{repository}:pull,push")
+        return response.status_code == 200
+
+    def upload_blob(self, repository: str, data: bytes) -> str:
+        digest = sha256_digest(data)
+        if self.blob_exists(repository, digest):
+            return digest
+
+        scope = f"repository:{repository}:pull,push"
+        response = self._request("POST", f"{self.base_url}/v2/{repository}/blobs/uploads/", scope)
+        if response.status_code != 202:
+            raise OciPushError(f"Blob upload start failed: {response.status_code} {response.text}")
+        location = urljoin(self.base_url, response.headers["Location"])
+        separator = "&" if "?" in location else "?"
+        response = self._request(
+            "PUT", f"{location}{separator}digest={digest}", scope, data=data,
+            headers={"Content-Type": "application/octet-stream"}
+        )
+        if response.status_code != 201:
+            raise OciPushError(f"Blob upload failed: {response.status_code} {response.text}")
+        return digest
+
+    def push_chart(self, repository: str, tag: str, chart_archive: bytes, chart_metadata: dict) -> str:
+        """
+        Push a packaged chart as '<repository>:<tag>' and return the manifest digest.
+        """
+        config = json.dumps(chart_metadata, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        config_digest = self.upload_blob(repository, config)
+        chart_digest = self.upload_blob(repository, chart_archive)
+
+        manifest = json.dumps({
+            "schemaVersion": 2,
+            "mediaType": OCI_MANIFEST_MEDIA_TYPE,
+            "config": {"mediaType": HELM_CONFIG_MEDIA_TYPE, "digest": config_digest, "size": len(config)},
+            "layers": [{"mediaType": HELM_CHART_MEDIA_TYPE, "digest": chart_digest, "size": len(chart_archive)}],
+            "annotations": {
+                "org.opencontainers.image.title": chart_metadata["name"],
+                "org.opencontainers.image.version": str(chart_metadata["version"]),
+            },
+        }, separators=(",", ":")).encode("utf-8")
+        response = self._request(
+            "PUT", f"{self.base_url}/v2/{repository}/manifests/{tag}",
+            f"repository:{repository}:pull,push",
+            data=manifest, headers={"Content-Type": OCI_MANIFEST_MEDIA_TYPE}
+        )
+        if response.status_code != 201:
+            raise OciPushError(f"Manifest push failed: {response.status_code} {response.text}")
+        return sha256_digest(manifest)
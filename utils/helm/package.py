@@ -0,0 +1,81 @@
+import gzip
+import hashlib
+import io
+import os
+import tarfile
+from pathlib import Path
+from typing import Optional
+import yaml
+
+## Fixed metadata so that identical chart content always produces identical bytes
+TAR_MTIME = 0
+FILE_MODE = 0o644
+
+
+def read_chart_metadata(chart_path) -> dict:
+    with open(Path(chart_path) / "Chart.yaml") as f:
+        return yaml.safe_load(f) or {}
+
+
+def _chart_files(chart_path: Path) -> dict[str, bytes]:
+    files = {}
+    for root, dirs, filenames in os.walk(chart_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for filename in filenames:
+            if filename.startswith("."):
+                continue
+            full_path = Path(root) / filename
+            files[full_path.relative_to(chart_path).as_posix()] = full_path.read_bytes()
+    return files
+
+
+def chart_content_digest(chart_path, version: str, registry_url: str = "") -> str:
+    """
+    sha256 over the rendered chart files (sorted by path), the chart version and the target
+    registry: equal digests mean that packaging and pushing again would publish the same artifact.
+    """
+    sha = hashlib.sha256()
+    for part in (registry_url or "", str(version)):
+        sha.update(part.encode("utf-8") + b"\0")
+    files = _chart_files(Path(chart_path))
+    for name in sorted(files):
+        sha.update(name.encode("utf-8") + b"\0")
+        sha.update(str(len(files[name])).encode("ascii") + b"\0")
+        sha.update(files[name])
+    return "sha256:" + sha.hexdigest()
+
+
+def package_chart(chart_path, version: Optional[str] = None) -> tuple[bytes, dict]:
+    """
+    Build the .tgz of a chart directory in memory, the way `helm package` lays it out
+    (every file under a top-level '<chart name>/' directory).
+
+    Entries are sorted and carry fixed mtimes/owners, and the gzip header has no timestamp,
+    so the result is byte-for-byte reproducible. `version` overrides the Chart.yaml version,
+    like `helm package --version`. Returns (tarball bytes, chart metadata).
+    """
+    chart_path = Path(chart_path)
+    metadata = read_chart_metadata(chart_path)
+    if version:
+        metadata["version"] = version
+    chart_name = metadata["name"]
+
+    files = _chart_files(chart_path)
+    files["Chart.yaml"] = yaml.safe_dump(metadata, sort_keys=False).encode("utf-8")
+
+    raw = io.BytesIO()
+    with tarfile.open(fileobj=raw, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for name in sorted(files):
+            data = files[name]
+            info = tarfile.TarInfo(f"{chart_name}/{name}")
+            info.size = len(data)
+            info.mtime = TAR_MTIME
+            info.mode = FILE_MODE
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            tar.addfile(info, io.BytesIO(data))
+
+    compressed = io.BytesIO()
+    with gzip.GzipFile(fileobj=compressed, mode="wb", mtime=TAR_MTIME, filename="") as gz:
+        gz.write(raw.getvalue())
+    return compressed.getvalue(), metadata
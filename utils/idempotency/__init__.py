@@ -0,0 +1,3 @@
+from .cache import IdempotencyCache, IdempotencyKeyMismatch, IdempotencyKeyInProgress, request_fingerprint
+
+__all__ = ["IdempotencyCache", "IdempotencyKeyMismatch", "IdempotencyKeyInProgress", "request_fingerprint"]
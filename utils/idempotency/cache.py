@@ -0,0 +1,101 @@
+import hashlib
+import threading
+import time
+from typing import Any, Optional
+from utils import jsoncodec
+from utils.store import IntentStore
+
+
+class IdempotencyKeyMismatch(ValueError):
+    """The key was already used for a different request."""
+
+
+class IdempotencyKeyInProgress(RuntimeError):
+    """The original request of the key did not finish within the wait timeout."""
+
+
+def _sort_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _sort_keys(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_sort_keys(item) for item in value]
+    return value
+
+
+def request_fingerprint(method: str, path: str, body: bytes) -> str:
+    """Hash of a request; JSON bodies are canonicalized, so key order and whitespace do not matter."""
+    try:
+        canonical = jsoncodec.dumps(_sort_keys(jsoncodec.loads(body)))
+    except ValueError:
+        canonical = body
+    return hashlib.sha256(method.encode() + b" " + path.encode() + b"\n" + canonical).hexdigest()
+
+
+class IdempotencyCache:
+    """
+    Final responses of requests sent with an Idempotency-Key, kept in the store's `idempotency`
+    collection for `ttl` seconds (at most `max_entries`, oldest evicted first), so that every
+    worker process sees them.
+
+    `begin` claims a key for a request, or returns the recorded response of an earlier one.
+    A duplicate arriving while the original is still running waits for its outcome (up to
+    `wait_timeout` seconds). A claim that is never completed, e.g. because its process died,
+    expires after `lease` seconds.
+    """
+
+    def __init__(self, store: IntentStore, ttl: float = 86400, max_entries: int = 10000,
+                 wait_timeout: float = 30, lease: float = 300, purge_interval: float = 60):
+        self.store = store
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self.lease = lease
+        self.purge_interval = purge_interval
+        ## Wakes up duplicates waiting in this process; other processes' completions are polled
+        self._completed = threading.Condition()
+        self._next_purge = 0.0
+
+    def begin(self, key: str, fingerprint: str) -> Optional[dict]:
+        """
+        None when the caller owns the key and must run the request (then `complete` or `release` it),
+        else the recorded response {"status", "body", "headers"}.
+        """
+        self._maybe_purge()
+        deadline = time.monotonic() + self.wait_timeout
+        pending = {"fingerprint": fingerprint, "state": "pending", "expiresAt": time.time() + self.lease}
+        while True:
+            record = self.store.claim_idempotency_key(key, pending)
+            if record is None:
+                return None
+            if record["fingerprint"] != fingerprint:
+                raise IdempotencyKeyMismatch(f"Idempotency-Key '{key}' was used for a different request")
+            if record["state"] == "done":
+                return record["response"]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyKeyInProgress(f"The request with Idempotency-Key '{key}' is still in progress")
+            with self._completed:
+                self._completed.wait(min(remaining, 0.1))
+
+    def complete(self, key: str, fingerprint: str, status: int, body: bytes, headers: dict):
+        self.store.idempotency[key] = {
+            "fingerprint": fingerprint,
+            "state": "done",
+            "expiresAt": time.time() + self.ttl,
+            "response": {"status": status, "body": body.decode("utf-8"), "headers": headers},
+        }
+        with self._completed:
+            self._completed.notify_all()
+
+    def release(self, key: str):
+        """Forget a claim whose request failed, so that a retry runs it again."""
+        self.store.idempotency.pop(key, None)
+        with self._completed:
+            self._completed.notify_all()
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.purge_interval
+        self.store.purge_idempotency_keys(time.time(), self.max_entries)
@@ -0,0 +1,25 @@
+"""
+Process-wide JSON codec used for API responses, the intent store and Maestro bodies.
+Compact UTF-8 output unless indent=True; datetimes are written as ISO 8601 UTC ('...Z').
+The backend is chosen by Config.JSON_CODEC.
+"""
+from typing import Any, Union
+from config import Config
+from .codec import StdlibJsonCodec, OrjsonCodec, get_codec
+
+codec = get_codec(Config.JSON_CODEC)
+
+
+def dumps(value: Any, indent: bool = False) -> bytes:
+    return codec.dumps(value, indent=indent)
+
+
+def dumps_str(value: Any, indent: bool = False) -> str:
+    return codec.dumps(value, indent=indent).decode("utf-8")
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    return codec.loads(data)
+
+
+__all__ = ["StdlibJsonCodec", "OrjsonCodec", "get_codec", "codec", "dumps", "dumps_str", "loads"]
@@ -0,0 +1,73 @@
+import datetime
+import json
+import uuid
+from pathlib import PurePath
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _utc_iso(value: Union[datetime.datetime, datetime.date]) -> str:
+    ## Naive datetimes are taken as UTC, like orjson's OPT_NAIVE_UTC
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.isoformat().replace("+00:00", "Z")
+    return value.isoformat()
+
+
+def _default(value: Any):
+    ## Types neither backend handles natively
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (PurePath, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return _utc_iso(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class StdlibJsonCodec:
+    """JSON through the standard library: compact, UTF-8, datetimes as ISO 8601 with 'Z'."""
+
+    name = "json"
+
+    def dumps(self, value: Any, indent: bool = False) -> bytes:
+        if indent:
+            text = json.dumps(value, indent=2, ensure_ascii=False, default=_default)
+        else:
+            text = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_default)
+        return text.encode("utf-8")
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(StdlibJsonCodec):
+    """Same output contract as StdlibJsonCodec, serialized by orjson."""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("JSON_CODEC=orjson requires the 'orjson' package")
+        self._options = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, value: Any, indent: bool = False) -> bytes:
+        options = self._options | orjson.OPT_INDENT_2 if indent else self._options
+        return orjson.dumps(value, default=_default, option=options)
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        return orjson.loads(data)
+
+
+def get_codec(name: str = "auto") -> StdlibJsonCodec:
+    """'orjson', 'json', or 'auto' (orjson when installed)."""
+    if name == "orjson" or (name == "auto" and orjson is not None):
+        return OrjsonCodec()
+    if name in ("json", "auto"):
+        return StdlibJsonCodec()
+    raise ValueError(f"Unknown JSON_CODEC '{name}', expected 'auto', 'orjson' or 'json'")
@@ -0,0 +1,25 @@
+from flask import has_request_context, request
+from flask.json.provider import JSONProvider
+from . import dumps, dumps_str, loads
+
+
+def indent_requested() -> bool:
+    """Indented output is only produced for requests carrying a `pretty` query parameter."""
+    if not has_request_context():
+        return False
+    pretty = request.args.get("pretty")
+    return pretty is not None and pretty.lower() not in ("0", "false", "no")
+
+
+class CodecJSONProvider(JSONProvider):
+    """Flask JSON provider (jsonify, request.get_json) backed by the process-wide codec."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_str(obj, indent=bool(kwargs.get("indent")))
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, indent=indent_requested()), mimetype="application/json")
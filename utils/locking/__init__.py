@@ -0,0 +1,3 @@
+from .file_lock import FileLock, FileLockSet
+
+__all__ = ["FileLock", "FileLockSet"]
@@ -0,0 +1,83 @@
+import os
+import threading
+
+## fcntl is POSIX only; elsewhere the lock degrades to an in-process lock
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock:
+    """
+    Exclusive advisory lock shared by every thread and every process on the host
+    (flock(2) on `lock_path`, created on demand). Not reentrant.
+
+        with FileLock("locks/adapter-values.lock"):
+            ...
+
+    Lock files are never removed: unlinking one while another process waits on it
+    would let two holders in at once.
+    """
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; with blocking=False return False instead of waiting for it."""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if fcntl is None:
+            return True
+        try:
+            directory = os.path.dirname(self.lock_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+            except BaseException:
+                os.close(fd)
+                raise
+            self._fd = fd
+            return True
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            ## Closing the descriptor releases the flock
+            os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FileLockSet:
+    """One FileLock per name, all kept in the same directory (e.g. one per chart)."""
+
+    def __init__(self, directory: str, prefix: str = ""):
+        self.directory = directory
+        self.prefix = prefix
+        self._locks: dict[str, FileLock] = {}
+        self._guard = threading.Lock()
+
+    def __getitem__(self, name: str) -> FileLock:
+        with self._guard:
+            lock = self._locks.get(name)
+            if lock is None:
+                lock = self._locks[name] = FileLock(os.path.join(self.directory, f"{self.prefix}{name}.lock"))
+            return lock
@@ -1,3 +1,4 @@
 from .client import MaestroTranslatorClient
+from .transport import build_session, CallStats
 
-__all__ = ["MaestroTranslatorClient"]
+__all__ = ["MaestroTranslatorClient", "build_session", "CallStats"]
@@ -1,21 +1,48 @@
+import threading
+import time
 import requests
 from . import models
+from .transport import build_session, CallStats
 from typing import Optional
 from config import Config
+from utils import jsoncodec
 
 class MaestroTranslatorClient:
 
+    ## Refresh the access token this many seconds before it expires
+    TOKEN_REFRESH_MARGIN = 30
+
     def __init__(
         self,
         host: Optional[str] = None,
-        host_keycloak: Optional[str] = None
+        host_keycloak: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None
     ):
         ## Use Config as the default if host/host_keycloak aren't passed during init
         self.host = host or Config.MAESTRO_HOST
         self.host_keycloak = host_keycloak or Config.KEYCLOAK_HOST
-        
-        self.session = requests.Session()
+
+        ## Pooled session; retries (with backoff and jitter) apply to idempotent calls only
+        self.session = build_session(
+            pool_size=pool_size or Config.MAESTRO_POOL_SIZE,
+            retries=Config.MAESTRO_RETRIES if retries is None else retries,
+            backoff_factor=Config.MAESTRO_BACKOFF_FACTOR if backoff_factor is None else backoff_factor,
+        )
+        self.timeout = (
+            connect_timeout or Config.MAESTRO_CONNECT_TIMEOUT,
+            read_timeout or Config.MAESTRO_READ_TIMEOUT
+        )
+        self.call_stats = CallStats()
         self.access_token: Optional[str] = None
+        self.access_token_expires_at = 0.0
+        self.refresh_token: Optional[str] = None
+        self.refresh_token_expires_at = 0.0
+        ## Only one thread fetches a token at a time; the others wait and reuse it
+        self._token_lock = threading.Lock()
 
     def get_access_token_keycloak(
         self,
@@ -25,8 +52,6 @@ class MaestroTranslatorClient:
         """
         Retrieves access token using credentials from Config or passed arguments.
         """
-        url = f"{self.host_keycloak}/realms/tmf/protocol/openid-connect/token"
-        
         # Pull dynamically from Config if not provided in the function call
         payload = {
             "client_id": Config.KC_CLIENT_ID,
@@ -35,74 +60,161 @@ class MaestroTranslatorClient:
             "username": username or Config.KC_USER,
             "password": password or Config.KC_PASS,
         }
+        return self._request_token(payload)
+
+    def refresh_access_token_keycloak(self) -> requests.Response:
+        """
+        Exchanges the cached refresh token for a new access token.
+        """
+        payload = {
+            "client_id": Config.KC_CLIENT_ID,
+            "client_secret": Config.KC_CLIENT_SECRET,
+            "grant_type": "refresh_token",
+            "refresh_token": self.refresh_token,
+        }
+        return self._request_token(payload)
+
+    def _request_token(self, payload: dict) -> requests.Response:
+        url = f"{self.host_keycloak}/realms/tmf/protocol/openid-connect/token"
 
         headers = {
             'Content-Type': 'application/x-www-form-urlencoded'
         }
 
-        response = self.session.post(url, data=payload, headers=headers)
+        requested_at = time.monotonic()
+        response = None
+        try:
+            response = self.session.post(url, data=payload, headers=headers, timeout=self.timeout)
+        finally:
+            self.call_stats.record(f"keycloak_{payload['grant_type']}", time.monotonic() - requested_at,
+                                   ok=response is not None and response.status_code == 200)
         
         if response.status_code != 200:
             print(f"!!! Keycloak Auth Failed: {response.status_code} - {response.text}")
             response.raise_for_status()
 
-        token_data = response.json()
-        self.access_token = token_data.get("access_token")
+        token_data = jsoncodec.loads(response.content)
+        access_token = token_data.get("access_token")
         
-        if not self.access_token:
+        if not access_token:
             raise ValueError("Failed to retrieve access_token from Keycloak response.")
 
-        ## Update the session headers for future authenticated requests
-        self.session.headers.update({"Authorization": f"Bearer {self.access_token}"})
+        ## Expiry is measured from when the request was sent, to stay on the safe side
+        self.access_token = access_token
+        self.access_token_expires_at = requested_at + float(token_data.get("expires_in", 0))
+        self.refresh_token = token_data.get("refresh_token")
+        self.refresh_token_expires_at = requested_at + float(token_data.get("refresh_expires_in", 0))
 
         return response
 
-    def create_service_order(self, applicationName: str, version: str) -> str:
-        if self.access_token is None:
-            raise PermissionError(
-                "Access token not available. Please call 'get_access_token_keycloak' first."
-            )
+    def ensure_access_token(self, force: bool = False) -> str:
+        """
+        Returns a valid access token, fetching one only when the cached token is missing
+        or about to expire. Uses the refresh_token grant when possible, the password grant otherwise.
+        """
+        stale_token = self.access_token
+        if not force and self._token_is_fresh():
+            return self.access_token
+
+        with self._token_lock:
+            ## Another thread may have renewed the token while we were waiting
+            if self._token_is_fresh() and (not force or self.access_token != stale_token):
+                return self.access_token
+
+            if self.refresh_token and time.monotonic() < self.refresh_token_expires_at - self.TOKEN_REFRESH_MARGIN:
+                try:
+                    self.refresh_access_token_keycloak()
+                    return self.access_token
+                except (requests.RequestException, ValueError) as e:
+                    print(f"!!! Keycloak token refresh failed, falling back to password grant: {e}")
+            self.get_access_token_keycloak()
+            return self.access_token
+
+    def _token_is_fresh(self) -> bool:
+        return (
+            self.access_token is not None
+            and time.monotonic() < self.access_token_expires_at - self.TOKEN_REFRESH_MARGIN
+        )
+
+    def _request(self, call: str, method: str, url: str, headers: Optional[dict] = None, **kwargs) -> requests.Response:
+        """
+        Sends an authenticated request to Maestro, renewing the token once on a 401.
+        The Authorization header is set per request, so the shared session stays immutable.
+        The latency of the whole call (including retries) is recorded under `call`.
+        """
+        headers = dict(headers or {})
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.monotonic()
+        ok = False
+        try:
+            token = self.ensure_access_token()
+            headers["Authorization"] = f"Bearer {token}"
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            if response.status_code == 401:
+                ## Only force a renewal if nobody else did it in the meantime
+                token = self.ensure_access_token(force=self.access_token == token)
+                headers["Authorization"] = f"Bearer {token}"
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            ok = 200 <= response.status_code < 300
+            return response
+        finally:
+            self.call_stats.record(call, time.monotonic() - started, ok)
 
+    def create_service_order(self, applicationName: str, version: str) -> str:
         url = f"{self.host}/tmf-api/serviceOrdering/v4/serviceOrder"
         
-        payload_model = models.produce_service_order_payload(applicationName, version)
+        ## Pre-serialized from the cached order template: only names, version and timestamps are filled in
+        body = models.produce_service_order_body(applicationName, version)
 
         headers = {
             'Content-Type': 'application/json'
         }
 
-        response = self.session.post(url, json=payload_model, headers=headers)
+        response = self._request("create_service_order", "POST", url, data=body, headers=headers)
         
         if response.status_code < 200 or response.status_code >= 300:
-            error_detail = response.json().get("message", response.text)
+            error_detail = jsoncodec.loads(response.content).get("message", response.text)
             raise ConnectionError(f"Status {response.status_code}: {error_detail}")
 
-        return response.json()["id"]
+        return jsoncodec.loads(response.content)["id"]
 
     def get_service_order(self, service_order_id: str, as_get_response: bool = True) -> dict:
         url = f"{self.host}/tmf-api/serviceOrdering/v4/serviceOrder/{service_order_id}"
-        response = self.session.get(url)
+        response = self._request("get_service_order", "GET", url)
         if response.status_code < 200 or response.status_code >= 300:
             raise ConnectionError(f"Error {response.status_code}: {response.text}")
         if as_get_response:
-            return models.produce_response_get_service_order_by_id(response.json())
-        return response.json()
+            return models.produce_response_get_service_order_by_id(jsoncodec.loads(response.content))
+        return jsoncodec.loads(response.content)
 
     def delete_service_order(self, service_order_id: str):
         url = f"{self.host}/tmf-api/serviceOrdering/v4/serviceOrder/{service_order_id}"
-        response = self.session.delete(url)
+        response = self._request("delete_service_order", "DELETE", url)
         if response.status_code < 200 or response.status_code >= 300:
             raise ConnectionError(f"Delete failed {response.status_code}: {response.text}")
 
     def get_service_inventory_item(self, service_id: str) -> dict:
         url = f"{self.host}/tmf-api/serviceInventory/v4/service/{service_id}"
-        response = self.session.get(url)
+        response = self._request("get_service_inventory_item", "GET", url)
         if response.status_code < 200 or response.status_code >= 300:
             raise ConnectionError(f"Inventory lookup failed: {response.text}")
-        return response.json()
+        return jsoncodec.loads(response.content)
 
     def patch_service_inventory_item(self, service_id: str, service_order_item: dict):
         url = f"{self.host}/tmf-api/serviceInventory/v4/service/{service_id}"
-        response = self.session.patch(url, json=service_order_item)
+        response = self._request("patch_service_inventory_item", "PATCH", url, data=jsoncodec.dumps(service_order_item),
+                                 headers={"Content-Type": "application/json"})
         if response.status_code < 200 or response.status_code >= 300:
-            raise ConnectionError(f"Patch failed: {response.text}")
\ No newline at end of file
+            raise ConnectionError(f"Patch failed: {response.text}")
+
+    def update_service_artifact(self, service_order_id: str, applicationName: str, version: str) -> str:
+        """
+        Move the OCM service deployed by an existing service order to another chart version,
+        instead of placing a new order. Returns the inventory item id.
+        """
+        item_id = models.ocm_service_item_id(self.get_service_order(service_order_id, False))
+        if not item_id:
+            raise LookupError(f"Service order with id '{service_order_id}', has no valid 'OCM' order item")
+        service_item = self.get_service_inventory_item(item_id)
+        self.patch_service_inventory_item(item_id, models.set_service_artifact(service_item, applicationName, version))
+        return item_id
@@ -1,6 +1,10 @@
 import base64
+import copy
+import re
 from datetime import datetime, timezone
+from typing import Optional
 from config import Config
+from utils import jsoncodec
 
 ## cluster_metadata = "YXBpVmVyc2lvbjogc2NoZWR1bGluZy5wMmNvZGUuZXUvdjFhbHBoYTEKa2luZDogUDJDb2RlU2NoZWR1bGluZ01hbmlmZXN0Cm1ldGFkYXRhOgogIG5hbWU6IHBvYwogIG5hbWVzcGFjZTogcDJjb2RlLXNjaGVkdWxlci1zeXN0ZW0Kc3BlYzoKICBnbG9iYWxBbm5vdGF0aW9uczoKICAgIC0gInAyY29kZS50YXJnZXQubWFuYWdlZENsdXN0ZXJTZXQ9ZGVmYXVsdCIKICAgIC0gInAyY29kZS50YXJnZXQuY2x1c3Rlcj1jbHVzdGVyLWs4cy0yIg=="
 ## cluster_metadata = "YXBpVmVyc2lvbjogc2NoZWR1bGluZy5wMmNvZGUuZXUvdjFhbHBoYTEKa2luZDogUDJDb2RlU2NoZWR1bGluZ01hbmlmZXN0Cm1ldGFkYXRhOgogIG5hbWU6IHBvYwogIG5hbWVzcGFjZTogcDJjb2RlLXNjaGVkdWxlci1zeXN0ZW0Kc3BlYzoKICB3b3JrbG9hZEFubm90YXRpb25zOgogICAgLSBuYW1lOiBwb2QtYS1ocGEKICAgICAgYW5ub3RhdGlvbnM6CiAgICAgICAgLSBwMmNvZGUudGFyZ2V0Lm1hbmFnZWRDbHVzdGVyU2V0PWRlZmF1bHQKICAgICAgICAtIHAyY29kZS50YXJnZXQuY2x1c3Rlcj1jbHVzdGVyLWs4cy0y"
@@ -16,23 +20,23 @@ def set_readable_cluster_metadata(yaml_txt : str):
     global cluster_metadata
     cluster_metadata = base64.b64encode(yaml_txt.encode("utf-8")).decode("utf-8")
 
-def produce_service_order_payload(applicationName :str, version :str) -> dict:
-    service_current_iso_time = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+def _build_service_order_template() -> dict:
+    ## Static part of every service order; the per-order fields hold placeholders
     return {
         ## "id": str(uuid.uuid4()),
-        "orderDate": service_current_iso_time,
+        "orderDate": _TIME_MARKER,
         "completionDate": None,
         'expectedCompletionDate': Config.EXPECTED_COMPLETED_DATE,
         'requestedCompletionDate': Config.REQUESTED_COMPLETED_DATE,
-        "requestedStartDate": service_current_iso_time,
-        "startDate": service_current_iso_time,
+        "requestedStartDate": _TIME_MARKER,
+        "startDate": _TIME_MARKER,
         "@baseType": "BaseRootEntity",
         "state": "INITIAL",
         "@schemaLocation": None,
         "@type": "ServiceOrder",
         "href": None,
         "category": None,
-        "description": f"A service order for {applicationName} service",
+        "description": _DESCRIPTION_MARKER,
         "externalId": None,
         "notificationContact": None,
         "priority": None,
@@ -112,7 +116,7 @@ def produce_service_order_payload(applicationName :str, version :str) -> dict:
                             "name": "Service artifact identifier in service registry/repository",
                             "valueType": "TEXT",
                             "value": {
-                                "value": applicationName,
+                                "value": _APPLICATION_MARKER,
                                 "alias": None
                             }
                         },
@@ -124,7 +128,7 @@ def produce_service_order_payload(applicationName :str, version :str) -> dict:
                             "name": "Service artifact version",
                             "valueType": "TEXT",
                             "value": {
-                                "value": version,
+                                "value": _VERSION_MARKER,
                                 "alias": None
                             }
                         },
@@ -189,10 +193,143 @@ def produce_service_order_payload(applicationName :str, version :str) -> dict:
         ]
     }
 
+## Placeholders for the per-order fields; no configured value can collide with them
+_TIME_MARKER = "\x00time"
+_DESCRIPTION_MARKER = "\x00description"
+_APPLICATION_MARKER = "\x00application"
+_VERSION_MARKER = "\x00version"
+_MARKERS = (_TIME_MARKER, _DESCRIPTION_MARKER, _APPLICATION_MARKER, _VERSION_MARKER)
+
+
+class _ServiceOrderTemplate:
+    """
+    The service order skeleton for one set of config values and cluster metadata:
+    the dict itself, the paths of its per-order fields, and its JSON serialization
+    split around them.
+    """
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.document = _build_service_order_template()
+        self.marker_paths = list(_marker_paths(self.document))
+
+        serialized = jsoncodec.dumps_str(self.document)
+        encoded_markers = {jsoncodec.dumps_str(marker): marker for marker in _MARKERS}
+        pattern = re.compile("|".join(re.escape(encoded) for encoded in encoded_markers))
+        self.parts: list[bytes] = []
+        self.part_markers: list[str] = []
+        position = 0
+        for match in pattern.finditer(serialized):
+            self.parts.append(serialized[position:match.start()].encode("utf-8"))
+            self.part_markers.append(encoded_markers[match.group(0)])
+            position = match.end()
+        self.parts.append(serialized[position:].encode("utf-8"))
+
+
+def _marker_paths(node, path=()):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from _marker_paths(value, path + (key,))
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            yield from _marker_paths(value, path + (index,))
+    elif isinstance(node, str) and node in _MARKERS:
+        yield path, node
+
+
+_template: Optional[_ServiceOrderTemplate] = None
+
+
+def _template_key() -> tuple:
+    return (
+        cluster_metadata, Config.EXPECTED_COMPLETED_DATE, Config.REQUESTED_COMPLETED_DATE, Config.SERVICE_SPEC_ID,
+        Config.SERVICE_NAME, Config.HELM_REGISTRY, Config.K8S_SERVICE_ID,
+    )
+
+
+def _service_order_template() -> _ServiceOrderTemplate:
+    """The current template, rebuilt only when the cluster metadata or a config value it embeds changed."""
+    global _template
+    template = _template
+    key = _template_key()
+    if template is None or template.key != key:
+        template = _template = _ServiceOrderTemplate(key)
+    return template
+
+
+def _order_values(applicationName: str, version: str, now) -> dict:
+    return {
+        _TIME_MARKER: now,
+        _DESCRIPTION_MARKER: f"A service order for {applicationName} service",
+        _APPLICATION_MARKER: applicationName,
+        _VERSION_MARKER: version,
+    }
+
+def produce_service_order_payload(applicationName :str, version :str) -> dict:
+    """The service order as a dict of its own: the cached template is copied, then filled in."""
+    template = _service_order_template()
+    now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    values = _order_values(applicationName, version, now)
+    root = copy.deepcopy(template.document)
+    for path, marker in template.marker_paths:
+        parent = root
+        for key in path[:-1]:
+            parent = parent[key]
+        parent[path[-1]] = values[marker]
+    return root
+
+def produce_service_order_body(applicationName :str, version :str) -> bytes:
+    """The service order as compact JSON, filled straight into the pre-serialized template."""
+    template = _service_order_template()
+    ## The codec writes the datetime itself, as ISO 8601 with 'Z'
+    values = _order_values(applicationName, version, datetime.now(timezone.utc))
+    encoded = {marker: jsoncodec.dumps(value) for marker, value in values.items()}
+    chunks = [template.parts[0]]
+    for marker, part in zip(template.part_markers, template.parts[1:]):
+        chunks.append(encoded[marker])
+        chunks.append(part)
+    return b"".join(chunks)
+
+def produce_deployment_details(res: dict) -> list:
+    """One entry per service order item: its state and the service it deploys."""
+    details = []
+    for item in res.get("serviceOrderItem") or []:
+        service = item.get("service") or {}
+        details.append({
+            "orderItemId": item.get("id"),
+            "state": item.get("state"),
+            "serviceId": service.get("id"),
+            "serviceName": service.get("name"),
+            "serviceState": service.get("state"),
+        })
+    return details
+
+OCM_SERVICE_NAME = "service-spec-end-user-cfs-ocm"
+
+def ocm_service_item_id(res: dict) -> Optional[str]:
+    """Id of the OCM service deployed by a (raw) service order, if any."""
+    for order_item in res.get("serviceOrderItem") or []:
+        service = order_item.get("service") or {}
+        if service.get("name") == OCM_SERVICE_NAME:
+            return service.get("id")
+    return None
+
+def set_service_artifact(service_item: dict, applicationName: str, version: str) -> dict:
+    """Point an OCM inventory item at another chart (name and version), in place."""
+    values = {
+        "Service artifact identifier in service registry/repository": applicationName,
+        "Service artifact version": version,
+    }
+    for characteristic in service_item.get("serviceCharacteristic") or []:
+        if characteristic.get("name") in values:
+            characteristic["value"] = {**(characteristic.get("value") or {}), "value": values[characteristic["name"]]}
+    return service_item
+
 def produce_response_get_service_order_by_id(res: dict) -> dict:
     return {
         "state": res["state"],
-        "description": res["description"],
+        "description": res.get("description"),
         "serviceOrderId": res["id"],
-        "deploymentDetails": []
+        "completionDate": res.get("completionDate"),
+        "deploymentDetails": produce_deployment_details(res)
     }
@@ -0,0 +1,76 @@
+import threading
+from typing import Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.metrics import counter, histogram
+
+## Only these are retried after the request reached the server; connection errors are always retried
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+def build_session(
+    pool_size: int = 10,
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    backoff_jitter: float = 0.25,
+) -> requests.Session:
+    """
+    Build a requests.Session whose connection pool holds up to `pool_size` connections per host
+    and which retries idempotent calls with exponential backoff (backoff_factor * 2^n) plus jitter.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_jitter,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+REQUEST_SECONDS = histogram(
+    "maestro_client_request_duration_seconds", "Latency of Maestro and Keycloak calls, retries included", ["call"]
+)
+REQUESTS_TOTAL = counter("maestro_client_requests_total", "Maestro and Keycloak calls, by outcome", ["call", "outcome"])
+
+
+class CallStats:
+    """
+    Thread-safe per-call latency counters (count, errors, total and max seconds).
+    Every call is also recorded in the process-wide Prometheus metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+
+    def record(self, call: str, seconds: float, ok: bool):
+        with self._lock:
+            stats = self._stats.setdefault(
+                call, {"count": 0, "errors": 0, "totalSeconds": 0.0, "maxSeconds": 0.0}
+            )
+            stats["count"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["totalSeconds"] += seconds
+            stats["maxSeconds"] = max(stats["maxSeconds"], seconds)
+        REQUEST_SECONDS.observe(seconds, call=call)
+        REQUESTS_TOTAL.inc(call=call, outcome="success" if ok else "failure")
+
+    def snapshot(self, call: Optional[str] = None) -> dict:
+        with self._lock:
+            snapshot = {
+                name: {**stats, "avgSeconds": stats["totalSeconds"] / stats["count"]}
+                for name, stats in self._stats.items()
+            }
+        return snapshot.get(call, {}) if call else snapshot
@@ -0,0 +1,9 @@
+from .registry import (
+    Counter, Gauge, Histogram, MetricsRegistry, REGISTRY, DEFAULT_BUCKETS,
+    counter, gauge, histogram,
+)
+
+__all__ = [
+    "Counter", "Gauge", "Histogram", "MetricsRegistry", "REGISTRY", "DEFAULT_BUCKETS",
+    "counter", "gauge", "histogram",
+]
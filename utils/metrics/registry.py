@@ -0,0 +1,330 @@
+import bisect
+import glob
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+from utils import jsoncodec
+
+## Latency buckets (seconds) spanning an in-memory YAML update up to a slow helm push
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def samples(self) -> dict:
+        """Label values tuple -> current value of every series."""
+        raise NotImplementedError
+
+    def merge(self, samples: list[dict]) -> dict:
+        """The samples of several processes combined into one (sums, unless the metric says otherwise)."""
+        merged = {}
+        for process_samples in samples:
+            for key, value in process_samples.items():
+                merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+    def render_samples(self, samples: dict) -> list[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}"
+                for key, v in sorted(samples.items())]
+
+    def render(self) -> list[str]:
+        return self.render_samples(self.samples())
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(_Metric):
+    """
+    A gauge set explicitly, or read at scrape time from `collect()` (label values tuple -> value).
+    Across processes the values of live processes are summed, or with `multiprocess_mode="max"`
+    (for state every process sees alike, such as the size of the shared store) the largest is kept.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (),
+                 collect: Optional[Callable[[], dict]] = None, multiprocess_mode: str = "sum"):
+        super().__init__(name, documentation, labels)
+        if multiprocess_mode not in ("sum", "max"):
+            raise ValueError(f"Unknown multiprocess_mode '{multiprocess_mode}'")
+        self._values: dict[tuple, float] = {}
+        self._collect = collect
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> dict:
+        with self._lock:
+            values = dict(self._values)
+        if self._collect is not None:
+            for key, value in self._collect().items():
+                values[key if isinstance(key, tuple) else (key,) if self.label_names else ()] = value
+        return values
+
+    def merge(self, samples: list[dict]) -> dict:
+        if self.multiprocess_mode == "sum":
+            return super().merge(samples)
+        merged = {}
+        for process_samples in samples:
+            for key, value in process_samples.items():
+                merged[key] = max(merged.get(key, value), value)
+        return merged
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        ## label values -> [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> dict:
+        with self._lock:
+            return {key: [list(counts), total] for key, (counts, total) in self._series.items()}
+
+    def merge(self, samples: list[dict]) -> dict:
+        merged = {}
+        for process_samples in samples:
+            for key, (counts, total) in process_samples.items():
+                series = merged.get(key)
+                if series is None:
+                    merged[key] = [list(counts), total]
+                else:
+                    series[0] = [a + b for a, b in zip(series[0], counts)]
+                    series[1] += total
+        return merged
+
+    def render_samples(self, samples: dict) -> list[str]:
+        lines = []
+        for key, (counts, total) in sorted(samples.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """
+    Named metrics, rendered in the Prometheus text exposition format (0.0.4).
+
+    By default a registry only knows the metrics of its own process. After
+    `enable_multiprocess(directory)` every process sharing the directory (e.g. gunicorn workers
+    behind one port) writes its samples there every `interval` seconds, and `render()` serves the
+    metrics of all of them: counters and histograms summed over every process that ever wrote
+    (so they never go backwards when a worker exits), gauges combined over live processes only.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._directory: Optional[str] = None
+        self._path: Optional[str] = None
+        self._stopped = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            ## Re-registering the same definition (e.g. a module imported twice) returns the original
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                    raise ValueError(f"Metric {metric.name} is already registered with another definition")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def _list(self) -> list[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def enable_multiprocess(self, directory: str, interval: float = 1.0):
+        if self._writer is not None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        ## Unique per process start: a recycled pid never overwrites the counters of a dead worker
+        self._path = os.path.join(directory, f"metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+        self.write_samples()
+        self._writer = threading.Thread(target=self._write_loop, args=(interval,), name="metrics-writer", daemon=True)
+        self._writer.start()
+
+    def _write_loop(self, interval: float):
+        while not self._stopped.wait(interval):
+            try:
+                self.write_samples()
+            except Exception as e:
+                print(f"!!! Writing metrics to {self._path} failed: {e}", flush=True)
+
+    def write_samples(self, live: bool = True):
+        """Write this process's samples for the other processes; gauges only while `live`."""
+        if self._path is None:
+            return
+        document = {"pid": os.getpid(), "live": live, "metrics": {
+            metric.name: [[list(key), value] for key, value in metric.samples().items()]
+            for metric in self._list() if live or not isinstance(metric, Gauge)
+        }}
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(jsoncodec.dumps(document))
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def close(self):
+        """Stop writing; a last write keeps this process's counters and drops its gauges."""
+        self._stopped.set()
+        self.write_samples(live=False)
+
+    def _all_samples(self) -> dict[str, list[dict]]:
+        ## Metric name -> samples of each process, this one read live
+        samples = {metric.name: [metric.samples()] for metric in self._list()}
+        for path in glob.glob(os.path.join(self._directory, "metrics-*.json")):
+            if path == self._path:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    document = jsoncodec.loads(f.read())
+            except (OSError, ValueError):
+                continue
+            live = document.get("live") and _process_alive(document.get("pid", 0))
+            for name, series in document.get("metrics", {}).items():
+                metric = self._metrics.get(name)
+                if metric is None or (isinstance(metric, Gauge) and not live):
+                    continue
+                samples[name].append({tuple(key): value for key, value in series})
+        return samples
+
+    def render(self) -> str:
+        metrics = self._list()
+        all_samples = self._all_samples() if self._directory else None
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            if all_samples is None:
+                lines.extend(metric.render())
+            else:
+                lines.extend(metric.render_samples(metric.merge(all_samples[metric.name])))
+        return "\n".join(lines) + "\n"
+
+
+## Registry served at /metrics (of every worker process once enable_multiprocess() is called)
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labels))
+
+
+def gauge(name: str, documentation: str, labels: Iterable[str] = (),
+          collect: Optional[Callable[[], dict]] = None, multiprocess_mode: str = "sum") -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labels, collect, multiprocess_mode))
+
+
+def histogram(name: str, documentation: str, labels: Iterable[str] = (),
+              buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labels, buckets))
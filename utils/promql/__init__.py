@@ -0,0 +1,11 @@
+from .templates import (
+    QueryTemplate, LabelMatcher, QueryTemplateError, BUILTIN_TEMPLATES, DEFAULT_TEMPLATE,
+    escape_label_value, render_queries, compose_query, parse_template, spec_query_template,
+    iri_query_template, intent_query_template,
+)
+
+__all__ = [
+    "QueryTemplate", "LabelMatcher", "QueryTemplateError", "BUILTIN_TEMPLATES", "DEFAULT_TEMPLATE",
+    "escape_label_value", "render_queries", "compose_query", "parse_template", "spec_query_template",
+    "iri_query_template", "intent_query_template",
+]
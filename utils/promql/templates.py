@@ -0,0 +1,209 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Mapping, Optional, Union
+
+METRIC_NAME_RE = re.compile(r"^[a-zA-Z_:][a-zA-Z0-9_:]*$")
+LABEL_NAME_RE = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+DURATION_RE = re.compile(r"^([0-9]+(ms|s|m|h|d|w|y))+$")
+## "{characteristic}" in a matcher value is replaced by that characteristic of the intent target
+REFERENCE_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+AGGREGATIONS = {"sum", "avg", "min", "max", "count"}
+RANGE_FUNCTIONS = {"rate", "irate", "increase", "delta", "deriv", "avg_over_time", "max_over_time"}
+MATCH_OPERATORS = {"=", "!=", "=~", "!~"}
+
+
+class QueryTemplateError(ValueError):
+    """Raised for an invalid or unknown query template."""
+
+
+def escape_label_value(value) -> str:
+    """A PromQL double-quoted string literal holding `value`."""
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+@dataclass(frozen=True)
+class LabelMatcher:
+    label: str
+    value: str
+    op: str = "="
+
+    def resolve(self, target: Mapping) -> Optional[tuple[str, str, str]]:
+        """(label, op, value) with references substituted; None when a referenced characteristic is unset."""
+        missing = False
+
+        def substitute(match):
+            nonlocal missing
+            value = target.get(match.group(1))
+            if value is None or value == "":
+                missing = True
+                return ""
+            return str(value)
+
+        value = REFERENCE_RE.sub(substitute, self.value)
+        return None if missing else (self.label, self.op, value)
+
+
+@dataclass(frozen=True)
+class QueryTemplate:
+    """
+    How the external metric of an intent is computed from a Prometheus series:
+
+        <aggregation>(<function>(<sourceMetric>{<labelMatchers>}[<window>])) by (<groupBy>)
+
+    or, with `quantile`, histogram_quantile(q, <aggregation>(<function>(<sourceMetric>{...}[<window>])) by (le, <groupBy>)).
+    Without `function` the series is aggregated as is (gauges such as queue depth).
+    """
+    source_metric: str = "http_requests_total"
+    aggregation: str = "sum"
+    function: Optional[str] = "rate"
+    window: Optional[str] = "2m"
+    group_by: tuple = ("namespace",)
+    label_matchers: tuple = (
+        LabelMatcher("namespace", "{sourceNamespace}"),
+        LabelMatcher("job", "{sourceJob}"),
+    )
+    quantile: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "QueryTemplate":
+        """Parse and validate the `queryTemplate` object of an IntentSpecification / Intent expression."""
+        if not isinstance(data, Mapping):
+            raise QueryTemplateError("queryTemplate must be an object")
+        unknown = set(data) - {"sourceMetric", "aggregation", "function", "window", "groupBy", "labelMatchers", "quantile"}
+        if unknown:
+            raise QueryTemplateError(f"Unknown queryTemplate field(s): {', '.join(sorted(unknown))}")
+
+        for name in ("groupBy", "labelMatchers"):
+            ## A string would otherwise be taken apart into one label per character
+            if name in data and not isinstance(data[name], (list, tuple)):
+                raise QueryTemplateError(f"{name} must be an array")
+
+        defaults = cls()
+        function = data.get("function", defaults.function)
+        template = cls(
+            source_metric=data.get("sourceMetric", defaults.source_metric),
+            aggregation=data.get("aggregation", defaults.aggregation),
+            function=function,
+            window=data.get("window", defaults.window if function else None),
+            group_by=tuple(data.get("groupBy", defaults.group_by)),
+            label_matchers=tuple(
+                LabelMatcher(m.get("label"), str(m.get("value", "")), m.get("op", "="))
+                if isinstance(m, Mapping) else m
+                for m in data.get("labelMatchers", [])
+            ) if "labelMatchers" in data else defaults.label_matchers,
+            quantile=data.get("quantile"),
+        )
+        template.validate()
+        return template
+
+    def validate(self):
+        if not isinstance(self.source_metric, str) or not METRIC_NAME_RE.match(self.source_metric):
+            raise QueryTemplateError(f"Invalid sourceMetric '{self.source_metric}'")
+        if self.aggregation not in AGGREGATIONS:
+            raise QueryTemplateError(f"aggregation must be one of {sorted(AGGREGATIONS)}")
+        if self.function is not None:
+            if self.function not in RANGE_FUNCTIONS:
+                raise QueryTemplateError(f"function must be one of {sorted(RANGE_FUNCTIONS)} or null")
+            if not isinstance(self.window, str) or not DURATION_RE.match(self.window):
+                raise QueryTemplateError(f"Invalid window '{self.window}', expected a PromQL duration such as 2m")
+        for label in self.group_by:
+            if not isinstance(label, str) or not LABEL_NAME_RE.match(label):
+                raise QueryTemplateError(f"Invalid groupBy label '{label}'")
+        for matcher in self.label_matchers:
+            if not isinstance(matcher, LabelMatcher) or not isinstance(matcher.label, str) \
+                    or not LABEL_NAME_RE.match(matcher.label):
+                raise QueryTemplateError(f"Invalid label matcher {matcher}")
+            if matcher.op not in MATCH_OPERATORS:
+                raise QueryTemplateError(f"Label matcher operator must be one of {sorted(MATCH_OPERATORS)}")
+        if self.quantile is not None:
+            if isinstance(self.quantile, bool) or not isinstance(self.quantile, (int, float)) \
+                    or not 0 <= self.quantile <= 1:
+                raise QueryTemplateError("quantile must be a number between 0 and 1")
+            if self.function is None:
+                raise QueryTemplateError("quantile requires a range function such as rate")
+
+    def render(self, target: Mapping) -> tuple[str, str]:
+        """(seriesQuery, metricsQuery) for an intent target."""
+        matchers = tuple(
+            resolved for resolved in (m.resolve(target) for m in self.label_matchers) if resolved is not None
+        )
+        return render_queries(self, matchers)
+
+
+@lru_cache(maxsize=4096)
+def render_queries(template: QueryTemplate, matchers: tuple) -> tuple[str, str]:
+    """Rendered queries, cached per (template, resolved label set)."""
+    selector_labels = ",".join(f"{label}{op}{escape_label_value(value)}" for label, op, value in matchers)
+    selector = f"{template.source_metric}{{{selector_labels}}}" if selector_labels else template.source_metric
+    return selector, compose_query(template, selector)
+
+
+def compose_query(template: QueryTemplate, selector: str) -> str:
+    """The metrics query of `template` applied to a series selector."""
+    expression = f"{template.function}({selector}[{template.window}])" if template.function else selector
+    group_by = template.group_by
+    if template.quantile is not None:
+        group_by = ("le",) + tuple(label for label in group_by if label != "le")
+    aggregated = f"{template.aggregation}({expression})"
+    if group_by:
+        aggregated += f" by ({','.join(group_by)})"
+    if template.quantile is not None:
+        aggregated = f"histogram_quantile({template.quantile}, {aggregated})"
+    return aggregated
+
+
+## Named templates an IntentSpecification can reference with `queryTemplateRef`
+BUILTIN_TEMPLATES = {
+    "http_request_rate": QueryTemplate(),
+    "http_latency_p95": QueryTemplate(
+        source_metric="http_request_duration_seconds_bucket", window="5m", quantile=0.95
+    ),
+    "queue_depth": QueryTemplate(source_metric="queue_depth", aggregation="avg", function=None, window=None),
+}
+DEFAULT_TEMPLATE = BUILTIN_TEMPLATES["http_request_rate"]
+
+
+def parse_template(source: Union[str, Mapping, None]) -> Optional[QueryTemplate]:
+    """A template from a built-in name or an inline object; None when there is no source."""
+    if source is None:
+        return None
+    if isinstance(source, str):
+        try:
+            return BUILTIN_TEMPLATES[source]
+        except KeyError:
+            raise QueryTemplateError(
+                f"Unknown query template '{source}', expected one of {sorted(BUILTIN_TEMPLATES)}"
+            ) from None
+    return QueryTemplate.from_dict(source)
+
+
+def spec_query_template(spec: Optional[Mapping]) -> Optional[QueryTemplate]:
+    """The template an IntentSpecification declares in `expressionSpecification` (queryTemplate or queryTemplateRef)."""
+    expression_spec = (spec or {}).get("expressionSpecification") or {}
+    if "queryTemplate" in expression_spec:
+        return parse_template(expression_spec["queryTemplate"])
+    return parse_template(expression_spec.get("queryTemplateRef"))
+
+
+def iri_query_template(iri: Optional[str]) -> Optional[QueryTemplate]:
+    """A built-in template named by the fragment of an expression IRI (e.g. http://example.org/metrics/x#queue_depth)."""
+    _, _, fragment = (iri or "").partition("#")
+    return BUILTIN_TEMPLATES.get(fragment)
+
+
+def intent_query_template(intent: Mapping, spec: Optional[Mapping] = None) -> QueryTemplate:
+    """
+    The template for an intent: its own `expression.queryTemplate` (object or built-in name),
+    else a built-in named by the `expression.iri` fragment, else its IntentSpecification's,
+    else the default HTTP request rate.
+    """
+    expression = intent.get("expression") or {}
+    return (
+        parse_template(expression.get("queryTemplate"))
+        or iri_query_template(expression.get("iri"))
+        or spec_query_template(spec)
+        or DEFAULT_TEMPLATE
+    )
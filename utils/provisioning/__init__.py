@@ -0,0 +1,8 @@
+from .jobs import ProvisioningJob, ProvisioningJobRunner, JobQueueFullError, observe_stage
+from .tracker import ServiceOrderTracker, order_lifecycle_status, TERMINAL_ORDER_STATES
+from .coalesce import Coalescer
+
+__all__ = [
+    "ProvisioningJob", "ProvisioningJobRunner", "JobQueueFullError", "observe_stage",
+    "ServiceOrderTracker", "order_lifecycle_status", "TERMINAL_ORDER_STATES", "Coalescer",
+]
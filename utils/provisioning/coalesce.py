@@ -0,0 +1,44 @@
+import threading
+from typing import Any, Callable, ContextManager
+
+
+class Coalescer:
+    """
+    Runs `fn(key)` on behalf of callers asking for the same key, merging the requests that
+    arrive while a run is in progress: a caller returns the outcome of the first run that
+    started after its request. N concurrent requests for one key cost at most two runs.
+
+    Runs for one key are serialized by `lock_for(key)` (e.g. a FileLockSet, to also
+    serialize worker processes); different keys run in parallel.
+    """
+
+    def __init__(self, lock_for: Callable[[str], ContextManager]):
+        self._lock_for = lock_for
+        self._lock = threading.Lock()
+        self._requested: dict[str, int] = {}
+        ## key -> (last request served, result, error) of the latest run
+        self._done: dict[str, tuple] = {}
+
+    def run(self, key: str, fn: Callable[[str], Any]) -> Any:
+        with self._lock:
+            requested = self._requested[key] = self._requested.get(key, 0) + 1
+
+        with self._lock_for(key):
+            with self._lock:
+                done = self._done.get(key)
+                if done is None or done[0] < requested:
+                    done = None
+                    ## Every request made so far is served by the run starting now
+                    serving = self._requested[key]
+            if done is None:
+                try:
+                    done = (serving, fn(key), None)
+                except Exception as e:
+                    done = (serving, None, e)
+                with self._lock:
+                    self._done[key] = done
+
+        _, result, error = done
+        if error is not None:
+            raise error
+        return result
@@ -0,0 +1,239 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from utils.metrics import counter, histogram
+
+STAGE_SECONDS = histogram(
+    "tmf_intent_stage_duration_seconds", "Duration of each intent admission/provisioning stage", ["stage"]
+)
+STAGE_TOTAL = counter(
+    "tmf_intent_stage_total", "Intent admission/provisioning stages run, by outcome", ["stage", "outcome"]
+)
+JOBS_TOTAL = counter("tmf_provisioning_jobs_total", "Provisioning jobs finished, by final state", ["state"])
+
+
+def _now() -> datetime:
+    ## Kept as a datetime: the JSON codec writes it as ISO 8601 '...Z' when the job is served
+    return datetime.now(timezone.utc)
+
+
+@contextmanager
+def observe_stage(name: str):
+    """Record the latency and outcome of a stage in the stage metrics."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+        STAGE_TOTAL.inc(stage=name, outcome="failure")
+        raise
+    STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+    STAGE_TOTAL.inc(stage=name, outcome="success")
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the provisioning backlog has reached its configured bound."""
+
+
+class ProvisioningJob:
+    """
+    Progress record for the provisioning pipeline of a single intent.
+
+    The job moves through pending -> running -> completed | failed and keeps
+    one entry per stage, so callers can poll exactly where an intent is.
+    `on_change`, when set, is called after the job is registered, each time a
+    stage starts and once the job is finished.
+    """
+
+    def __init__(self, intent_id: str, stages: list[str]):
+        self.id = str(uuid.uuid4())
+        self.intent_id = intent_id
+        self.state = "pending"
+        self.creation_date = _now()
+        self.update_date = self.creation_date
+        self.completion_date: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.stages = {
+            name: {"name": name, "state": "pending", "startDate": None, "endDate": None, "error": None}
+            for name in stages
+        }
+        self.on_change: Optional[Callable[["ProvisioningJob"], None]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("pending", "running")
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mark a stage as running for the duration of the block."""
+        with self._lock:
+            self.state = "running"
+            self.update_date = _now()
+            self.stages[name].update({"state": "running", "startDate": self.update_date})
+        self._changed()
+        try:
+            with observe_stage(name):
+                yield
+        except Exception as e:
+            with self._lock:
+                self.stages[name].update({"state": "failed", "endDate": _now(), "error": str(e)})
+            raise
+        with self._lock:
+            self.stages[name].update({"state": "completed", "endDate": _now()})
+
+    def annotate(self, name: str, **fields):
+        """Attach extra details (e.g. cacheHit) to a stage."""
+        with self._lock:
+            self.stages[name].update(fields)
+
+    def finish(self, error: Optional[Exception] = None):
+        with self._lock:
+            self.state = "failed" if error else "completed"
+            self.error = str(error) if error else None
+            self.completion_date = self.update_date = _now()
+        JOBS_TOTAL.inc(state=self.state)
+        self._changed()
+
+    @property
+    def failed_stage(self) -> Optional[str]:
+        for name, stage in self.stages.items():
+            if stage["state"] == "failed":
+                return name
+        return None
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "intentId": self.intent_id,
+                "state": self.state,
+                "creationDate": self.creation_date,
+                "completionDate": self.completion_date,
+                "lastUpdate": self.update_date,
+                "error": self.error,
+                "stages": [dict(stage) for stage in self.stages.values()],
+            }
+
+
+class ProvisioningJobRunner:
+    """
+    Bounded background worker pool executing provisioning jobs.
+
+    At most `max_workers` jobs run at the same time and at most `max_pending`
+    jobs may be queued or running; beyond that `submit` raises JobQueueFullError.
+
+    Finished jobs stay available to `get` for `finished_ttl` seconds, and only
+    the `max_finished` most recent ones are kept. `on_change` is installed on
+    every job the runner registers (see ProvisioningJob); an error it raises is
+    logged and does not affect the job.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100, finished_ttl: float = 3600.0,
+                 max_finished: int = 1000, on_change: Optional[Callable[[ProvisioningJob], None]] = None):
+        self.max_pending = max_pending
+        self.finished_ttl = finished_ttl
+        self.max_finished = max_finished
+        self.on_change = on_change
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="provisioning")
+        self._jobs: dict[str, ProvisioningJob] = {}
+        ## Intent id -> (monotonic finish time, job), oldest first
+        self._finished: OrderedDict[str, tuple[float, ProvisioningJob]] = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, job: ProvisioningJob, fn: Callable[[ProvisioningJob], None]) -> ProvisioningJob:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFullError(
+                    f"Provisioning queue is full ({self.max_pending} jobs pending)"
+                )
+            self._pending += 1
+            self._register(job)
+        self._job_changed(job)
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def track(self, job: ProvisioningJob) -> ProvisioningJob:
+        """Register a job that is executed outside the pool, so it can still be looked up."""
+        if self._jobs.get(job.intent_id) is job:
+            return job
+        with self._lock:
+            self._register(job)
+        self._job_changed(job)
+        return job
+
+    def _register(self, job: ProvisioningJob):
+        self._prune()
+        self._jobs[job.intent_id] = job
+        job.on_change = self._job_changed
+
+    def _job_changed(self, job: ProvisioningJob):
+        if self.on_change is not None:
+            try:
+                self.on_change(job)
+            except Exception as e:
+                print(f"!!! Recording provisioning job of intent '{job.intent_id}' failed: {e}", flush=True)
+        if job.active:
+            return
+        with self._lock:
+            self._finished.pop(job.intent_id, None)
+            self._finished[job.intent_id] = (time.monotonic(), job)
+            self._prune()
+
+    def _prune(self):
+        """Drop finished jobs past their TTL or beyond `max_finished` (caller holds the lock)."""
+        expired = time.monotonic() - self.finished_ttl
+        while self._finished:
+            intent_id, (finished, job) = next(iter(self._finished.items()))
+            if finished > expired and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[intent_id]
+            if self._jobs.get(intent_id) is job:
+                del self._jobs[intent_id]
+
+    def run_inline(self, job: ProvisioningJob, fn: Callable[[ProvisioningJob], None]) -> ProvisioningJob:
+        """Run a job on the calling thread (synchronous and batch modes)."""
+        self.track(job)
+        self._execute(job, fn)
+        return job
+
+    def _run(self, job: ProvisioningJob, fn: Callable[[ProvisioningJob], None]):
+        try:
+            self._execute(job, fn)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @staticmethod
+    def _execute(job: ProvisioningJob, fn: Callable[[ProvisioningJob], None]):
+        try:
+            fn(job)
+        except Exception as e:
+            print(f"!!! Provisioning of intent '{job.intent_id}' failed: {e}", flush=True)
+            job.finish(e)
+        else:
+            job.finish()
+
+    def get(self, intent_id: str) -> Optional[ProvisioningJob]:
+        return self._jobs.get(intent_id)
+
+    def forget(self, intent_id: str):
+        with self._lock:
+            self._jobs.pop(intent_id, None)
+            self._finished.pop(intent_id, None)
+
+    def queue_depth(self) -> int:
+        return self._pending
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,195 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+## TMF641 ServiceOrder state (compared lower-cased) -> Intent lifecycleStatus
+ORDER_STATE_TO_LIFECYCLE = {
+    "initial": "ORDERED",
+    "acknowledged": "ORDERED",
+    "pending": "ORDERED",
+    "held": "ORDERED",
+    "inprogress": "DEPLOYING",
+    "assessingcancellation": "CANCELLING",
+    "pendingcancellation": "CANCELLING",
+    "completed": "DEPLOYED",
+    "partial": "FAILED",
+    "failed": "FAILED",
+    "rejected": "FAILED",
+    "cancelled": "CANCELLED",
+}
+
+## Orders in these states never change again and are no longer polled
+TERMINAL_ORDER_STATES = {"completed", "partial", "failed", "rejected", "cancelled"}
+
+
+def order_lifecycle_status(state: Optional[str]) -> Optional[str]:
+    return ORDER_STATE_TO_LIFECYCLE.get((state or "").lower())
+
+
+class _TrackedOrder:
+    def __init__(self, order_id: str, intent_id: str, interval: float):
+        self.order_id = order_id
+        self.intent_id = intent_id
+        self.interval = interval
+        self.state: Optional[str] = None
+        self.errors = 0
+
+
+class ServiceOrderTracker:
+    """
+    Polls outstanding service orders in the background and reports state changes.
+
+    Every order has its own interval: it starts at `initial_interval`, is multiplied by
+    `backoff` after each poll that saw no change (or failed) up to `max_interval`, and is
+    reset when the state moves. At most `max_concurrency` polls are in flight at once.
+    `on_change(intent_id, order)` is called with the `fetch(order_id)` result whenever the
+    state differs from the previous poll; orders are dropped once in a terminal state.
+
+    An order is also dropped when a fetch error satisfies `is_gone(error)` (the order no longer
+    exists), or after `max_errors` consecutive failed polls (0: never); `on_lost(intent_id,
+    order_id, error, gone)` is then called with the last error.
+    The polling thread is only started by the first `track()`.
+    """
+
+    def __init__(self, fetch: Callable[[str], dict], on_change: Callable[[str, dict], None],
+                 initial_interval: float = 2.0, max_interval: float = 60.0, backoff: float = 2.0,
+                 max_concurrency: int = 4, max_errors: int = 0,
+                 is_gone: Callable[[Exception], bool] = lambda error: False,
+                 on_lost: Optional[Callable[[str, str, Exception, bool], None]] = None):
+        self.fetch = fetch
+        self.on_change = on_change
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self.max_errors = max_errors
+        self.is_gone = is_gone
+        self.on_lost = on_lost
+        self._orders: dict[str, _TrackedOrder] = {}
+        self._due: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def track(self, order_id: str, intent_id: str, state: Optional[str] = None):
+        """Start polling an order; `state` is the last known one, if any."""
+        with self._cond:
+            if self._stopped or order_id in self._orders:
+                return
+            tracked = _TrackedOrder(order_id, intent_id, self.initial_interval)
+            tracked.state = state
+            self._orders[order_id] = tracked
+            self._schedule(tracked)
+            self._ensure_started()
+
+    def untrack(self, order_id: str):
+        with self._cond:
+            self._orders.pop(order_id, None)
+
+    def tracked(self) -> dict[str, str]:
+        """Order id -> intent id of every order still being polled."""
+        with self._cond:
+            return {order_id: t.intent_id for order_id, t in self._orders.items()}
+
+    def __len__(self):
+        return len(self._orders)
+
+    def _schedule(self, tracked: _TrackedOrder):
+        heapq.heappush(self._due, (time.monotonic() + tracked.interval, next(self._seq), tracked.order_id))
+        self._cond.notify()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="order-poll")
+        self._thread = threading.Thread(target=self._loop, name="order-tracker", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._due and self._in_flight < self.max_concurrency:
+                        delay = self._due[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                if self._stopped:
+                    return
+                _, _, order_id = heapq.heappop(self._due)
+                tracked = self._orders.get(order_id)
+                if tracked is None:
+                    continue
+                self._in_flight += 1
+            try:
+                self._executor.submit(self._poll, tracked)
+            except RuntimeError:
+                ## shutdown() raced with this submit
+                return
+
+    def _poll(self, tracked: _TrackedOrder):
+        try:
+            order = self.fetch(tracked.order_id)
+        except Exception as e:
+            tracked.errors += 1
+            print(f"!!! Polling service order {tracked.order_id} failed ({tracked.errors}x): {e}", flush=True)
+            gone = self.is_gone(e)
+            if gone or (self.max_errors and tracked.errors >= self.max_errors):
+                self._drop(tracked)
+                if self.on_lost is not None:
+                    try:
+                        self.on_lost(tracked.intent_id, tracked.order_id, e, gone)
+                    except Exception as lost_error:
+                        print(f"!!! Giving up on service order {tracked.order_id} failed: {lost_error}", flush=True)
+                return
+            self._reschedule(tracked, changed=False)
+            return
+
+        state = order.get("state")
+        changed = state != tracked.state
+        if changed:
+            tracked.state = state
+            try:
+                self.on_change(tracked.intent_id, order)
+            except Exception as e:
+                print(f"!!! Applying service order {tracked.order_id} state '{state}' failed: {e}", flush=True)
+        tracked.errors = 0
+
+        if (state or "").lower() in TERMINAL_ORDER_STATES:
+            self._drop(tracked)
+            return
+        self._reschedule(tracked, changed)
+
+    def _drop(self, tracked: _TrackedOrder):
+        with self._cond:
+            if self._orders.get(tracked.order_id) is tracked:
+                del self._orders[tracked.order_id]
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def _reschedule(self, tracked: _TrackedOrder, changed: bool):
+        with self._cond:
+            self._in_flight -= 1
+            if changed:
+                tracked.interval = self.initial_interval
+            else:
+                tracked.interval = min(tracked.interval * self.backoff, self.max_interval)
+            if self._orders.get(tracked.order_id) is tracked:
+                self._schedule(tracked)
+            else:
+                self._cond.notify()
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
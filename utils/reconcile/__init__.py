@@ -0,0 +1,4 @@
+from .reconciler import Reconciler, Observation, Drift
+from .ratelimit import RateLimiter
+
+__all__ = ["Reconciler", "Observation", "Drift", "RateLimiter"]
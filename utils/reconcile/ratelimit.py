@@ -0,0 +1,34 @@
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Token bucket shared by threads: on average at most `rate` calls per second, in bursts of up
+    to `burst` (default: one second's worth). `acquire(n)` blocks until n calls are allowed; a cost
+    larger than the bucket is granted at once and paid back before the next caller goes through.
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = max(1.0, rate if burst is None else burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take `tokens` from the bucket, sleeping as long as needed. Returns the seconds waited."""
+        if self.rate <= 0 or tokens <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            ## Take the tokens right away (possibly into debt), so later callers queue up behind us
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
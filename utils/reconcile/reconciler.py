@@ -0,0 +1,171 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, ContextManager, Hashable, Iterable, Optional
+from utils.metrics import counter, histogram
+from .ratelimit import RateLimiter
+
+RUNS_TOTAL = counter("tmf_reconcile_runs_total", "Reconciliation runs, by mode", ["mode"])
+RUN_SECONDS = histogram("tmf_reconcile_duration_seconds", "Duration of reconciliation runs", ["mode"])
+DRIFT_TOTAL = counter("tmf_reconcile_drift_total", "Drifted items found by repairing runs, by kind", ["kind"])
+REPAIRS_TOTAL = counter("tmf_reconcile_repairs_total", "Drift repairs, by kind and outcome", ["kind", "outcome"])
+
+
+@dataclass
+class Drift:
+    """One difference between desired and actual state, and the action bringing them back in line."""
+    kind: str
+    key: str
+    detail: str
+    repair: Optional[Callable[[], None]] = None
+    ## Maestro calls the repair makes (taken from the rate limiter before it runs)
+    cost: int = 0
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "key": self.key, "detail": self.detail}
+
+
+@dataclass
+class Observation:
+    """
+    An item to reconcile. `fingerprint` is cheap to compute and changes whenever anything the
+    item's state depends on changes (store generations, file stamps, content hashes); `inspect()`
+    does the actual comparison, making `cost` Maestro calls, and returns the drift found.
+    """
+    key: str
+    fingerprint: Hashable
+    inspect: Callable[[], Iterable[Drift]]
+    cost: int = 0
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Reconciler:
+    """
+    Compares desired with actual state and repairs the difference (drift).
+
+    `observe()` yields one Observation per item. An item whose fingerprint is the one it had when
+    it was last found in sync is skipped, so a run only inspects what changed since the previous
+    one; every `full_interval` seconds every item is inspected again, since state can also drift
+    outside what a fingerprint covers (e.g. in Maestro). Inspections and repairs take their
+    Maestro calls from `rate_limiter`.
+
+    `run(dry_run=True)` only reports the drift. Otherwise each drift is repaired in turn, under
+    `lock` when given (e.g. a FileLock, so that worker processes never repair at the same time);
+    a failed repair is reported and retried by the next run. `start(interval)` runs it in the
+    background, right away and then every `interval` seconds.
+    """
+
+    def __init__(self, observe: Callable[[], Iterable[Observation]], rate_limiter: Optional[RateLimiter] = None,
+                 full_interval: float = 3600.0, lock: Optional[ContextManager] = None):
+        self.observe = observe
+        self.rate_limiter = rate_limiter or RateLimiter(0)
+        self.full_interval = full_interval
+        self.lock = lock
+        self.last_report: Optional[dict] = None
+        ## Item key -> fingerprint it had when last found in sync
+        self._in_sync: dict[str, Hashable] = {}
+        self._last_full: Optional[float] = None
+        self._run_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self, dry_run: bool = False, full: bool = False) -> dict:
+        if dry_run or self.lock is None:
+            return self._run(dry_run, full)
+        with self.lock:
+            return self._run(dry_run, full)
+
+    def _run(self, dry_run: bool, full: bool) -> dict:
+        mode = "dryRun" if dry_run else "repair"
+        with self._run_lock:
+            started = time.monotonic()
+            start_date = _now()
+            full = full or self._last_full is None or started - self._last_full >= self.full_interval
+            seen = set()
+            drift, errors = [], []
+            inspected = skipped = repaired = 0
+
+            for observation in self.observe():
+                seen.add(observation.key)
+                if not full and self._in_sync.get(observation.key) == observation.fingerprint:
+                    skipped += 1
+                    continue
+                inspected += 1
+                self.rate_limiter.acquire(observation.cost)
+                try:
+                    found = list(observation.inspect())
+                except Exception as e:
+                    errors.append({"key": observation.key, "error": str(e)})
+                    continue
+                if not found:
+                    self._in_sync[observation.key] = observation.fingerprint
+                    continue
+                ## Inspected again next run, whether the repair works or not
+                self._in_sync.pop(observation.key, None)
+                for item in found:
+                    entry = item.to_dict()
+                    drift.append(entry)
+                    if dry_run:
+                        continue
+                    DRIFT_TOTAL.inc(kind=item.kind)
+                    if item.repair is None:
+                        continue
+                    self.rate_limiter.acquire(item.cost)
+                    try:
+                        item.repair()
+                    except Exception as e:
+                        entry["repaired"] = False
+                        entry["error"] = str(e)
+                        REPAIRS_TOTAL.inc(kind=item.kind, outcome="failure")
+                        print(f"!!! Reconciliation of '{item.key}' ({item.kind}) failed: {e}", flush=True)
+                    else:
+                        entry["repaired"] = True
+                        repaired += 1
+                        REPAIRS_TOTAL.inc(kind=item.kind, outcome="success")
+
+            for key in self._in_sync.keys() - seen:
+                del self._in_sync[key]
+            if full:
+                self._last_full = started
+            duration = time.monotonic() - started
+            RUNS_TOTAL.inc(mode=mode)
+            RUN_SECONDS.observe(duration, mode=mode)
+
+            report = {
+                "dryRun": dry_run,
+                "full": full,
+                "startDate": start_date,
+                "durationSeconds": round(duration, 3),
+                "items": len(seen),
+                "inspected": inspected,
+                "skipped": skipped,
+                "drift": drift,
+                "repaired": repaired,
+                "errors": errors,
+            }
+            self.last_report = report
+            if drift or errors:
+                print(f"Reconciliation ({mode}): {len(drift)} drifted, {repaired} repaired, "
+                      f"{len(errors)} error(s), {inspected}/{len(seen)} item(s) inspected", flush=True)
+            return report
+
+    def start(self, interval: float):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, args=(interval,), name="reconciler", daemon=True)
+        self._thread.start()
+
+    def _loop(self, interval: float):
+        while not self._stopped.is_set():
+            try:
+                self.run()
+            except Exception as e:
+                print(f"!!! Reconciliation run failed: {e}", flush=True)
+            self._stopped.wait(interval)
+
+    def stop(self):
+        self._stopped.set()
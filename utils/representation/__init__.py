@@ -0,0 +1,3 @@
+from .cache import RepresentationCache
+
+__all__ = ["RepresentationCache"]
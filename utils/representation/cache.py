@@ -0,0 +1,44 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class RepresentationCache:
+    """
+    Bounded LRU cache of serialized responses. Every entry is tagged with the store
+    version it was rendered from, so a lookup with a newer version is a miss and
+    writes never have to invalidate anything explicitly.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[int, bytes, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[tuple[bytes, dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: Hashable, version: int, body: bytes, headers: Optional[dict] = None):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, body, dict(headers or {}))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,6 @@
+from .base import IntentStore, INTENT_FILTERS, intent_index_keys, page
+from .memory import DictIntentStore
+from .sqlite import SQLiteIntentStore
+from .factory import create_store
+
+__all__ = ["IntentStore", "INTENT_FILTERS", "intent_index_keys", "page", "DictIntentStore", "SQLiteIntentStore", "create_store"]
@@ -0,0 +1,109 @@
+from itertools import islice
+from typing import Mapping, MutableMapping, Optional
+
+## Intent attributes that can be used to filter intents, and their secondary indexes
+INTENT_FILTERS = ("spec_id", "namespace", "deployment", "metric", "lifecycle_status", "chart_group")
+
+
+def intent_index_keys(intent: dict) -> dict:
+    """The indexed attributes of an intent, keyed by filter name."""
+    target = intent.get("target") or {}
+    return {
+        "spec_id": (intent.get("intentSpecification") or {}).get("id"),
+        "namespace": target.get("namespace"),
+        "deployment": target.get("deploymentName"),
+        "metric": target.get("metric"),
+        "lifecycle_status": intent.get("lifecycleStatus"),
+        "chart_group": intent.get("chartGroup"),
+    }
+
+
+def page(collection: Mapping, offset: int = 0, limit: Optional[int] = None) -> tuple[list, int]:
+    """
+    Return (values[offset:offset + limit], total count) of a store collection,
+    using the backend's native paging when it provides one.
+    """
+    native = getattr(collection, "page", None)
+    if native is not None:
+        return native(offset, limit)
+    stop = None if limit is None else offset + limit
+    return list(islice(collection.values(), offset, stop)), len(collection)
+
+
+class IntentStore:
+    """
+    Storage backend for IntentSpecifications, Intents and the service order -> intent mapping.
+
+    Each collection is exposed as a MutableMapping (`specs`, `intents`, `service_orders`, `idempotency`),
+    so callers read and write it like a dict; backends persist every assignment and deletion
+    as it happens. Stored documents are replaced, never mutated in place: write the updated
+    dict back to persist a change.
+    """
+
+    specs: MutableMapping[str, dict]
+    intents: MutableMapping[str, dict]
+    service_orders: MutableMapping[str, str]
+    ## Idempotency-Key -> request fingerprint and final response (see utils.idempotency);
+    ## every record carries its expiry time as `expiresAt` (seconds since the epoch)
+    idempotency: MutableMapping[str, dict]
+
+    ## `specs` and `intents` also provide version(key=None): a counter bumped on every write to
+    ## that document (or, without key, to the collection). Together with `epoch`, which identifies
+    ## the store instance, it lets callers cache representations and build ETags.
+    ## versioned_items() lists (key, version, document) of the whole collection in one read.
+    epoch: str
+
+    def find_intents(self, offset: int = 0, limit: Optional[int] = None, **filters) -> tuple[list[dict], int]:
+        """
+        Intents matching every given filter (see INTENT_FILTERS), in insertion order,
+        as (page, total matching). Backends answer this from their secondary indexes.
+        """
+        unknown = set(filters) - set(INTENT_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown intent filter(s): {', '.join(sorted(unknown))}")
+        filters = {key: value for key, value in filters.items() if value is not None}
+        matches = [
+            intent for intent in self.intents.values()
+            if all(intent_index_keys(intent)[key] == value for key, value in filters.items())
+        ]
+        stop = None if limit is None else offset + limit
+        return matches[offset:stop], len(matches)
+
+    def intents_for_spec(self, spec_id: str) -> list[dict]:
+        return self.find_intents(spec_id=spec_id)[0]
+
+    def conflicting_intents(self, intent: dict) -> list[dict]:
+        """
+        Other intents that would fight with this one: those scaling the same Deployment,
+        or claiming the same external metric name.
+        """
+        keys = intent_index_keys(intent)
+        conflicts = {}
+        if keys["namespace"] and keys["deployment"]:
+            for other in self.find_intents(namespace=keys["namespace"], deployment=keys["deployment"])[0]:
+                conflicts[other["id"]] = other
+        if keys["metric"]:
+            for other in self.find_intents(metric=keys["metric"])[0]:
+                conflicts[other["id"]] = other
+        conflicts.pop(intent.get("id"), None)
+        return list(conflicts.values())
+
+    def service_order_for_intent(self, intent_id: str) -> Optional[str]:
+        for service_order_id, mapped_intent_id in self.service_orders.items():
+            if mapped_intent_id == intent_id:
+                return service_order_id
+        return None
+
+    def claim_idempotency_key(self, key: str, record: dict) -> Optional[dict]:
+        """
+        Store `record` under `key` unless a live (unexpired) record is there already, atomically.
+        Returns None when claimed, otherwise the existing record.
+        """
+        raise NotImplementedError
+
+    def purge_idempotency_keys(self, now: float, max_entries: int) -> int:
+        """Drop expired idempotency records, then the oldest ones beyond `max_entries`; returns the count."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
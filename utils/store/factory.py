@@ -0,0 +1,34 @@
+import os
+from typing import Optional
+from utils.locking import FileLock
+from .base import IntentStore
+from .memory import DictIntentStore
+from .sqlite import SQLiteIntentStore
+
+
+def create_store(backend: str, path: Optional[str] = None, legacy_json_path: Optional[str] = None) -> IntentStore:
+    """
+    Build the configured store backend: 'memory' (plain dicts) or 'sqlite'.
+    A legacy JSON dump is imported into an empty SQLite database on first start.
+    """
+    if backend == "memory":
+        store = DictIntentStore()
+        if legacy_json_path:
+            store.load(legacy_json_path)
+        return store
+
+    if backend == "sqlite":
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        ## Worker processes start together: only the first one creates the schema and imports
+        with FileLock(path + ".lock"):
+            store = SQLiteIntentStore(path)
+            if legacy_json_path and os.path.exists(legacy_json_path) and not len(store.specs) and not len(store.intents):
+                legacy = DictIntentStore()
+                legacy.load(legacy_json_path)
+                store.import_from(legacy)
+                print(f"Imported {len(legacy.specs)} specs and {len(legacy.intents)} intents from {legacy_json_path}")
+        return store
+
+    raise ValueError(f"Unknown STORE_BACKEND '{backend}', expected 'memory' or 'sqlite'")
@@ -0,0 +1,227 @@
+import itertools
+import os
+import threading
+import time
+import uuid
+from typing import Iterator, MutableMapping, Optional
+from utils import jsoncodec
+from .base import IntentStore, INTENT_FILTERS, intent_index_keys
+
+
+class _Versioned:
+    """
+    Version counters for a collection and for each of its documents,
+    bumped on every assignment and deletion.
+    """
+
+    def _init_versions(self):
+        self._versions: dict[Optional[str], int] = {}
+        self._versions_lock = threading.Lock()
+
+    def _bump(self, key: str):
+        with self._versions_lock:
+            self._versions[None] = self._versions.get(None, 0) + 1
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def version(self, key: Optional[str] = None) -> int:
+        return self._versions.get(key, 0)
+
+    def versioned_items(self) -> list[tuple[str, int, dict]]:
+        ## Versions are read first: a document is never paired with a newer version than its own
+        with self._versions_lock:
+            versions = dict(self._versions)
+        return [(key, versions.get(key, 0), value) for key, value in list(self.items())]
+
+
+class _VersionedDict(_Versioned, dict):
+    """dict that versions its documents (used for IntentSpecifications)."""
+
+    def __init__(self):
+        super().__init__()
+        self._init_versions()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._bump(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._bump(key)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        value = super().pop(key)
+        self._bump(key)
+        return value
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+
+class _IndexedIntents(_Versioned, MutableMapping):
+    """
+    dict of intents that keeps one secondary index per filter (value -> intent ids)
+    in sync on every assignment and deletion.
+    """
+
+    def __init__(self):
+        self._data: dict[str, dict] = {}
+        self._seq: dict[str, int] = {}
+        self._counter = itertools.count()
+        self.indexes: dict[str, dict[str, set]] = {name: {} for name in INTENT_FILTERS}
+        self._lock = threading.RLock()
+        self._init_versions()
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._unindex(key, self._data[key])
+            else:
+                self._seq[key] = next(self._counter)
+            self._data[key] = value
+            for name, index_value in intent_index_keys(value).items():
+                if index_value is not None:
+                    self.indexes[name].setdefault(index_value, set()).add(key)
+            ## Bumped last: a reader seeing the new version also sees the new document
+            self._bump(key)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._unindex(key, self._data.pop(key))
+            del self._seq[key]
+            self._bump(key)
+
+    def _unindex(self, key, value):
+        for name, index_value in intent_index_keys(value).items():
+            ids = self.indexes[name].get(index_value)
+            if ids is not None:
+                ids.discard(key)
+                if not ids:
+                    del self.indexes[name][index_value]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+    def ids_matching(self, filters: dict) -> list[str]:
+        """Ids matching every filter, in insertion order, from the smallest index set up."""
+        with self._lock:
+            id_sets = sorted((self.indexes[name].get(value, set()) for name, value in filters.items()), key=len)
+            ids = set(id_sets[0]).intersection(*id_sets[1:])
+            return sorted(ids, key=self._seq.__getitem__)
+
+
+class _ServiceOrders(MutableMapping):
+    """service order id -> intent id, with the reverse intent id -> service order ids index."""
+
+    def __init__(self):
+        self._data: dict[str, str] = {}
+        self.by_intent: dict[str, set] = {}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key in self._data:
+                del self[key]
+            self._data[key] = value
+            self.by_intent.setdefault(value, set()).add(key)
+
+    def __delitem__(self, key):
+        with self._lock:
+            intent_id = self._data.pop(key)
+            ids = self.by_intent[intent_id]
+            ids.discard(key)
+            if not ids:
+                del self.by_intent[intent_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DictIntentStore(IntentStore):
+    """
+    Plain in-process dicts. Nothing survives a restart unless `dump`/`load` are used
+    with a JSON file; meant for tests and single-process development.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.specs = _VersionedDict()
+        self.intents = _IndexedIntents()
+        self.service_orders = _ServiceOrders()
+        ## Insertion ordered, so the oldest records are evicted first
+        self.idempotency: dict[str, dict] = {}
+        self._idempotency_lock = threading.Lock()
+
+    def find_intents(self, offset: int = 0, limit: Optional[int] = None, **filters) -> tuple[list[dict], int]:
+        filters = {key: value for key, value in filters.items() if value is not None}
+        if not filters:
+            return super().find_intents(offset, limit)
+        unknown = set(filters) - set(INTENT_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown intent filter(s): {', '.join(sorted(unknown))}")
+        ids = self.intents.ids_matching(filters)
+        stop = None if limit is None else offset + limit
+        return [self.intents[i] for i in ids[offset:stop]], len(ids)
+
+    def service_order_for_intent(self, intent_id: str) -> Optional[str]:
+        ids = self.service_orders.by_intent.get(intent_id)
+        return next(iter(ids)) if ids else None
+
+    def claim_idempotency_key(self, key: str, record: dict) -> Optional[dict]:
+        with self._idempotency_lock:
+            existing = self.idempotency.get(key)
+            if existing is not None and existing["expiresAt"] >= time.time():
+                return existing
+            self.idempotency.pop(key, None)
+            self.idempotency[key] = record
+            return None
+
+    def purge_idempotency_keys(self, now: float, max_entries: int) -> int:
+        with self._idempotency_lock:
+            stale = [key for key, record in self.idempotency.items() if record["expiresAt"] < now]
+            overflow = len(self.idempotency) - len(stale) - max_entries
+            if overflow > 0:
+                stale += [key for key, record in self.idempotency.items() if record["expiresAt"] >= now][:overflow]
+            for key in stale:
+                del self.idempotency[key]
+            return len(stale)
+
+    def dump(self, path: str):
+        data = {
+            "intentSpecification": dict(self.specs),
+            "intent": dict(self.intents.items()),
+            "serviceOrder": dict(self.service_orders.items())
+        }
+        with open(path, "wb") as f:
+            f.write(jsoncodec.dumps(data))
+
+    def load(self, path: str):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = jsoncodec.loads(f.read())
+            self.specs.update(data.get("intentSpecification", {}))
+            self.intents.update(data.get("intent", {}))
+            self.service_orders.update(data.get("serviceOrder", {}))
@@ -0,0 +1,274 @@
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Iterator, MutableMapping, Optional
+from utils import jsoncodec
+from .base import IntentStore, INTENT_FILTERS, intent_index_keys
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS intent_specification (
+    id   TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS intent (
+    id               TEXT PRIMARY KEY,
+    name             TEXT,
+    spec_id          TEXT,
+    namespace        TEXT,
+    deployment       TEXT,
+    metric           TEXT,
+    lifecycle_status TEXT,
+    chart_group      TEXT,
+    body             TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS intent_name_idx ON intent (name);
+CREATE INDEX IF NOT EXISTS intent_spec_idx ON intent (spec_id);
+CREATE INDEX IF NOT EXISTS intent_target_idx ON intent (namespace, deployment);
+CREATE INDEX IF NOT EXISTS intent_deployment_idx ON intent (deployment);
+CREATE INDEX IF NOT EXISTS intent_metric_idx ON intent (metric);
+CREATE INDEX IF NOT EXISTS intent_status_idx ON intent (lifecycle_status);
+CREATE INDEX IF NOT EXISTS intent_chart_group_idx ON intent (chart_group);
+CREATE TABLE IF NOT EXISTS service_order (
+    id        TEXT PRIMARY KEY,
+    intent_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS service_order_intent_idx ON service_order (intent_id);
+CREATE TABLE IF NOT EXISTS version (
+    key     TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idempotency_key (
+    id         TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    body       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_key_expiry_idx ON idempotency_key (expires_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+BUMP_VERSION = (
+    "INSERT INTO version (key, version) VALUES (?, 1) "
+    "ON CONFLICT(key) DO UPDATE SET version = version + 1"
+)
+
+
+def _intent_columns(intent: dict) -> dict:
+    return {"name": intent.get("name"), **intent_index_keys(intent)}
+
+
+class _Table(MutableMapping):
+    """
+    dict-like view over one table; every write is committed immediately.
+    """
+
+    def __init__(self, store: "SQLiteIntentStore", table: str, value_column: str,
+                 encode: Callable, decode: Callable, columns: Optional[Callable[[dict], dict]] = None,
+                 versioned: bool = False):
+        self._store = store
+        self._versioned = versioned
+        self._table = table
+        self._value_column = value_column
+        self._encode = encode
+        self._decode = decode
+        self._columns = columns
+
+    def __getitem__(self, key):
+        row = self._store.execute(
+            f"SELECT {self._value_column} FROM {self._table} WHERE id = ?", (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._decode(row[0])
+
+    def __setitem__(self, key, value):
+        columns = {"id": key, self._value_column: self._encode(value)}
+        if self._columns:
+            columns.update(self._columns(value))
+        names = ", ".join(columns)
+        placeholders = ", ".join("?" for _ in columns)
+        ## Upsert rather than REPLACE, so the row keeps its rowid (and its place in listings)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in columns if name != "id")
+        with self._store.transaction() as conn:
+            conn.execute(
+                f"INSERT INTO {self._table} ({names}) VALUES ({placeholders}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                tuple(columns.values())
+            )
+            self._bump(conn, key)
+
+    def __delitem__(self, key):
+        with self._store.transaction() as conn:
+            cursor = conn.execute(f"DELETE FROM {self._table} WHERE id = ?", (key,))
+            if cursor.rowcount:
+                self._bump(conn, key)
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def _bump(self, conn: sqlite3.Connection, key: str):
+        ## Versions live in the database, so every process sees the writes of the others
+        if self._versioned:
+            conn.execute(BUMP_VERSION, (self._table,))
+            conn.execute(BUMP_VERSION, (f"{self._table}/{key}",))
+
+    def version(self, key: Optional[str] = None) -> int:
+        version_key = self._table if key is None else f"{self._table}/{key}"
+        row = self._store.execute("SELECT version FROM version WHERE key = ?", (version_key,)).fetchone()
+        return row[0] if row else 0
+
+    def versioned_items(self) -> list[tuple[str, int, dict]]:
+        rows = self._store.execute(
+            f"SELECT t.id, COALESCE(v.version, 0), t.{self._value_column} FROM {self._table} t "
+            f"LEFT JOIN version v ON v.key = '{self._table}/' || t.id ORDER BY t.rowid"
+        ).fetchall()
+        return [(row[0], row[1], self._decode(row[2])) for row in rows]
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._store.execute(f"SELECT id FROM {self._table} ORDER BY rowid").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self._store.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+    def __contains__(self, key) -> bool:
+        return self._store.execute(
+            f"SELECT 1 FROM {self._table} WHERE id = ?", (key,)
+        ).fetchone() is not None
+
+    def values(self):
+        rows = self._store.execute(
+            f"SELECT {self._value_column} FROM {self._table} ORDER BY rowid"
+        ).fetchall()
+        return [self._decode(row[0]) for row in rows]
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> tuple[list, int]:
+        ## LIMIT -1 means no limit in SQLite
+        rows = self._store.execute(
+            f"SELECT {self._value_column} FROM {self._table} ORDER BY rowid LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset)
+        ).fetchall()
+        return [self._decode(row[0]) for row in rows], len(self)
+
+    def items(self):
+        rows = self._store.execute(
+            f"SELECT id, {self._value_column} FROM {self._table} ORDER BY rowid"
+        ).fetchall()
+        return [(row[0], self._decode(row[1])) for row in rows]
+
+
+class SQLiteIntentStore(IntentStore):
+    """
+    Embedded SQLite store in WAL mode. Every change is committed as it happens, so a crash
+    loses nothing, and several worker processes can share the same database file.
+    Intents are indexed by spec id, name, target namespace/deployment/metric and chart group, and
+    service orders by intent id; idempotency records by expiry.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        ## sqlite3 connections must not be shared between threads
+        self._local = threading.local()
+
+        compact = jsoncodec.dumps_str
+        self.specs = _Table(self, "intent_specification", "body", compact, jsoncodec.loads, versioned=True)
+        self.intents = _Table(self, "intent", "body", compact, jsoncodec.loads, columns=_intent_columns, versioned=True)
+        self.service_orders = _Table(self, "service_order", "intent_id", str, str)
+        self.idempotency = _Table(self, "idempotency_key", "body", compact, jsoncodec.loads,
+                                  columns=lambda record: {"expires_at": record["expiresAt"]})
+
+        self._connection().executescript(SCHEMA)
+        with self.transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex[:12],))
+        self.epoch = self.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        return self._connection().execute(sql, params)
+
+    def transaction(self):
+        return _Transaction(self._connection())
+
+    def find_intents(self, offset: int = 0, limit: Optional[int] = None, **filters) -> tuple[list[dict], int]:
+        filters = {key: value for key, value in filters.items() if value is not None}
+        unknown = set(filters) - set(INTENT_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown intent filter(s): {', '.join(sorted(unknown))}")
+        ## Column names come from INTENT_FILTERS only, values are always bound
+        where = " AND ".join(f"{name} = ?" for name in filters) or "1"
+        params = tuple(filters.values())
+        rows = self.execute(
+            f"SELECT body FROM intent WHERE {where} ORDER BY rowid LIMIT ? OFFSET ?",
+            params + (-1 if limit is None else limit, offset)
+        ).fetchall()
+        total = self.execute(f"SELECT COUNT(*) FROM intent WHERE {where}", params).fetchone()[0]
+        return [jsoncodec.loads(row[0]) for row in rows], total
+
+    def service_order_for_intent(self, intent_id: str) -> Optional[str]:
+        row = self.execute(
+            "SELECT id FROM service_order WHERE intent_id = ? LIMIT 1", (intent_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def claim_idempotency_key(self, key: str, record: dict) -> Optional[dict]:
+        ## One transaction, so concurrent claims from several processes cannot both succeed
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM idempotency_key WHERE id = ? AND expires_at < ?", (key, time.time()))
+            cursor = conn.execute(
+                "INSERT INTO idempotency_key (id, expires_at, body) VALUES (?, ?, ?) ON CONFLICT(id) DO NOTHING",
+                (key, record["expiresAt"], jsoncodec.dumps_str(record))
+            )
+            if cursor.rowcount:
+                return None
+            row = conn.execute("SELECT body FROM idempotency_key WHERE id = ?", (key,)).fetchone()
+        return jsoncodec.loads(row[0])
+
+    def purge_idempotency_keys(self, now: float, max_entries: int) -> int:
+        with self.transaction() as conn:
+            removed = conn.execute("DELETE FROM idempotency_key WHERE expires_at < ?", (now,)).rowcount
+            removed += conn.execute(
+                "DELETE FROM idempotency_key WHERE rowid NOT IN "
+                "(SELECT rowid FROM idempotency_key ORDER BY rowid DESC LIMIT ?)", (max_entries,)
+            ).rowcount
+        return removed
+
+    def import_from(self, other: IntentStore):
+        """Copy every document of another store into this one (used to migrate the JSON dump)."""
+        for spec_id, spec in other.specs.items():
+            self.specs[spec_id] = spec
+        for intent_id, intent in other.intents.items():
+            self.intents[intent_id] = intent
+        for service_order_id, intent_id in other.service_orders.items():
+            self.service_orders[service_order_id] = intent_id
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        ## IMMEDIATE takes the write lock up front, which avoids upgrade deadlocks between processes
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
@@ -0,0 +1,3 @@
+from .registry import ValidatorRegistry, target_schema_from_spec
+
+__all__ = ["ValidatorRegistry", "target_schema_from_spec"]
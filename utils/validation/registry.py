@@ -0,0 +1,89 @@
+import threading
+from typing import Optional
+from jsonschema import Draft7Validator
+
+## TMF characteristic valueType -> JSON Schema type
+VALUE_TYPE_TO_JSON_TYPE = {
+    "string": "string",
+    "number": "number",
+    "integer": "integer",
+    "boolean": "boolean",
+    "object": "object",
+    "array": "array",
+}
+
+
+def target_schema_from_spec(spec: dict) -> Optional[dict]:
+    """
+    Derive a JSON Schema for an Intent 'target' from the characteristicSpecification
+    of its IntentSpecification. Returns None when the spec declares no (well-formed) characteristics.
+
+    A characteristic is required unless it declares minCardinality 0, and
+    keys not declared by the spec are rejected.
+    """
+    characteristics = spec.get("characteristicSpecification")
+    if not isinstance(characteristics, list):
+        return None
+
+    properties = {}
+    required = []
+    for characteristic in characteristics:
+        ## Specs stored before their characteristics were validated may hold anything
+        if not isinstance(characteristic, dict):
+            continue
+        name = characteristic.get("name")
+        if not name or not isinstance(name, str):
+            continue
+        json_type = VALUE_TYPE_TO_JSON_TYPE.get(str(characteristic.get("valueType", "")).lower())
+        properties[name] = {"type": json_type} if json_type else {}
+        if characteristic.get("minCardinality", 1) != 0:
+            required.append(name)
+    if not properties:
+        return None
+
+    return {
+        "type": "object",
+        "required": required,
+        "properties": properties,
+        "additionalProperties": False
+    }
+
+
+class ValidatorRegistry:
+    """
+    Holds compiled Draft7 validators so that the request path never builds a schema.
+
+    The base IntentSpecification/Intent validators are compiled once; the 'target'
+    validator of each IntentSpecification is derived on first use and cached by spec id
+    together with the store version of the spec it was built from, so a spec replaced
+    in any worker process is picked up by the next lookup.
+    """
+
+    def __init__(self, intent_spec_schema: dict, intent_schema: dict):
+        Draft7Validator.check_schema(intent_spec_schema)
+        Draft7Validator.check_schema(intent_schema)
+        self.intent_spec_validator = Draft7Validator(intent_spec_schema)
+        self.intent_validator = Draft7Validator(intent_schema)
+        ## Spec id -> (spec version, validator); only the latest version seen is kept
+        self._target_validators: dict[str, tuple[int, Optional[Draft7Validator]]] = {}
+        self._lock = threading.Lock()
+
+    def target_validator(self, spec: dict, version: int) -> Optional[Draft7Validator]:
+        """
+        Validator of the spec's 'target'. `version` is the store version of the spec, read
+        before the spec itself: a concurrent update then only leaves an entry under an
+        outdated version, which is never looked up again.
+        """
+        spec_id = spec.get("id")
+        cached = self._target_validators.get(spec_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        schema = target_schema_from_spec(spec)
+        validator = Draft7Validator(schema) if schema else None
+        with self._lock:
+            self._target_validators[spec_id] = (version, validator)
+        return validator
+
+    def evict(self, spec_id: str):
+        with self._lock:
+            self._target_validators.pop(spec_id, None)